@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks for cointrader. The benchmarks are no tests and are not
+run by pytest. Run a single benchmark as module from the root of the
+repository, e.g.::
+
+    python -m benchmarks.bench_chart
+
+The suite in :mod:`benchmarks.suite` runs all benchmarks and compares
+the timings with a baseline stored for the machine::
+
+    python -m benchmarks.suite
+"""
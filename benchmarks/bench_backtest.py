@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""Measures the throughput of the headless backtest runner in candles
+per minute."""
+import datetime
+import time
+
+from cointrader.strategy import Followtrend, Klondike
+from cointrader.exchange import Exchange, BacktestMarket
+from cointrader.backtest import Backtest
+from cointrader.bot import Cointrader, Trade
+from benchmarks.data import synthetic_candles
+
+SIZES = (10000, 100000, 1000000)
+
+
+class ChartApi(object):
+
+    """Stand-in for the API which serves synthetic chart data."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def balance(self):
+        return {}
+
+    def chart(self, currency, start, end, period=1800):
+        return self.data
+
+
+def get_bot(strategy, data):
+    market = BacktestMarket(Exchange(None, ChartApi(data)), "BTC_DASH")
+    start = datetime.datetime.utcfromtimestamp(data[0]["date"])
+    end = datetime.datetime.utcfromtimestamp(data[-1]["date"])
+    bot = Cointrader(market, strategy(), "30m", start, end)
+    bot.btc = 1.0
+    bot.trades.append(Trade(start, "INIT", 0, 0, "BTC_DASH", data[0]["close"], 0, 0, 1.0, 0))
+    return bot
+
+
+def main():
+    print("{:>12} {:>8} {:>10} {:>16}".format("strategy", "points", "time [s]", "candles/min"))
+    for size in SIZES:
+        data = synthetic_candles(size)
+        for strategy in (Followtrend, Klondike):
+            bot = get_bot(strategy, data)
+            start = time.time()
+            Backtest(bot, persist=False).run()
+            duration = time.time() - start
+            print("{:>12} {:>8} {:>10.3f} {:>16.0f}".format(strategy.__name__, size, duration,
+                                                            size / duration * 60))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""Compares the memory needed to hold the chart data as list of
+dictionaries and as :class:`cointrader.candles.CandleStore`."""
+import gc
+import tracemalloc
+
+from cointrader.candles import CandleStore
+from benchmarks.data import synthetic_candles
+
+SIZE = 100000
+
+
+def allocated(func):
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    data, list_size = allocated(lambda: synthetic_candles(SIZE))
+    store, store_size = allocated(lambda: CandleStore(data))
+    print("{:>12} {:>16}".format("container", "bytes/point"))
+    print("{:>12} {:>16.1f}".format("list", list_size / float(SIZE)))
+    print("{:>12} {:>16.1f}".format("store", store_size / float(SIZE)))
+
+
+if __name__ == "__main__":
+    main()
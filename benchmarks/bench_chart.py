@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""Compares the cost to build a single chart. The old way serialised the
+chart data into CSV and parsed it again using pandas. The chart is now
+build directly from the columns of the chart data."""
+import io
+import datetime
+import timeit
+
+import pandas
+from stockstats import StockDataFrame
+
+from cointrader.chart import Chart, chart2csv
+from benchmarks.data import synthetic_candles
+
+SIZES = (120, 1000, 10000)
+
+
+def build_csv(data):
+    return StockDataFrame.retype(pandas.read_csv(io.StringIO(chart2csv(data))))
+
+
+def build_chart(data):
+    start = datetime.datetime.utcfromtimestamp(data[0]["date"])
+    end = datetime.datetime.utcfromtimestamp(data[-1]["date"])
+    return Chart(data, start, end)
+
+
+def measure(func, data, number):
+    return min(timeit.repeat(lambda: func(data), number=number, repeat=3)) / number
+
+
+def main():
+    print("{:>8} {:>14} {:>14} {:>8}".format("points", "csv [ms]", "chart [ms]", "speedup"))
+    for size in SIZES:
+        data = synthetic_candles(size)
+        number = max(1, 20000 // size)
+        before = measure(build_csv, data, number) * 1000
+        after = measure(build_chart, data, number) * 1000
+        print("{:>8} {:>14.3f} {:>14.3f} {:>7.1f}x".format(size, before, after, before / after))
+
+
+if __name__ == "__main__":
+    main()
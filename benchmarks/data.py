@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import random
+
+START = 1500000000
+# Timestamp of the first synthetic candle.
+
+
+def synthetic_candles(size, period=1800, seed=42, rate=0.07):
+    """Will return a list of `size` synthetic datapoints in the same
+    format as returned by the Poloniex chart API. The rates follow a
+    random walk so indicators and strategies get something to work on.
+
+    :size: Number of datapoints
+    :period: Seconds between two datapoints
+    :seed: Seed for the random generator to make the data reproducible
+    :rate: Start rate of the chart
+    :returns: List of datapoints as dictionary.
+    """
+    rnd = random.Random(seed)
+    data = []
+    close = rate
+    for i in range(size):
+        open_ = close
+        close = open_ * (1 + rnd.gauss(0, 0.01))
+        high = max(open_, close) * (1 + rnd.random() / 200)
+        low = min(open_, close) * (1 - rnd.random() / 200)
+        volume = rnd.random() * 10
+        data.append({u'date': START + i * period,
+                     u'open': open_,
+                     u'close': close,
+                     u'high': high,
+                     u'low': low,
+                     u'volume': volume,
+                     u'quoteVolume': volume / close,
+                     u'weightedAverage': (open_ + close) / 2})
+    return data
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""Benchmark suite with stored baselines.
+
+Times the start of the command line interface, the chart
+construction, every indicator, every strategy in
+:data:`cointrader.STRATEGIES`, a full backtest on a
+:class:`cointrader.exchange.BacktestMarket` and replaying large trade
+logs on synthetic chart data. The results are compared with a stored
+baseline and the suite exits with an error if a benchmark got slower
+than the tolerance allows::
+
+    python -m benchmarks.suite                  # compare with baseline
+    python -m benchmarks.suite --save           # store new baseline
+    python -m benchmarks.suite --size 100000 --baseline /tmp/large.json
+
+Timings depend on the machine. So the baselines are not part of the
+repository but stored per machine and Python version in
+``~/.cointrader/benchmarks``. A baseline measured on another platform,
+Python version or number of candles is not compared.
+"""
+import os
+import sys
+import json
+import timeit
+import argparse
+import datetime
+import platform
+import subprocess
+
+import sqlalchemy as sa
+
+from cointrader import STRATEGIES, indicators
+from cointrader.database import Base
+from cointrader.chart import Chart
+from cointrader.candles import CandleStore
+from cointrader.ledger import Ledger, statistic
+from cointrader.bot import Trade, replay_tradelog
+from cointrader.backtest import signal_series, run
+from cointrader.resample import resample
+from cointrader.indicators import MIN_POINTS
+from benchmarks.data import synthetic_candles
+
+BASELINE_DIR = os.path.join(os.getenv("HOME", ""), ".cointrader", "benchmarks")
+# Directory of the stored baselines.
+
+INDICATORS = ("sma", "ema", "double_cross", "macdh", "macdh_momententum",
+              "double_cross_series", "macdh_series", "macdh_momententum_series")
+
+
+def get_baseline_path():
+    """Will return the default file of the baseline of this machine and
+    Python version."""
+    name = "{}-py{}.json".format(platform.node() or "local",
+                                 ".".join(platform.python_version_tuple()[:2]))
+    return os.path.join(BASELINE_DIR, name)
+
+
+def load_baseline(filename, size):
+    """Will return the stored time per benchmark of the baseline in the
+    given file. The baseline is only returned if it was measured with the
+    same number of candles on the same platform and Python version.
+
+    :filename: File of the baseline
+    :size: Number of candles of the benchmarks
+    :returns: Dictionary with the time per benchmark
+    """
+    if not os.path.exists(filename):
+        return {}
+    with open(filename) as f:
+        stored = json.load(f)
+    if stored["size"] != size:
+        print("Baseline was measured with {} candles. Not comparing.".format(stored["size"]))
+        return {}
+    if (stored.get("machine"), stored.get("python")) != (platform.platform(), platform.python_version()):
+        print("Baseline was measured on {} with Python {}. Not comparing.".format(
+            stored.get("machine"), stored.get("python")))
+        return {}
+    return stored["results"]
+
+
+def build_chart(data):
+    return Chart(data, None, None)
+
+
+def build_ledger(size):
+    """Will return a ledger with `size` alternating buy and sell trades."""
+    ledger = Ledger("BTC_DASH")
+    date = datetime.datetime(2017, 1, 1)
+    ledger.init(date, 0.07, 1.0, 0)
+    for i in range(size):
+        rate = 0.07 * (1 + (i % 10 - 5) / 1000.0)
+        trade = {u'tradeID': i, u'date': date, u'rate': rate}
+        if ledger.btc:
+            trade.update({u'amount': ledger.btc / rate, u'total': ledger.btc})
+            ledger.buy({u'orderNumber': i, u'resultingTrades': [trade]})
+        else:
+            trade.update({u'amount': ledger.amount, u'total': ledger.amount * rate})
+            ledger.sell({u'orderNumber': i, u'resultingTrades': [trade]})
+    return ledger
+
+
+def get_session(ledger):
+    engine = sa.create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sa.orm.sessionmaker(bind=engine)()
+    ledger.flush(1, session)
+    session.commit()
+    return session
+
+
+def import_cli():
+    # The command line interface is started in a new interpreter, so
+    # no module is imported yet.
+    subprocess.check_call([sys.executable, "-c", "import cointrader.cli"])
+
+
+def cases(size):
+    """Will return the benchmarks as list of (name, function) tuples."""
+    data = CandleStore(synthetic_candles(size))
+    start = datetime.datetime.utcfromtimestamp(data[0]["date"])
+    end = datetime.datetime.utcfromtimestamp(data[-1]["date"])
+    first, last = data[0], data[-1]
+    ledger = build_ledger(size)
+    session = get_session(ledger)
+
+    result = [("import.cli", import_cli), ("chart", lambda: build_chart(data))]
+    for name in INDICATORS:
+        func = getattr(indicators, name)
+        # Every run works on a new chart. Otherwise the indicator values
+        # would already be computed.
+        result.append(("indicator.{}".format(name), lambda func=func: func(build_chart(data))))
+    for name in sorted(STRATEGIES):
+        factory = STRATEGIES[name]
+        result.append(("strategy.{}.signal".format(name),
+                       lambda factory=factory: factory().signal(build_chart(data))))
+        result.append(("strategy.{}.series".format(name),
+                       lambda factory=factory: signal_series(factory(), build_chart(data), MIN_POINTS)))
+        result.append(("backtest.{}".format(name),
+                       lambda factory=factory: run(data, "BTC_DASH", factory(), "30m", start, end)))
+    result.append(("resample.2h", lambda: resample(data, 7200)))
+    result.append(("tradelog.replay", lambda: replay_tradelog(ledger)))
+    result.append(("tradelog.stat", lambda: statistic(ledger, first, last)))
+    result.append(("tradelog.db", lambda: replay_tradelog(session.query(Trade).all())))
+    return result
+
+
+def measure(func, repeat=5):
+    """Will return the best time of `repeat` runs of `func` in seconds."""
+    func()
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def compare(results, baseline, tolerance):
+    """Will compare the results with the baseline.
+
+    :results: Dictionary with the time per benchmark
+    :baseline: Dictionary with the time per benchmark of the baseline
+    :tolerance: Allowed slow down as fraction of the baseline
+    :returns: List of (name, time, baseline time, ratio, regression) tuples
+    """
+    rows = []
+    for name in sorted(results):
+        before = baseline.get(name)
+        ratio = results[name] / before if before else None
+        rows.append((name, results[name], before, ratio,
+                     ratio is not None and ratio > 1 + tolerance))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark suite of cointrader")
+    parser.add_argument("--size", type=int, default=10000, help="Number of candles")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark")
+    parser.add_argument("--baseline", default=None,
+                        help="File of the baseline. Defaults to a file per machine in {}".format(BASELINE_DIR))
+    parser.add_argument("--save", action="store_true", help="Store the results as baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slow down compared to the baseline (0.25 = 25%%)")
+    parser.add_argument("--filter", default="", help="Only run benchmarks containing this text")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, func in cases(args.size):
+        if args.filter in name:
+            results[name] = measure(func, args.repeat)
+
+    filename = args.baseline or get_baseline_path()
+    baseline = load_baseline(filename, args.size)
+
+    rows = compare(results, baseline, args.tolerance)
+    print("{:<32} {:>12} {:>12} {:>8}".format("benchmark", "time [ms]", "base [ms]", "change"))
+    for name, time, before, ratio, regression in rows:
+        print("{:<32} {:>12.3f} {:>12} {:>8} {}".format(
+            name, time * 1000,
+            "{:.3f}".format(before * 1000) if before else "--",
+            "{:+.0%}".format(ratio - 1) if ratio else "--",
+            "REGRESSION" if regression else ""))
+
+    if args.save:
+        # Benchmarks which did not run because of --filter keep their
+        # baseline.
+        baseline.update(results)
+        directory = os.path.dirname(filename)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(filename, "w") as f:
+            json.dump({"size": args.size,
+                       "python": platform.python_version(),
+                       "machine": platform.platform(),
+                       "results": baseline}, f, indent=2, sort_keys=True)
+        print("Stored baseline in {}".format(filename))
+        return 0
+    return 1 if any(row[4] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,70 @@
 # -*- coding: utf-8 -*-
-import sqlalchemy as sa
-from sqlalchemy.ext.declarative import declarative_base
-from cointrader.strategy import NullStrategy
-from cointrader.strategy import Followtrend
-from cointrader.strategy import Klondike
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
 
 __author__ = """Torsten Irländer"""
 __email__ = 'torsten.irlaender@googlemail.com'
 __version__ = '0.5.0'
 
-Base = declarative_base()
 
-engine = sa.create_engine('sqlite:///cointrader.db')
-Session = sa.orm.sessionmaker(bind=engine)
-db = Session()
+class Strategies(Mapping):
 
-STRATEGIES = {
-    "null": NullStrategy,
-    "trend": Followtrend,
-    "klondike": Klondike
-}
+    """Registry of the strategies by their name. The strategy classes
+    are imported on first access as they need numpy."""
+
+    def __init__(self, **names):
+        """
+        :names: Name of the class in :mod:`cointrader.strategy` per strategy
+        """
+        self._names = names
+
+    def __getitem__(self, key):
+        from cointrader import strategy
+        return getattr(strategy, self._names[key])
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+
+STRATEGIES = Strategies(
+    null="NullStrategy",
+    trend="Followtrend",
+    klondike="Klondike"
+)
+
+
+class DatabaseAttribute(object):
+
+    """Proxy for an attribute of :mod:`cointrader.database`. The
+    database moved into its own module and is only set up when it is
+    used. Models must derive from :data:`cointrader.database.Base`
+    directly."""
+
+    def __init__(self, name):
+        """
+        :name: Name of the attribute in :mod:`cointrader.database`
+        """
+        self._name = name
+
+    def _get(self):
+        from cointrader import database
+        if self._name == "engine":
+            return database.get_engine()
+        return getattr(database, self._name)
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._get()(*args, **kwargs)
+
+
+Base = DatabaseAttribute("Base")
+Session = DatabaseAttribute("Session")
+engine = DatabaseAttribute("engine")
+db = DatabaseAttribute("db")
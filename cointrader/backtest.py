@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""Headless runner for backtests.
+
+A backtest does not need the interactive loop of a live bot: There is no
+user to ask, no reason to wait for the next datapoint and nobody is
+interested in the state of the bot before the backtest is finished. The
+:class:`Backtest` computes the signals of the strategy for the whole
+chart at once and only visits the datapoints where the strategy wants to
+buy or sell. The trades are kept in a :class:`cointrader.ledger.Ledger`
+and are optionally written to the database once after the backtest.
+"""
+import datetime
+import logging
+import multiprocessing
+
+import numpy
+
+from cointrader.database import db
+from cointrader.indicators import WAIT, BUY, SELL, MIN_POINTS
+from cointrader.ledger import Ledger, statistic, ENTRY_FIELDS
+from cointrader.exchange import BacktestMarket, Market, FEE
+from cointrader.cache import result_key
+
+log = logging.getLogger(__name__)
+
+
+def signal_series(strategy, chart, start=0):
+    """Will return the signals of the strategy for every datapoint of the
+    chart. See :meth:`cointrader.strategy.Strategy.signal_series`.
+    Strategies without vectorized signals are asked for every datapoint
+    on a growing view of the chart.
+
+    :strategy: Strategy instance
+    :chart: Chart instance
+    :start: Position of the first datapoint to evaluate
+    :returns: Numpy array of signal values.
+    """
+    try:
+        return strategy.signal_series(chart, start)
+    except NotImplementedError:
+        signals = numpy.zeros(len(chart), dtype=int)
+        for i in range(start, len(chart)):
+            signals[i] = strategy.signal(chart.view(i + 1)).value
+        return signals
+
+
+def execute(market, ledger, signals, start=0, stop=None, accept=None):
+    """Will place the orders for the BUY and SELL signals between the
+    `start` and `stop` position on the market and record the trades in
+    the ledger. Signals which can not be followed because there are no
+    BTC to buy or no coins to sell are ignored.
+
+    :market: :class:`cointrader.exchange.BacktestMarket` instance
+    :ledger: :class:`cointrader.ledger.Ledger` instance
+    :signals: Numpy array of signal values for every datapoint
+    :start: Position of the first signal
+    :stop: Position after the last signal
+    :accept: Optional function which is called with the position of a
+        signal and returns False if the signal should be ignored.
+    """
+    for index in numpy.flatnonzero(signals[start:stop] != WAIT) + start:
+        value = signals[index]
+        if value == BUY and not ledger.btc:
+            continue
+        if value == SELL and not ledger.amount:
+            continue
+        if accept is not None and not accept(index):
+            continue
+        market.seek(index)
+        if value == BUY:
+            ledger.buy(market.buy(ledger.btc))
+        else:
+            ledger.sell(market.sell(ledger.amount))
+
+
+def evaluate(data, market, signals, start, stop, btc=1.0, amount=0, ledger=None):
+    """Will follow the signals between the `start` and `stop` position
+    on the chart data and return the statistic.
+
+    :data: Chart data as CandleStore
+    :market: Currency pair like BTC_DASH.
+    :signals: Numpy array of signal values for every datapoint
+    :start: Position of the first datapoint
+    :stop: Position after the last datapoint
+    :btc: Amount of BTC to start with
+    :amount: Amount of coins to start with
+    :ledger: Optional ledger to continue. `btc` and `amount` are
+        ignored in this case.
+    :returns: Statistic like :meth:`cointrader.bot.Cointrader.stat`
+        including the number of trades.
+    """
+    first = data[start]
+    if ledger is None:
+        ledger = Ledger(market)
+        ledger.init(datetime.datetime.utcfromtimestamp(first["date"]), first["close"], btc, amount)
+    trades = len(ledger)
+    execute(BacktestMarket(None, market, data), ledger, signals, start, stop)
+    stat = statistic(ledger, first, data[stop - 1])
+    stat["trades"] = len(ledger) - trades
+    return stat
+
+
+class Backtest(object):
+
+    """Runs a bot on a :class:`cointrader.exchange.BacktestMarket`."""
+
+    def __init__(self, bot, persist=False, cache=None):
+        """
+        :bot: :class:`cointrader.bot.Cointrader` instance operating on a
+            BacktestMarket. The bot does not need to be stored in the
+            database.
+        :persist: If True the trades of the backtest are written to the
+            database after the backtest if the bot is stored in the
+            database. The trades of bots which are not stored are only
+            added to the trades of the bot.
+        :cache: Optional :class:`cointrader.cache.ResultCache`. Backtests
+            which are already in the cache are not run again.
+        """
+        self.bot = bot
+        self.persist = persist
+        self.cache = cache
+        self.ledger = Ledger(bot._market._name, bot.trades)
+        """Trades of the bot including the trades of the backtest"""
+
+    def signals(self):
+        """Will return the signals of the strategy for every datapoint of
+        the chart of the backtest. The signals before the first
+        datapoint of the backtest are WAIT.
+
+        :returns: Numpy array of signal values.
+        """
+        bot = self.bot
+        market = bot._market
+        chart = market.get_chart(bot._resolution, bot._start, bot._end)
+        return signal_series(bot._strategy, market.chart, len(chart) - 1)
+
+    def key(self):
+        """Will return the key of the backtest in the result cache. The
+        key covers the chart data, the strategy and its parameters, the
+        fee, the timeframe and the initial trades of the bot."""
+        bot = self.bot
+        market = bot._market
+        market.get_chart(bot._resolution, bot._start, bot._end)
+        strategy = bot._strategy
+        return result_key(market.chart.data.fingerprint(), market._name, bot._resolution,
+                          "{}.{}".format(strategy.__module__, strategy.__class__.__name__),
+                          strategy.params, FEE, bot._start, bot._end,
+                          [entry.todict() for entry in self.ledger])
+
+    def run(self):
+        """Will run the backtest and return the bot."""
+        bot = self.bot
+        market = bot._market
+        ledger = self.ledger
+        key = None
+        result = None
+        trades = len(ledger)
+        if self.cache is not None:
+            key = self.key()
+            result = self.cache.get(key)
+        if result is None:
+            signals = self.signals()
+            dates = market.chart.data.column("date")
+
+            def in_time(index):
+                return bot._in_time(datetime.datetime.utcfromtimestamp(dates[index]))
+
+            execute(market, ledger, signals, accept=in_time)
+            market.seek(len(signals) - 1)
+            log.info("Backtest finished with {} trades".format(len(ledger)))
+            if key is not None:
+                self.cache.set(key, {"trades": [entry.todict() for entry in ledger[trades:]]})
+        else:
+            ledger.load(result["trades"])
+            market.seek(len(market.chart) - 1)
+            log.info("Backtest loaded from cache with {} trades".format(len(ledger)))
+        bot.btc = ledger.btc
+        bot.amount = ledger.amount
+        if self.persist and bot.id is not None:
+            ledger.flush(bot.id)
+            db.commit()
+            # The trades of the bot are loaded again including the
+            # trades written by the ledger.
+            db.expire(bot, ["trades"])
+        else:
+            from cointrader.bot import Trade
+            bot.trades.extend(Trade(*[getattr(entry, field) for field in ENTRY_FIELDS])
+                              for entry in ledger[trades:])
+        return bot
+
+    def stat(self):
+        """Will return the statistic of the backtest. See
+        :meth:`cointrader.bot.Cointrader.stat`."""
+        bot = self.bot
+        chart = bot._market.get_chart(bot._resolution, bot._start, bot._end)
+        return statistic(self.ledger, chart.get_first_point(), chart.get_last_point())
+
+
+def run(data, market, strategy, resolution, start, end, btc=1.0, amount=0):
+    """Will run a backtest of the strategy on the given chart data
+    without storing anything in the database.
+
+    :data: Chart data as CandleStore
+    :market: Currency pair like BTC_DASH.
+    :strategy: Strategy instance
+    :resolution: Resolution of the chart data
+    :start: Datetime where the backtest starts
+    :end: Datetime where the backtest ends
+    :btc: Amount of BTC the bot starts with
+    :amount: Amount of coins the bot starts with
+    :returns: Statistic of the backtest including the number of trades.
+    """
+    from cointrader.bot import new_bot
+    bot = new_bot(BacktestMarket(None, market, data), strategy,
+                  resolution, start, end, btc, amount)
+    backtest = Backtest(bot)
+    backtest.run()
+    stat = backtest.stat()
+    stat["trades"] = len(backtest.ledger) - 1
+    return stat
+
+
+def _run_market(task):
+    market, data, strategy, params, args = task
+    return market, run(data, market, strategy(**params), *args)
+
+
+def run_markets(exchange, markets, strategy, resolution, start, end,
+                btc=1.0, amount=0, params=None, processes=None):
+    """Will backtest the strategy on several markets. The chart data of
+    all markets is fetched concurrently and the backtests run in a pool
+    of worker processes. Markets without enough chart data are skipped.
+
+    :exchange: :class:`cointrader.exchange.Exchange` instance
+    :markets: List of currency pairs like BTC_DASH.
+    :strategy: Class of the strategy
+    :params: Optional dictionary with the parameters of the strategy
+    :processes: Number of worker processes. Defaults to the number of CPUs.
+    :returns: List of tuples with the market and the statistic of the
+        backtest in the order of the markets.
+    """
+    charts = exchange.get_charts([Market(exchange, m) for m in markets], resolution, start, end)
+    args = (resolution, start, end, btc, amount)
+    tasks = []
+    for market, chart in zip(markets, charts):
+        if len(chart.data) <= MIN_POINTS:
+            log.warning("Skipping {}: Not enough chart data".format(market))
+            continue
+        tasks.append((market, chart.data, strategy, params or {}, args))
+    if processes == 1:
+        return [_run_market(task) for task in tasks]
+    pool = multiprocessing.Pool(processes)
+    try:
+        return pool.map(_run_market, tasks)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def aggregate(results):
+    """Will sum up the statistics of backtests on several markets.
+
+    :results: List of tuples with the market and the statistic.
+    :returns: Statistic over all markets.
+    """
+    stats = [stat for market, stat in results]
+    start_value = sum(s["trader_start_value"] for s in stats)
+    end_value = sum(s["trader_end_value"] for s in stats)
+    market_end_value = sum(s["market_end_value"] for s in stats)
+    return {
+        "start": min(s["start"] for s in stats),
+        "end": max(s["end"] for s in stats),
+        "markets": len(stats),
+        "trades": sum(s["trades"] for s in stats),
+        "wins": len([s for s in stats if s["profit_cointrader"] > s["profit_chart"]]),
+        "market_start_value": start_value,
+        "market_end_value": market_end_value,
+        "profit_chart": (market_end_value - start_value) / market_end_value * 100,
+        "trader_start_value": start_value,
+        "trader_end_value": end_value,
+        "profit_cointrader": (end_value - start_value) / end_value * 100,
+    }
@@ -7,11 +7,13 @@ import time
 import logging
 import sqlalchemy as sa
 import click
-from cointrader import Base, engine, db
+from cointrader.database import Base, get_engine, db
 from cointrader.indicators import (
     WAIT, BUY, SELL, Signal, signal_map
 )
 from cointrader.exchanges.poloniex import ApiError
+from cointrader.backtest import Backtest
+from cointrader.ledger import replay, statistic
 from cointrader.helpers import (
     render_bot_statistic, render_bot_tradelog,
     render_bot_title, render_signal_detail,
@@ -26,23 +28,11 @@ log = logging.getLogger(__name__)
 
 
 def replay_tradelog(trades):
-    btc = 0
-    amount = 0
-    for t in trades:
-        if t.order_type == "INIT":
-            btc = t.btc
-            amount = t.amount
-        elif t.order_type == "BUY":
-            btc -= t.btc
-            amount += t.amount
-        else:
-            btc += t.btc
-            amount -= t.amount
-    return btc, amount
+    return replay(trades)
 
 
 def init_db():
-    Base.metadata.create_all(engine)
+    Base.metadata.create_all(get_engine())
 
 
 def load_bot(market, strategy, resolution, start, end):
@@ -73,18 +63,18 @@ def load_bot(market, strategy, resolution, start, end):
         return None
 
 
-def create_bot(market, strategy, resolution, start, end, btc, amount):
-    """Will create a new bot instance."""
+def new_bot(market, strategy, resolution, start, end, btc, amount):
+    """Will create a new bot instance which is not stored in the
+    database. See :func:`get_bot` for the arguments."""
     bot = Cointrader(market, strategy, resolution, start, end)
     log.info("Creating new bot {}".format(bot.market))
 
-    # Setup the bot with coins and BTC.
+    # Setup the bot with coins and BTC. The balances of the account are
+    # fetched only once.
     if btc is None:
-        balances = market._exchange.get_balance()
-        btc = balances["BTC"]["quantity"]
+        btc = market._exchange.account.quantity("BTC")
     if amount is None:
-        balances = market._exchange.get_balance()
-        amount = balances[market.currency]["quantity"]
+        amount = market._exchange.account.quantity(market.currency)
     bot.btc = btc
     bot.amount = amount
 
@@ -94,6 +84,12 @@ def create_bot(market, strategy, resolution, start, end, btc, amount):
 
     trade = Trade(date, "INIT", 0, 0, market._name, rate, amount, 0, btc, 0)
     bot.trades.append(trade)
+    return bot
+
+
+def create_bot(market, strategy, resolution, start, end, btc, amount):
+    """Will create a new bot instance and store it in the database."""
+    bot = new_bot(market, strategy, resolution, start, end, btc, amount)
     db.add(bot)
     db.commit()
     return bot
@@ -229,10 +225,10 @@ class Cointrader(Base):
         for t in result["resultingTrades"]:
             trade_id = t["tradeID"]
             date = t["date"]
-            amount = t["amount"]
-            total_amount += float(amount)
-            rate = t["rate"]
-            btc = t["total"]
+            amount = float(t["amount"])
+            total_amount += amount
+            rate = float(t["rate"])
+            btc = float(t["total"])
             trade = Trade(date, order_type, order_id, trade_id, self._market._name, rate, 0, amount, self.btc, btc)
             self.trades.append(trade)
 
@@ -258,10 +254,10 @@ class Cointrader(Base):
         for t in result["resultingTrades"]:
             trade_id = t["tradeID"]
             date = t["date"]
-            amount = t["amount"]
-            rate = t["rate"]
-            btc = t["total"]
-            total_btc += float(btc)
+            amount = float(t["amount"])
+            rate = float(t["rate"])
+            btc = float(t["total"])
+            total_btc += btc
             trade = Trade(date, order_type, order_id, trade_id, self._market._name, rate, self.amount, amount, 0, btc)
             self.trades.append(trade)
 
@@ -285,50 +281,7 @@ class Cointrader(Base):
         of the bot the performance should be better."""
 
         chart = self._market.get_chart(self._resolution, self._start, self._end)
-
-        first = chart.get_first_point()
-        market_start_rate = first["close"]
-        start_date = datetime.datetime.utcfromtimestamp(first["date"])
-
-        last = chart.get_last_point()
-        market_end_rate = last["close"]
-        end_date = datetime.datetime.utcfromtimestamp(last["date"])
-
-        # Set start value
-        for trade in self.trades:
-            if trade.order_type == "INIT":
-                trader_start_btc = trade.btc
-                trader_start_amount = trade.amount
-                market_start_btc = trade.btc
-                market_start_amount = trade.amount
-
-        trader_end_btc = trader_start_btc
-        trader_end_amount = trader_start_amount
-        for trade in self.trades:
-            if trade.order_type == "BUY":
-                trader_end_amount += trade.amount_taxed
-                trader_end_btc -= trade.btc
-            elif trade.order_type == "SELL":
-                trader_end_btc += trade.btc_taxed
-                trader_end_amount -= trade.amount
-
-        trader_start_value = trader_start_btc + trader_start_amount * market_start_rate
-        market_start_value = trader_start_value
-        trader_end_value = trader_end_btc + trader_end_amount * market_end_rate
-        market_end_value = market_start_btc + market_start_amount * market_end_rate
-        trader_profit = trader_end_value - trader_start_value
-        market_profit = market_end_value - market_start_value
-
-        stat = {
-            "start": start_date,
-            "end": end_date,
-            "market_start_value": market_start_value,
-            "market_end_value": market_end_value,
-            "profit_chart": market_profit / market_end_value * 100,
-            "trader_start_value": trader_start_value,
-            "trader_end_value": trader_end_value,
-            "profit_cointrader": trader_profit / trader_end_value * 100,
-        }
+        stat = statistic(self.trades, chart.get_first_point(), chart.get_last_point())
         if delete_trades:
             for trade in self.trades:
                 db.delete(trade)
@@ -364,13 +317,21 @@ class Cointrader(Base):
 
         By setting the `backtest` option the trade will be simulated on
         real chart data. This is useful for testing to see how good
-        your strategy performs.
+        your strategy performs. Interactive backtests step through the
+        chart datapoint by datapoint. Automatic backtests are run
+        without any user interaction by
+        :class:`cointrader.backtest.Backtest`.
 
         :btc: Amount of BTC to start trading with
         :backtest: Simulate trading on historic chart data on the given market.
+        :automatic: Follow the signals without user interaction.
         :returns: None
         """
 
+        if backtest and automatic:
+            Backtest(self, persist=True).run()
+            return
+
         interval = self._get_interval(automatic, backtest)
         while 1:
             chart = self._market.get_chart(self._resolution, self._start, self._end)
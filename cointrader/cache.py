@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Caches for data from the exchange."""
+import datetime
+import time
+import logging
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import sqlalchemy as sa
+from cointrader.database import Base
+from cointrader.candles import FIELDS
+
+log = logging.getLogger(__name__)
+
+candles = sa.Table(
+    "candles", Base.metadata,
+    sa.Column("market", sa.String, primary_key=True),
+    sa.Column("period", sa.Integer, primary_key=True),
+    sa.Column("date", sa.Integer, primary_key=True),
+    *[sa.Column(field, sa.Float, nullable=False) for field in FIELDS[1:]]
+)
+
+candle_ranges = sa.Table(
+    "candle_ranges", Base.metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("market", sa.String, nullable=False),
+    sa.Column("period", sa.Integer, nullable=False),
+    sa.Column("start", sa.Integer, nullable=False),
+    sa.Column("end", sa.Integer, nullable=False)
+)
+
+
+def totimestamp(dt):
+    return int((dt - datetime.datetime(1970, 1, 1)).total_seconds())
+
+
+def fromtimestamp(ts):
+    return datetime.datetime.utcfromtimestamp(ts)
+
+
+def merge_ranges(ranges):
+    """Will merge overlapping or adjacent ranges.
+
+    :ranges: List of (start, end) tuples
+    :returns: Sorted list of (start, end) tuples
+    """
+    result = []
+    for start, end in sorted(ranges):
+        if result and start <= result[-1][1] + 1:
+            result[-1] = (result[-1][0], max(result[-1][1], end))
+        else:
+            result.append((start, end))
+    return result
+
+
+def missing_ranges(start, end, ranges):
+    """Will return the parts of the range from `start` to `end` which
+    are not covered by the given ranges.
+
+    :start: Start of the requested range
+    :end: End of the requested range
+    :ranges: Sorted list of (start, end) tuples which are covered
+    :returns: List of (start, end) tuples
+    """
+    result = []
+    for r_start, r_end in ranges:
+        if r_end < start:
+            continue
+        if r_start > end:
+            break
+        if r_start > start:
+            result.append((start, r_start - 1))
+        start = max(start, r_end + 1)
+    if start <= end:
+        result.append((start, end))
+    return result
+
+
+class CandleCache(object):
+
+    """Persistent local store for chart data. The chart data is stored
+    per market and period in the database together with the time ranges
+    which are already held by the cache. Requesting chart data will only
+    fetch the missing time ranges from the API and serve everything else
+    from the database.
+
+    Datapoints are only recorded as held once the period of the datapoint
+    is over. The last datapoint of a market is still forming and is
+    fetched again on the next request.
+
+    The cache can be used by several threads. Missing chart data is
+    fetched concurrently but the database is only accessed by one
+    thread at a time."""
+
+    def __init__(self, engine):
+        """
+        :engine: SQLAlchemy engine of the database
+        """
+        self._engine = engine
+        self._initialised = False
+        self._lock = threading.Lock()
+        self.fetched = 0
+        """Number of requests to the API"""
+
+    def _init(self):
+        with self._lock:
+            if not self._initialised:
+                Base.metadata.create_all(self._engine, tables=[candles, candle_ranges])
+                self._initialised = True
+
+    def _get_ranges(self, conn, market, period):
+        query = candle_ranges.select().where(sa.and_(candle_ranges.c.market == market,
+                                                     candle_ranges.c.period == period))
+        return merge_ranges([(r.start, r.end) for r in conn.execute(query)])
+
+    def _set_ranges(self, conn, market, period, ranges):
+        conn.execute(candle_ranges.delete().where(sa.and_(candle_ranges.c.market == market,
+                                                          candle_ranges.c.period == period)))
+        if ranges:
+            conn.execute(candle_ranges.insert(), [{"market": market, "period": period,
+                                                   "start": start, "end": end}
+                                                  for start, end in ranges])
+
+    def _store(self, conn, market, period, start, end, data):
+        conn.execute(candles.delete().where(sa.and_(candles.c.market == market,
+                                                    candles.c.period == period,
+                                                    candles.c.date >= start,
+                                                    candles.c.date <= end)))
+        rows = []
+        for point in data:
+            row = dict((field, point[field]) for field in FIELDS)
+            row["market"] = market
+            row["period"] = period
+            rows.append(row)
+        if rows:
+            conn.execute(candles.insert(), rows)
+
+    def _load(self, conn, market, period, start, end):
+        query = candles.select().where(sa.and_(candles.c.market == market,
+                                               candles.c.period == period,
+                                               candles.c.date >= start,
+                                               candles.c.date <= end)).order_by(candles.c.date)
+        return [dict((field, getattr(row, field)) for field in FIELDS)
+                for row in conn.execute(query)]
+
+    def chart(self, api, market, start, end, period=1800):
+        """Will return the chart data of the given market. Missing time
+        ranges are fetched from the `api`. See
+        :meth:`cointrader.exchanges.poloniex.Poloniex.chart` for details
+        on the arguments and the returned chart data.
+
+        :api: API to fetch missing chart data
+        :market: Currency pair like BTC_DASH.
+        :start: Datetime object.
+        :end: Datetime object.
+        :period: Period of the datapoints in seconds.
+        :returns: List of datapoints as dictionary.
+        """
+        self._init()
+        ts_start = totimestamp(start)
+        ts_end = totimestamp(end)
+        # Datapoints which are not over are not recorded as held.
+        completed = int(time.time()) - period
+        with self._lock:
+            with self._engine.connect() as conn:
+                ranges = self._get_ranges(conn, market, period)
+
+        # The requests are sent without holding the lock, so other
+        # threads can fetch their chart data at the same time.
+        fetched = []
+        for f_start, f_end in missing_ranges(ts_start, ts_end, ranges):
+            log.debug("Fetching {} {} from {} to {}".format(market, period, f_start, f_end))
+            data = api.chart(market, fromtimestamp(f_start), fromtimestamp(f_end), period)
+            # The API returns a single empty datapoint if there is
+            # no data in the time range.
+            data = [point for point in data if point["date"] and f_start <= point["date"] <= f_end]
+            fetched.append((f_start, f_end, data))
+
+        with self._lock:
+            self.fetched += len(fetched)
+            with self._engine.begin() as conn:
+                ranges = self._get_ranges(conn, market, period)
+                for f_start, f_end, data in fetched:
+                    self._store(conn, market, period, f_start, f_end, data)
+                    if f_start <= min(f_end, completed):
+                        ranges.append((f_start, min(f_end, completed)))
+                self._set_ranges(conn, market, period, merge_ranges(ranges))
+                return self._load(conn, market, period, ts_start, ts_end)
+
+
+def result_key(*parts):
+    """Will return a key for the :class:`ResultCache` from the given
+    parts. The parts must be serialisable as JSON.
+
+    :returns: Hex digest
+    """
+    data = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def replace(src, dst):
+    """Will rename the file `src` to `dst`. An existing file `dst` is
+    replaced, also on Windows where a rename fails in this case."""
+    if hasattr(os, "replace"):
+        os.replace(src, dst)
+        return
+    try:
+        os.rename(src, dst)
+    except OSError:
+        os.remove(dst)
+        os.rename(src, dst)
+
+
+class ResultCache(object):
+
+    """Content addressed cache for results of backtests on the local
+    disk. Every result is stored as JSON file named by its key. If the
+    size of all files exceeds the maximum size the least recently used
+    results are removed."""
+
+    def __init__(self, path, max_size=100 * 1024 * 1024):
+        """
+        :path: Directory of the cache. Is created if it does not exist.
+        :max_size: Maximum size of the cache in bytes.
+        """
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    def _filename(self, key):
+        return os.path.join(self.path, "{}.json".format(key))
+
+    def get(self, key):
+        """Will return the cached result for the key or None."""
+        filename = self._filename(key)
+        try:
+            with open(filename) as f:
+                result = json.load(f)
+        except (IOError, OSError, ValueError):
+            self.misses += 1
+            return None
+        # The modification time is used to find the least recently
+        # used results.
+        os.utime(filename, None)
+        self.hits += 1
+        return result
+
+    def set(self, key, result):
+        """Will store the result for the key. The result must be
+        serialisable as JSON. Other values like datetimes are stored as
+        string."""
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(result, f, default=str)
+        replace(tmp, self._filename(key))
+        self.evict()
+
+    def evict(self):
+        """Will remove the least recently used results until the cache
+        fits into its maximum size."""
+        files = []
+        for name in os.listdir(self.path):
+            if name.endswith(".json"):
+                stat = os.stat(os.path.join(self.path, name))
+                files.append((stat.st_mtime, stat.st_size, name))
+        size = sum(f[1] for f in files)
+        for mtime, fsize, name in sorted(files):
+            if size <= self.max_size:
+                break
+            log.debug("Evicting result {}".format(name))
+            os.remove(os.path.join(self.path, name))
+            size -= fsize
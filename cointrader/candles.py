@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Compact storage for chart data.
+
+The chart API returns the chart data as a list of dictionaries. Each
+datapoint (candle) takes several hundred bytes this way. The
+:class:`CandleStore` keeps the same data in one typed array per field
+which needs 8 bytes per value and datapoint only.
+"""
+import array
+import bisect
+import hashlib
+
+from cointrader.streaming import SeriesView
+
+FIELDS = ("date", "open", "high", "low", "close",
+          "volume", "quoteVolume", "weightedAverage")
+# Fields of a datapoint in the chart data.
+
+TYPECODES = {"date": "l"}
+# Typecode of the array per field. Defaults to "d" (float).
+
+
+def tobytes(values):
+    """Will return the machine values of the array as bytes."""
+    # Arrays of Python 2 only know tostring().
+    if hasattr(values, "tobytes"):
+        return values.tobytes()
+    return values.tostring()
+
+
+def frombytes(values, data):
+    """Will append the machine values in the bytes `data` to the array."""
+    if hasattr(values, "frombytes"):
+        values.frombytes(data)
+    else:
+        values.fromstring(data)
+
+
+def toarrays(data):
+    """Will return the values of the chart data as numpy array per field.
+
+    :data: CandleStore
+    :returns: Dictionary with a numpy array per field
+    """
+    import numpy
+    return dict((field, numpy.array(data.column(field).tolist(), dtype=TYPECODES.get(field, "d")))
+                for field in FIELDS)
+
+
+def fromarrays(arrays):
+    """Will return a CandleStore with the values of the given numpy
+    arrays per field."""
+    import numpy
+    columns = {}
+    for field in FIELDS:
+        typecode = TYPECODES.get(field, "d")
+        columns[field] = array.array(typecode)
+        frombytes(columns[field], numpy.ascontiguousarray(arrays[field], dtype=typecode).tobytes())
+    return CandleStore(columns=columns)
+
+
+class Candle(object):
+
+    """A single datapoint within a :class:`CandleStore`. The candle
+    does not hold any data itself but reads the values from the store.
+    It can be used like the dictionary returned by the chart API."""
+
+    __slots__ = ("_columns", "_index")
+
+    def __init__(self, columns, index):
+        self._columns = columns
+        self._index = index
+
+    def __getitem__(self, key):
+        return self._columns[key][self._index]
+
+    def __contains__(self, key):
+        return key in self._columns
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def __eq__(self, other):
+        try:
+            return all(self[key] == other[key] for key in FIELDS)
+        except (KeyError, TypeError):
+            return False
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return repr(self.todict())
+
+    def get(self, key, default=None):
+        if key in self._columns:
+            return self[key]
+        return default
+
+    def keys(self):
+        return list(FIELDS)
+
+    def items(self):
+        return [(key, self[key]) for key in FIELDS]
+
+    def todict(self):
+        return dict(self.items())
+
+
+class CandleStore(object):
+
+    """Container for chart data backed by one contiguous typed array
+    per field (see :data:`FIELDS`). The store behaves like the list of
+    dictionaries returned by the chart API: It supports `len()`,
+    iteration and indexing which returns :class:`Candle` instances.
+
+    Slicing the store returns a new store which shares the arrays with
+    this store. So building a slice does not copy any data. Datapoints
+    can only be appended to a store which is not limited at the end.
+    """
+
+    def __init__(self, data=None, columns=None, start=0, stop=None):
+        """Will build a new store.
+
+        :data: Optional list of datapoints as dictionary.
+        :columns: Optional dictionary of arrays of another store to
+            share the data with.
+        :start: Index of the first datapoint of the store in the arrays.
+        :stop: Index after the last datapoint of the store in the
+            arrays. On default the store includes all datapoints.
+        """
+        if columns is None:
+            columns = dict((field, array.array(TYPECODES.get(field, "d")))
+                           for field in FIELDS)
+        self._columns = columns
+        self._start = start
+        self._stop = stop
+        if data:
+            self.extend(data)
+
+    def __len__(self):
+        stop = len(self._columns["date"]) if self._stop is None else self._stop
+        return max(stop - self._start, 0)
+
+    def __getitem__(self, index):
+        length = len(self)
+        if isinstance(index, slice):
+            start, stop, step = index.indices(length)
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return CandleStore(columns=self._columns,
+                               start=self._start + start,
+                               stop=self._start + max(start, stop))
+        if index < 0:
+            index += length
+        if index < 0 or index >= length:
+            raise IndexError("Index out of range")
+        return Candle(self._columns, self._start + index)
+
+    def __iter__(self):
+        for i in range(self._start, self._start + len(self)):
+            yield Candle(self._columns, i)
+
+    def __getstate__(self):
+        # Only the datapoints of the store are pickled and not all
+        # datapoints of the shared arrays.
+        return {"columns": dict((field, self.column(field).tolist()) for field in FIELDS)}
+
+    def __setstate__(self, state):
+        self._columns = dict((field, array.array(TYPECODES.get(field, "d"), state["columns"][field]))
+                             for field in FIELDS)
+        self._start = 0
+        self._stop = None
+
+    def append(self, point):
+        """Will append a single datapoint to the store.
+
+        :point: Datapoint as dictionary.
+        """
+        if self._stop is not None:
+            raise ValueError("Can not append to a limited store")
+        columns = self._columns
+        columns["date"].append(int(point["date"]))
+        for field in FIELDS[1:]:
+            columns[field].append(float(point[field]))
+
+    def extend(self, data):
+        """Will append all given datapoints to the store.
+
+        :data: List of datapoints as dictionary.
+        """
+        if self._stop is not None:
+            raise ValueError("Can not append to a limited store")
+        data = list(data)
+        columns = self._columns
+        columns["date"].extend([int(point["date"]) for point in data])
+        for field in FIELDS[1:]:
+            columns[field].extend([float(point[field]) for point in data])
+
+    def merge(self, data):
+        """Will append the given datapoints to the store. Datapoints of
+        the store which are not before the first given datapoint are
+        replaced. This updates the last datapoint of a chart which was
+        still forming when it was fetched.
+
+        If datapoints are replaced the store gets new arrays. Slices of
+        the store taken before keep the old datapoints.
+
+        :data: List of datapoints as dictionary ordered by date.
+        """
+        if self._stop is not None:
+            raise ValueError("Can not append to a limited store")
+        data = list(data)
+        if not data:
+            return
+        keep = self._start + self.index(data[0]["date"] - 1) + 1
+        if keep < len(self._columns["date"]):
+            self._columns = dict((field, column[:keep]) for field, column in self._columns.items())
+        self.extend(data)
+
+    def column(self, field):
+        """Will return a read-only view on the values of the given field
+        without copying them.
+
+        :field: Name of the field, e.g. "close"
+        :returns: :class:`cointrader.streaming.SeriesView`
+        """
+        return SeriesView(self._columns[field], self._start, self._start + len(self))
+
+    def index(self, timestamp):
+        """Will return the index of the last datapoint which is not
+        after the given `timestamp` or -1 if all datapoints are after
+        the timestamp.
+
+        Datapoints have a fixed period. So the index is calculated
+        directly from the date of the first datapoint and the period
+        if there are no gaps in the data around the timestamp. Otherwise
+        the index is searched by bisection.
+
+        :timestamp: UNIX timestamp
+        :returns: Index of the datapoint
+        """
+        dates = self._columns["date"]
+        start = self._start
+        stop = start + len(self)
+        if start == stop or timestamp < dates[start]:
+            return -1
+        if timestamp >= dates[stop - 1]:
+            return stop - start - 1
+        period = dates[start + 1] - dates[start]
+        if period > 0:
+            i = start + int((timestamp - dates[start]) // period)
+            if i < stop - 1 and dates[i] <= timestamp < dates[i + 1]:
+                return i - start
+        return bisect.bisect_right(dates, timestamp, start, stop) - 1 - start
+
+    def between(self, start, end):
+        """Will return the datapoints between the `start` and `end`
+        timestamp (both inclusive) as store which shares the data with
+        this store.
+
+        :start: UNIX timestamp
+        :end: UNIX timestamp
+        :returns: CandleStore
+        """
+        return self[self.index(start - 1) + 1:self.index(end) + 1]
+
+    def fingerprint(self):
+        """Will return a hash over all values of the datapoints of the
+        store. Stores with the same datapoints have the same fingerprint.
+
+        :returns: Hex digest
+        """
+        digest = hashlib.sha256()
+        for field in FIELDS:
+            digest.update(tobytes(self._columns[field][self._start:self._start + len(self)]))
+        return digest.hexdigest()
+
+    @property
+    def nbytes(self):
+        """Number of bytes used by the datapoints of the store."""
+        return sum(self._columns[field].itemsize for field in FIELDS) * len(self)
@@ -1,9 +1,12 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-import io
+import copy
+import collections
 import pandas
 import datetime
 from stockstats import StockDataFrame
+from cointrader.streaming import IndicatorEngine
+from cointrader.candles import CandleStore
 
 
 def chart2csv(chart):
@@ -17,8 +20,44 @@ def chart2csv(chart):
     return u"\n".join(out)
 
 
+def chart2frame(chart):
+    """Will build a pandas DataFrame straight from the given chart
+    data. The data is collected column by column so no string
+    formatting and parsing like in :func:`chart2csv` is needed.
+
+    :chart: List of datapoints as dictionary or CandleStore.
+    :returns: DataFrame with the columns date, amount, close, high,
+        low, open and volume.
+    """
+    if isinstance(chart, CandleStore):
+        column = lambda key: chart.column(key).tolist()  # noqa
+    else:
+        column = lambda key: [cs[key] for cs in chart]  # noqa
+    columns = collections.OrderedDict()
+    columns["date"] = column("date")
+    columns["amount"] = [float("nan")] * len(chart)
+    for key in ("close", "high", "low", "open", "volume"):
+        columns[key] = [float(v) for v in column(key)]
+    return pandas.DataFrame(columns)
+
+
+def totimestamp(dt):
+    return (dt - datetime.datetime(1970, 1, 1)).total_seconds()
+
+
 def search_chartdata_by_date(data, dt, le=True):
-    ts = (dt - datetime.datetime(1970, 1, 1)).total_seconds()
+    """Will return the last datapoint in the chart data which is not
+    after the given datetime. If all datapoints are after the datetime
+    the first datapoint is returned. A CandleStore is searched using its
+    timestamp index.
+
+    :data: List of datapoints as dictionary or CandleStore.
+    :dt: Datetime object.
+    :returns: Datapoint
+    """
+    ts = totimestamp(dt)
+    if isinstance(data, CandleStore):
+        return data[max(data.index(ts), 0)]
     chart_item = data[0]
     for d in data:
         if d["date"] <= ts:
@@ -34,7 +73,8 @@ class Chart(object):
 
     The `data` is provided as list of dictionaries where each
     dictionary represents a single set of data per point in the
-    chart::
+    chart. The chart keeps the data in a compact
+    :class:`cointrader.candles.CandleStore`::
 
         {
             u'date': 1500112800,
@@ -54,32 +94,85 @@ class Chart(object):
     to ensure that indicators like ema and sma provide sensefull
     values right on from the begin of the timeframe. So there must
     be more data available before the start.
+
+    The indicators are provided by a
+    :class:`cointrader.streaming.IndicatorEngine`. An engine of a former
+    chart can be passed to a new chart of the same market. In this case
+    only the new datapoints are fed into the engine.
+
+    A chart can provide a view on its first datapoints (see
+    :meth:`view`). The view shares the data and the engine with the
+    chart so the view is cheap to build. This is used in backtests where
+    the chart grows by one datapoint on every tick.
     """
 
-    def __init__(self, data, start, end):
+    def __init__(self, data, start, end, engine=None):
         """Will build a chart instance from the given raw data input.
 
-        :data: List of datapoints as dictionary.
+        :data: List of datapoints as dictionary or CandleStore.
         :start: Datetime object.
         :end: Datetime object.
+        :engine: Optional IndicatorEngine of a former chart of the
+            same market.
 
         """
-        self._data = data
+        if not isinstance(data, CandleStore):
+            data = CandleStore(data)
+        # The chart keeps the datapoints it was built with, also if
+        # datapoints are appended to or merged into the store later.
+        self._data = data[0:len(data)]
         self._start = start
         self._end = end
-        self._stock = StockDataFrame.retype(pandas.read_csv(io.StringIO(chart2csv(data))))
+        self._stock = None
+        self._length = None
+        if engine is None or not engine.matches(data):
+            engine = IndicatorEngine()
+        engine.feed(data)
+        self._engine = engine
+
+    def __len__(self):
+        if self._length is None:
+            return len(self._data)
+        return min(self._length, len(self._data))
+
+    def view(self, length):
+        """Will return a view on the first `length` datapoints of the
+        chart. Neither the data nor the indicators are copied or
+        computed again.
+
+        :length: Number of datapoints in the view.
+        :returns: Chart instance.
+        """
+        chart = copy.copy(self)
+        chart._length = length
+        chart._stock = None
+        return chart
 
     @property
     def data(self):
-        return self._data
+        if self._length is None:
+            return self._data
+        return self._data[0:len(self)]
+
+    @property
+    def engine(self):
+        return self._engine
+
+    @property
+    def stock(self):
+        """StockDataFrame of the chart to calculate further indicators
+        using stockstats. The frame is build on first access."""
+        if self._stock is None:
+            self._stock = StockDataFrame.retype(chart2frame(self.data))
+        return self._stock
 
     @property
     def date(self):
-        return self._data[-1]["date"]
+        return self._data[len(self) - 1]["date"]
 
     @property
     def close(self):
-        return self._data[-1]["close"]
+        return self._data[len(self) - 1]["close"]
 
     def get_first_point(self):
         return search_chartdata_by_date(self.data, self._start)
@@ -87,21 +180,30 @@ class Chart(object):
     def get_last_point(self):
         return search_chartdata_by_date(self.data, self._end)
 
+    def between(self, start, end):
+        """Will return the datapoints of the chart between the given
+        `start` and `end` datetime (both inclusive) without copying the
+        data.
+
+        :start: Datetime object.
+        :end: Datetime object.
+        :returns: CandleStore
+        """
+        return self.data.between(totimestamp(start), totimestamp(end))
+
     def values(self, which="close"):
-        return [(v["date"], v[which]) for v in self._data]
+        data = self.data
+        return list(zip(data.column("date"), data.column(which)))
 
     ################
     #  Indicators  #
     ################
 
-    def macdh(self):
-        macdh = self._stock.get("macdh")
-        return macdh.tolist()
+    def macdh(self, fast=12, slow=26, signal=9):
+        return self._engine.macdh(fast, slow, signal).head(len(self))
 
     def sma(self, window=10):
-        sma = self._stock.get("close_{}_sma".format(window))
-        return sma.tolist()
+        return self._engine.sma(window).head(len(self))
 
     def ema(self, window=10):
-        ema = self._stock.get("close_{}_ema".format(window))
-        return ema.tolist()
+        return self._engine.ema(window).head(len(self))
@@ -1,14 +1,16 @@
 # -*- coding: utf-8 -*-
 import click
+import os
 import sys
 import logging
 import datetime
-from cointrader import db, STRATEGIES
+from cointrader import STRATEGIES
 from cointrader.config import Config, get_path_to_config
-from cointrader.exchange import Poloniex, BacktestMarket, Market
 from cointrader.exchanges.poloniex import ApiError
-from cointrader.bot import init_db, get_bot
-from cointrader.helpers import render_bot_statistic, render_bot_tradelog
+
+# The modules of the commands are imported within the commands. So only
+# the modules a command needs are loaded and pandas, numpy and the
+# database are not set up for commands which do not use them.
 
 log = logging.getLogger(__name__)
 
@@ -18,27 +20,55 @@ class Context(object):
     """Docstring for Context. """
 
     def __init__(self):
-        self.exchange = None
+        self._exchange = None
+        self.config = None
+
+    @property
+    def exchange(self):
+        """Exchange of cointrader. Created on first access."""
+        if self._exchange is None:
+            from cointrader.exchange import Poloniex
+            self._exchange = Poloniex(self.config)
+        return self._exchange
+
+    @property
+    def result_cache(self):
+        if self.config is None or not self.config.result_cache:
+            return None
+        from cointrader.cache import ResultCache
+        return ResultCache(os.path.expanduser(self.config.result_cache),
+                           int(self.config.result_cache_size * 1024 * 1024))
 
 
 pass_context = click.make_pass_decorator(Context, ensure=True)
 
 
-@click.group()
+class Group(click.Group):
+
+    """Group of the commands of cointrader. The exchange is only
+    contacted once a command needs it. Errors of the exchange, e.g.
+    because of invalid credentials or missing chart data, end the
+    command with a message."""
+
+    def invoke(self, ctx):
+        from cointrader.exchange import ExchangeException
+        try:
+            return click.Group.invoke(self, ctx)
+        except (ApiError, ExchangeException) as ex:
+            click.echo("Error! {}".format(ex))
+            sys.exit(1)
+
+
+@click.group(cls=Group)
 @click.option("--config", help="Configuration File for cointrader.", type=click.File("r"))
 @pass_context
 def main(ctx, config):
     """Console script for cointrader on the Poloniex exchange"""
-    init_db()
     if config:
         config = Config(config)
     else:
         config = Config(open(get_path_to_config(), "r"))
-    try:
-        ctx.exchange = Poloniex(config)
-    except ApiError as ex:
-        click.echo(ex.message)
-        sys.exit(1)
+    ctx.config = config
 
 
 @click.command()
@@ -97,9 +127,15 @@ def balance(ctx):
 @click.option("--strategy", help="Stratgegy used for trading.", default="Wait", type=click.Choice(STRATEGIES.keys()))
 @click.option("--btc", help="Set initial amount of BTC the bot will use for trading.", type=float)
 @click.option("--coins", help="Set initial amount of coint the bot will use for trading.", type=float)
+@click.option("--follow-book", help="Price orders from a local order book fed by the push API.", is_flag=True)
 @pass_context
-def start(ctx, market, resolution, start, end, automatic, backtest, papertrade, strategy, btc, coins):
+def start(ctx, market, resolution, start, end, automatic, backtest, papertrade, strategy, btc, coins, follow_book):
     """Start a new bot on the given market and the given amount of BTC"""
+    from cointrader.exchange import BacktestMarket, Market
+    from cointrader.bot import init_db, get_bot, new_bot
+    from cointrader.backtest import Backtest
+    from cointrader.database import db
+    from cointrader.helpers import render_bot_statistic, render_bot_tradelog
     # Check start and end date
     try:
         if start:
@@ -123,6 +159,12 @@ def start(ctx, market, resolution, start, end, automatic, backtest, papertrade,
             market = BacktestMarket(ctx.exchange, market)
         else:
             market = Market(ctx.exchange, market)
+            if follow_book:
+                try:
+                    market.follow_orderbook()
+                except RuntimeError as ex:
+                    click.echo("Error! {}".format(ex))
+                    sys.exit(1)
     else:
         click.echo("Market {} is not available".format(market))
         sys.exit(1)
@@ -131,21 +173,244 @@ def start(ctx, market, resolution, start, end, automatic, backtest, papertrade,
     if not ctx.exchange.is_valid_resolution(resolution):
         valid_resolutions = ", ".join(ctx.exchange.resolutions.keys())
         click.echo("Resolution {} is not supported.\n"
-                   "Please choose one of the following: {}".format(resolution,
-                                                                   valid_resolutions))
+                   "Please choose one of the following, a multiple of 5m or 1m to 4m: {}".format(
+                       resolution, valid_resolutions))
         sys.exit(1)
 
     # Initialise a strategy.
     strategy = STRATEGIES[strategy]()
 
-    bot = get_bot(market, strategy, resolution, start, end, btc, coins)
-    bot.start(backtest, automatic)
+    if backtest and automatic:
+        # Automatic backtests are not stored in the database.
+        bot = new_bot(market, strategy, resolution, start, end, btc, coins)
+        backtest = Backtest(bot, cache=ctx.result_cache)
+        backtest.run()
+        click.echo(render_bot_tradelog(backtest.ledger))
+        click.echo(render_bot_statistic(backtest.stat()))
+    else:
+        init_db()
+        bot = get_bot(market, strategy, resolution, start, end, btc, coins)
+        bot.start(backtest, automatic)
+        if backtest:
+            click.echo(render_bot_tradelog(bot.trades))
+            click.echo(render_bot_statistic(bot.stat(backtest)))
+            db.delete(bot)
+            db.commit()
+
+
+def get_grid(strategy, param):
+    from cointrader.sweep import parse_param
+    grid = {}
+    for p in param:
+        try:
+            name, values = parse_param(p)
+        except ValueError:
+            click.echo("Parameter {} is not valid. Must be in format 'name=v1,v2'".format(p))
+            sys.exit(1)
+        if name not in strategy.PARAMS:
+            click.echo("Unknown parameter {}. Choose one of: {}".format(name, ", ".join(strategy.PARAMS)))
+            sys.exit(1)
+        grid[name] = values
+    return grid
+
+
+@click.command()
+@click.argument("market")
+@click.option("--resolution", help="Resolution of the chart which is used for trend analysis", default="30m")
+@click.option("--start", help="Datetime to begin trading", required=True)
+@click.option("--end", help="Datetime to end trading", required=True)
+@click.option("--strategy", help="Stratgegy used for trading.", default="trend", type=click.Choice(STRATEGIES.keys()))
+@click.option("--param", help="Values of a parameter of the strategy like 'fast=8,12,16'. Can be given multiple times.", multiple=True)
+@click.option("--btc", help="Set initial amount of BTC the bot will use for trading.", type=float, default=1.0)
+@click.option("--coins", help="Set initial amount of coint the bot will use for trading.", type=float, default=0.0)
+@click.option("--processes", help="Number of worker processes. Defaults to the number of CPUs.", type=int)
+@click.option("--limit", help="Limit output to the best NUM results", default=10)
+@pass_context
+def sweep(ctx, market, resolution, start, end, strategy, param, btc, coins, processes, limit):
+    """Backtest the strategy for all combinations of the given parameter values."""
+    from cointrader.exchange import Market
+    from cointrader.sweep import sweep as run_sweep
+    from cointrader.helpers import render_sweep
+    try:
+        start = datetime.datetime.strptime(start, "%Y-%m-%d %H:%M:%S")
+        end = datetime.datetime.strptime(end, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        click.echo("Date is not valid. Must be in format 'YYYY-mm-dd HH:MM:SS'")
+        sys.exit(1)
+
+    if not ctx.exchange.is_valid_market(market):
+        click.echo("Market {} is not available".format(market))
+        sys.exit(1)
+    if not ctx.exchange.is_valid_resolution(resolution):
+        click.echo("Resolution {} is not supported.".format(resolution))
+        sys.exit(1)
+
+    strategy = STRATEGIES[strategy]
+    grid = get_grid(strategy, param)
+    results = run_sweep(Market(ctx.exchange, market), strategy, grid,
+                        resolution, start, end, btc, coins, processes)
+    click.echo(render_sweep(results, limit))
+
+
+@click.command()
+@click.argument("market")
+@click.option("--resolution", help="Resolution of the chart which is used for trend analysis", default="30m")
+@click.option("--start", help="Datetime to begin trading", required=True)
+@click.option("--end", help="Datetime to end trading", required=True)
+@click.option("--strategy", help="Stratgegy used for trading.", default="trend", type=click.Choice(STRATEGIES.keys()))
+@click.option("--param", help="Values of a parameter of the strategy like 'fast=8,12,16'. Can be given multiple times.", multiple=True)
+@click.option("--train", help="Number of datapoints to optimise the parameters on.", default=1000)
+@click.option("--test", help="Number of datapoints to test the parameters on.", default=250)
+@click.option("--btc", help="Set initial amount of BTC the bot will use for trading.", type=float, default=1.0)
+@click.option("--coins", help="Set initial amount of coint the bot will use for trading.", type=float, default=0.0)
+@click.option("--processes", help="Number of worker processes. Defaults to the number of CPUs.", type=int)
+@pass_context
+def walkforward(ctx, market, resolution, start, end, strategy, param, train, test, btc, coins, processes):
+    """Optimise the parameters of the strategy on a window and test them on the next window."""
+    from cointrader.exchange import Market
+    from cointrader.sweep import expand
+    from cointrader.walkforward import WalkForward
+    from cointrader.helpers import render_walkforward
+    try:
+        start = datetime.datetime.strptime(start, "%Y-%m-%d %H:%M:%S")
+        end = datetime.datetime.strptime(end, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        click.echo("Date is not valid. Must be in format 'YYYY-mm-dd HH:MM:SS'")
+        sys.exit(1)
+
+    if not ctx.exchange.is_valid_market(market):
+        click.echo("Market {} is not available".format(market))
+        sys.exit(1)
+    if not ctx.exchange.is_valid_resolution(resolution):
+        click.echo("Resolution {} is not supported.".format(resolution))
+        sys.exit(1)
+
+    strategy = STRATEGIES[strategy]
+    params = expand(get_grid(strategy, param))
+    data = Market(ctx.exchange, market)._get_chart_data(resolution, start, end)
+    walk = WalkForward(data, market, strategy, params, train, test, btc, coins)
+    try:
+        results = walk.run(processes)
+    except ValueError as ex:
+        click.echo("Error! {}".format(ex))
+        sys.exit(1)
+    click.echo(render_walkforward(results, walk.stat()))
+
+
+@click.command()
+@click.argument("market")
+@click.option("--resolution", help="Resolution of the chart which is used for trend analysis", default="30m")
+@click.option("--start", help="Datetime to begin trading", required=True)
+@click.option("--end", help="Datetime to end trading", required=True)
+@click.option("--strategy", help="Stratgegy used for trading.", default="trend", type=click.Choice(STRATEGIES.keys()))
+@click.option("--param", help="Value of a parameter of the strategy like 'fast=8'. Can be given multiple times.", multiple=True)
+@click.option("--runs", help="Number of resampled charts.", default=100)
+@click.option("--method", help="Method to resample the chart.", default="bootstrap", type=click.Choice(["bootstrap", "noise"]))
+@click.option("--block", help="Number of returns per block for the bootstrap.", default=48)
+@click.option("--sigma", help="Standard deviation of the noise added to the returns.", default=0.002)
+@click.option("--seed", help="Seed of the random generator.", default=0)
+@click.option("--btc", help="Set initial amount of BTC the bot will use for trading.", type=float, default=1.0)
+@click.option("--coins", help="Set initial amount of coint the bot will use for trading.", type=float, default=0.0)
+@click.option("--processes", help="Number of worker processes. Defaults to the number of CPUs.", type=int)
+@pass_context
+def montecarlo(ctx, market, resolution, start, end, strategy, param, runs, method, block, sigma, seed, btc, coins, processes):
+    """Backtest the strategy on many charts resampled from the real chart."""
+    from cointrader.exchange import Market
+    from cointrader.montecarlo import simulate, distribution
+    from cointrader.helpers import render_montecarlo
+    try:
+        start = datetime.datetime.strptime(start, "%Y-%m-%d %H:%M:%S")
+        end = datetime.datetime.strptime(end, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        click.echo("Date is not valid. Must be in format 'YYYY-mm-dd HH:MM:SS'")
+        sys.exit(1)
+
+    if not ctx.exchange.is_valid_market(market):
+        click.echo("Market {} is not available".format(market))
+        sys.exit(1)
+    if not ctx.exchange.is_valid_resolution(resolution):
+        click.echo("Resolution {} is not supported.".format(resolution))
+        sys.exit(1)
+
+    strategy = STRATEGIES[strategy]
+    params = dict((name, values[0]) for name, values in get_grid(strategy, param).items())
+    options = {"block": block} if method == "bootstrap" else {"sigma": sigma}
+    data = Market(ctx.exchange, market)._get_chart_data(resolution, start, end)
+    try:
+        stats = simulate(data, market, strategy, params, runs, method, seed, btc, coins, processes, **options)
+    except ValueError as ex:
+        click.echo("Error! {}".format(ex))
+        sys.exit(1)
+    click.echo(render_montecarlo(distribution(stats), runs))
+
+
+@click.command()
+@click.argument("markets", nargs=-1)
+@click.option("--all", "all_markets", help="Backtest all BTC markets.", is_flag=True)
+@click.option("--resolution", help="Resolution of the chart which is used for trend analysis", default="30m")
+@click.option("--start", help="Datetime to begin trading", required=True)
+@click.option("--end", help="Datetime to end trading", required=True)
+@click.option("--strategy", help="Stratgegy used for trading.", default="trend", type=click.Choice(STRATEGIES.keys()))
+@click.option("--btc", help="Set initial amount of BTC the bot will use for trading per market.", type=float, default=1.0)
+@click.option("--coins", help="Set initial amount of coint the bot will use for trading per market.", type=float, default=0.0)
+@click.option("--processes", help="Number of worker processes. Defaults to the number of CPUs.", type=int)
+@pass_context
+def backtest(ctx, markets, all_markets, resolution, start, end, strategy, btc, coins, processes):
+    """Backtest the strategy on several markets at once."""
+    from cointrader.backtest import run_markets, aggregate
+    from cointrader.helpers import render_backtests
+    try:
+        start = datetime.datetime.strptime(start, "%Y-%m-%d %H:%M:%S")
+        end = datetime.datetime.strptime(end, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        click.echo("Date is not valid. Must be in format 'YYYY-mm-dd HH:MM:SS'")
+        sys.exit(1)
+
+    if all_markets:
+        markets = sorted(ctx.exchange.markets)
+    if not markets:
+        click.echo("Error! Provide some markets or use --all to backtest all markets.")
+        sys.exit(1)
+    for market in markets:
+        if not ctx.exchange.is_valid_market(market):
+            click.echo("Market {} is not available".format(market))
+            sys.exit(1)
+    if not ctx.exchange.is_valid_resolution(resolution):
+        click.echo("Resolution {} is not supported.".format(resolution))
+        sys.exit(1)
+
+    results = run_markets(ctx.exchange, list(markets), STRATEGIES[strategy],
+                          resolution, start, end, btc, coins, processes=processes)
+    if not results:
+        click.echo("Not enough chart data to backtest any market.")
+        sys.exit(1)
+    click.echo(render_backtests(results, aggregate(results)))
+
+
+@click.command()
+@click.argument("markets", nargs=-1, required=True)
+@click.option("--start", help="Datetime of the first trade for markets which were not ingested yet", default=None)
+@pass_context
+def ingest(ctx, markets, start):
+    """Store the trade history of the markets. Continues after the last stored trade."""
+    try:
+        if start:
+            start = datetime.datetime.strptime(start, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        click.echo("Date is not valid. Must be in format 'YYYY-mm-dd HH:MM:SS'")
+        sys.exit(1)
 
-    if backtest:
-        click.echo(render_bot_tradelog(bot.trades))
-        click.echo(render_bot_statistic(bot.stat(backtest)))
-        db.delete(bot)
-        db.commit()
+    history = ctx.exchange.history
+    for market in markets:
+        if not ctx.exchange.is_valid_market(market):
+            click.echo("Market {} is not available".format(market))
+            sys.exit(1)
+        try:
+            count = history.ingest(ctx.exchange._api, market, start)
+        except ValueError as ex:
+            click.echo("Error! {}".format(ex))
+            sys.exit(1)
+        click.echo("{:<10} {:>10} trades".format(market, count))
 
 
 @click.command()
@@ -161,3 +426,8 @@ main.add_command(explore)
 main.add_command(balance)
 main.add_command(exchange)
 main.add_command(start)
+main.add_command(sweep)
+main.add_command(backtest)
+main.add_command(walkforward)
+main.add_command(montecarlo)
+main.add_command(ingest)
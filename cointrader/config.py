@@ -27,6 +27,24 @@ class Config(object):
         self.market = "poloniex"
         self.api_key = None
         self.api_secret = None
+        self.candle_cache = True
+        # Keep chart data in a local cache and only fetch missing data.
+        self.resample = False
+        # Derive all resolutions from the 5m chart data.
+        self.pool_size = 10
+        # Maximum number of connections to the exchange kept alive.
+        self.timeout = 30
+        # Timeout in seconds for requests to the exchange.
+        self.compression = True
+        # Request compressed responses from the exchange.
+        self.cache_ttl = 10
+        # Seconds to cache the results of public requests like the ticker.
+        self.rate_limit = 6
+        # Maximum number of requests per second to the exchange.
+        self.result_cache = os.path.join(os.getenv("HOME", ""), ".cointrader", "results")
+        # Directory to cache results of backtests. Empty to disable.
+        self.result_cache_size = 100
+        # Maximum size of the result cache in MB.
 
         if configfile:
             logging.config.fileConfig(configfile.name)
@@ -35,6 +53,24 @@ class Config(object):
             exchange = config.get("DEFAULT", "exchange")
             self.api_key = config.get(exchange, "api_key")
             self.api_secret = config.get(exchange, "api_secret")
+            if config.has_option("DEFAULT", "candle_cache"):
+                self.candle_cache = config.getboolean("DEFAULT", "candle_cache")
+            if config.has_option("DEFAULT", "resample"):
+                self.resample = config.getboolean("DEFAULT", "resample")
+            if config.has_option("DEFAULT", "result_cache"):
+                self.result_cache = config.get("DEFAULT", "result_cache")
+            if config.has_option("DEFAULT", "result_cache_size"):
+                self.result_cache_size = config.getfloat("DEFAULT", "result_cache_size")
+            if config.has_option(exchange, "pool_size"):
+                self.pool_size = config.getint(exchange, "pool_size")
+            if config.has_option(exchange, "timeout"):
+                self.timeout = config.getfloat(exchange, "timeout")
+            if config.has_option(exchange, "compression"):
+                self.compression = config.getboolean(exchange, "compression")
+            if config.has_option(exchange, "cache_ttl"):
+                self.cache_ttl = config.getfloat(exchange, "cache_ttl")
+            if config.has_option(exchange, "rate_limit"):
+                self.rate_limit = config.getfloat(exchange, "rate_limit")
 
     @property
     def api(self):
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""Database of cointrader.
+
+The engine and the session are created on first use. Importing the
+models therefore does not open the database and commands which do not
+need the database do not pay for it.
+"""
+import sqlalchemy as sa
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.declarative import declarative_base
+
+DATABASE = 'sqlite:///cointrader.db'
+# URL of the database.
+
+Base = declarative_base()
+Session = sessionmaker()
+
+_engine = None
+
+
+def get_engine():
+    """Will return the engine of the database. The engine is created on
+    the first call."""
+    global _engine
+    if _engine is None:
+        _engine = sa.create_engine(DATABASE)
+        Session.configure(bind=_engine)
+    return _engine
+
+
+class LazySession(object):
+
+    """Session of cointrader which is created on first use. All
+    attributes are taken from the real session."""
+
+    def __init__(self):
+        self._session = None
+
+    def __getattr__(self, name):
+        if self._session is None:
+            get_engine()
+            self._session = Session()
+        return getattr(self._session, name)
+
+
+db = LazySession()
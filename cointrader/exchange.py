@@ -1,18 +1,34 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import sys
 import datetime
 import collections
 import time
 from cointrader.exchanges.poloniex import Poloniex as PoloniexApi
-from cointrader.chart import Chart
-from cointrader.indicators import MIN_POINTS
+from cointrader.exchanges.scheduler import ORDER
+from cointrader.orderbook import OrderBook, PoloniexFeed
+from cointrader.candles import CandleStore
 
 
 def get_market_name(market):
     return market[0]
 
 
-def add_fee(btc, fee=0.025):
+UNITS = {"m": 60, "h": 3600, "d": 86400}
+# Seconds per unit of a resolution like 30m, 8h or 1d.
+
+EPOCH = datetime.datetime(1970, 1, 1)
+# Start of the UNIX timestamps of the chart data.
+
+FEE = 0.025
+# Fee of the exchange in percent of the traded amount.
+
+ASYNCIO = sys.version_info >= (3, 5)
+# If False requests for several markets are sent by a pool of threads
+# instead of the asyncio API.
+
+
+def add_fee(btc, fee=FEE):
     return btc - (btc / 100 * fee)
 
 
@@ -34,6 +50,60 @@ class Coin(object):
         return self.btc_value
 
 
+class Account(object):
+
+    """Balances of the account on the exchange. The balances of all
+    currencies are fetched in a single request on first access and kept
+    until the account is refreshed or invalidated. Several lookups of
+    balances therefore only need one request. The coins are built once
+    per fetch of the balances."""
+
+    def __init__(self, api):
+        """
+        :api: API of the exchange
+        """
+        self._api = api
+        self._balances = None
+        self._coins = None
+
+    @property
+    def balances(self):
+        """Dictionary with the quantity and the value in BTC per currency."""
+        if self._balances is None:
+            self.refresh()
+        return self._balances
+
+    def refresh(self):
+        """Will fetch the balances from the exchange."""
+        self._balances = self._api.balance()
+        self._coins = None
+        return self._balances
+
+    def invalidate(self):
+        """Will drop the balances. They are fetched again on next
+        access. Call this after orders were filled."""
+        self._balances = None
+        self._coins = None
+
+    def quantity(self, currency):
+        """Will return the available quantity of the given currency."""
+        return self.balances[currency]["quantity"]
+
+    @property
+    def coins(self):
+        """Coins with a positive balance ordered by their name."""
+        if self._coins is None:
+            coins = collections.OrderedDict()
+            balances = self.balances
+            for currency in sorted(balances):
+                if balances[currency]["btc_value"] > 0:
+                    coins[currency] = Coin(currency,
+                                           balances[currency]["quantity"],
+                                           balances[currency]["btc_value"])
+            self._coins = coins
+        return self._coins
+
+
 class Market(object):
 
     """Docstring for Market. """
@@ -47,6 +117,14 @@ class Market(object):
         self._exchange = exchange
         self._name = name
         self._dry_run = dry_run
+        self._engines = {}
+        # Indicator engines of the last chart per resolution. The engines
+        # keep the state of the indicators between two charts.
+        self.orderbook = None
+        # Optional local replica of the order book to price orders.
+        self._live = {}
+        # Chart data per resolution of live charts which is continued
+        # on every call of get_chart.
 
     @property
     def currency(self):
@@ -64,9 +142,89 @@ class Market(object):
         # start date of the chart which lies before the given start
         # date. On default we excpect at least 120 data points in the
         # chart to be present.
+        from cointrader.indicators import MIN_POINTS
         period = self._exchange.resolution2seconds(resolution)
         internal_start = start - datetime.timedelta(seconds=period * MIN_POINTS)
-        return self._exchange._api.chart(self._name, internal_start, end, period)
+        return self._fetch(internal_start, end, period)
+
+    def _fetch(self, start, end, period):
+        if period < self._exchange.resolutions["5m"]:
+            return self._fetch_trades(start, end, period)
+        if period not in self._exchange.periods or self._exchange.resample:
+            # The chart data is derived from the 5m chart data. The
+            # start is moved to the begin of its period so the first
+            # datapoint is complete.
+            from cointrader.resample import resample, BASE
+            ts = (start - EPOCH).total_seconds() // period * period
+            start = EPOCH + datetime.timedelta(seconds=ts)
+            return resample(self._fetch_period(start, end, BASE), period)
+        return self._fetch_period(start, end, period)
+
+    def _fetch_trades(self, start, end, period):
+        # The chart data is built from the trade history. Missing trades
+        # before the first and after the last stored trade are stored
+        # first.
+        history = self._exchange.history
+        if history is None:
+            raise ExchangeException("Resolutions below 5m need the trade history")
+        history.ingest(self._exchange._api, self._name, start, end)
+        ts = (start - EPOCH).total_seconds() // period * period
+        start = EPOCH + datetime.timedelta(seconds=ts)
+        return history.chart(self._name, start, end, period)
+
+    def _fetch_period(self, start, end, period):
+        if self._exchange.cache is not None:
+            return self._exchange.cache.chart(self._exchange._api, self._name, start, end, period)
+        # The API returns a single empty datapoint if there is no data
+        # in the time range.
+        return [point for point in self._exchange._api.chart(self._name, start, end, period) if point["date"]]
+
+    def _check_chart_data(self, data, start, end):
+        if not len(data):
+            raise ExchangeException("No chart data of {} between {} and {}".format(self._name, start, end))
+        return data
+
+    def _get_live_chart_data(self, resolution, start, end):
+        """Will return the chart data up to now. The chart data of the
+        last call is kept and only the datapoints since its last
+        datapoint are fetched. The last datapoint is fetched again as it
+        may have changed while the candle was still forming."""
+        from cointrader.indicators import MIN_POINTS
+        period = self._exchange.resolution2seconds(resolution)
+        internal_start = start - datetime.timedelta(seconds=period * MIN_POINTS)
+        data = self._live.get(resolution)
+        if not data or data[0]["date"] > (internal_start - EPOCH).total_seconds():
+            data = CandleStore(self._fetch(internal_start, end, period))
+        else:
+            last = datetime.datetime.utcfromtimestamp(data[-1]["date"])
+            # The API returns a single empty datapoint if there is no
+            # data in the time range.
+            data.merge(point for point in self._fetch(last, end, period) if point["date"])
+        self._live[resolution] = data
+        return data
+
+    def follow_orderbook(self, feed=None, retry=5):
+        """Will maintain a local replica of the order book of the market
+        from the given feed of the push API. Orders are priced from the
+        replica as long as it is synchronised and not stale. Otherwise
+        the order book is requested from the API.
+
+        :feed: Feed of push API messages. Defaults to a
+            :class:`cointrader.orderbook.PoloniexFeed` of the market.
+        :retry: Seconds to wait before the feed is reconnected after it
+            ended or failed. None to not reconnect.
+        :returns: OrderBook instance
+        """
+        if feed is None:
+            feed = PoloniexFeed(self._name)
+        self.orderbook = OrderBook(self._name, self._exchange._api)
+        self.orderbook.start(feed, retry)
+        return self.orderbook
+
+    def _get_book(self):
+        if self.orderbook is not None and self.orderbook.synced:
+            return self.orderbook.book()
+        return self._exchange._api.book(self._name, ORDER)
 
     def get_chart(self, resolution="30m", start=None, end=None):
         """Will return a chart of the market.
@@ -78,18 +236,33 @@ class Market(object):
         `end` point. On default the the chart will include the last
         recent data.
 
+        Charts without an `end` are live charts. The data of a live
+        chart is kept and the next live chart only fetches the new
+        datapoints.
+
         :resolution: Resolution of the chart (Default 30m)
         :start: Start of the chart data (Default Now)
         :end: End of the chart data (Default Now)
         :returns: Chart instance.
         """
+        live = end is None
         if end is None:
             end = datetime.datetime.utcnow()
         if start is None:
             start = datetime.datetime.utcnow()
 
-        data = self._get_chart_data(resolution, start, end)
-        return Chart(data, start, end)
+        if live:
+            data = self._get_live_chart_data(resolution, start, end)
+        else:
+            data = self._get_chart_data(resolution, start, end)
+        return self._build_chart(self._check_chart_data(data, start, end), resolution, start, end)
+
+    def _build_chart(self, data, resolution, start, end):
+        # pandas is only imported when a chart is needed.
+        from cointrader.chart import Chart
+        chart = Chart(data, start, end, self._engines.get(resolution))
+        self._engines[resolution] = chart.engine
+        return chart
 
     def buy(self, btc, price=None, option=None):
         """Will buy coins on the market for the given amount of BTC. On
@@ -106,7 +279,7 @@ class Market(object):
         """
         if price is None:
             # Get best price on market.
-            orderbook = self._exchange._api.book(self._name)
+            orderbook = self._get_book()
             asks = orderbook["asks"]   # Asks in the meaning of "I wand X for Y"
             best_offer = asks[-1]
             price = float(best_offer[0])
@@ -123,12 +296,14 @@ class Market(object):
                          u'total': u'{}'.format(btc),
                          u'type': u'buy'}]}
         else:
-            return self._exchange._api.buy(self._name, amount, price, option)
+            result = self._exchange._api.buy(self._name, amount, price, option)
+            self._exchange.account.invalidate()
+            return result
 
     def sell(self, amount, price=None, option=None):
         if price is None:
             # Get best price on market.
-            orderbook = self._exchange._api.book(self._name)
+            orderbook = self._get_book()
             bids = orderbook["bids"]  # Bids in the meaning of "I give you X for Y"
             best_offer = bids[-1]
             price = float(best_offer[0])
@@ -145,22 +320,27 @@ class Market(object):
                          u'total': u'{}'.format(btc),
                          u'type': u'sell'}]}
         else:
-            return self._exchange._api.sell(self._name, amount, price, option)
+            result = self._exchange._api.sell(self._name, amount, price, option)
+            self._exchange.account.invalidate()
+            return result
 
 
 class BacktestMarket(Market):
 
     """Market to enable backtesting a strategy on the market."""
 
-    def __init__(self, exchange, name):
+    def __init__(self, exchange, name, data=None):
         """TODO: to be defined1.
 
         :exchange: TODO
         :name: TODO
+        :data: Optional chart data for the backtest. If not given the
+            chart data is loaded from the exchange.
 
         """
         Market.__init__(self, exchange, name)
-        self._chart_data = None
+        self._chart_data = data
+        self._chart = None
         self._backtest_tick = 1
 
     def continue_backtest(self):
@@ -169,15 +349,45 @@ class BacktestMarket(Market):
             return True
         return False
 
+    def seek(self, index):
+        """Will move the backtest to the datapoint with the given index
+        in the chart data."""
+        self._backtest_tick = index + 1
+
+    @property
+    def chart(self):
+        """Chart over the whole loaded chart data of the backtest. The
+        chart is available after the first call of :meth:`get_chart`."""
+        return self._chart
+
+    @property
+    def tick(self):
+        """Position of the current datapoint in the chart data."""
+        return min(self._backtest_tick, len(self._chart_data)) - 1
+
+    def _get_current_point(self):
+        return self._chart_data[self.tick]
+
     def get_chart(self, resolution="30m", start=None, end=None):
-        if self._chart_data is None:
-            self._chart_data = self._get_chart_data(resolution, start, end)
+        """Will return a view on the chart of the market up to the
+        current tick of the backtest. The chart data is loaded only once
+        on the first call. All further calls just move the end of the
+        view forward, so the indicators are computed only once over the
+        whole chart."""
+        if self._chart is None:
+            from cointrader.chart import Chart
+            from cointrader.indicators import MIN_POINTS
+            if self._chart_data is None:
+                data = self._get_chart_data(resolution, start, end)
+                self._chart_data = CandleStore(self._check_chart_data(data, start, end))
+            self._chart = Chart(self._chart_data, start, end)
             self._backtest_tick += MIN_POINTS
-        return Chart(self._chart_data[0:self._backtest_tick], start, end)
+        return self._chart.view(self._backtest_tick)
 
     def buy(self, btc, price=None):
-        price = float(self._chart_data[0:self._backtest_tick][-1]['close'])
-        date = datetime.datetime.utcfromtimestamp(self._chart_data[0:self._backtest_tick][-1]['date'])
+        point = self._get_current_point()
+        price = float(point['close'])
+        date = datetime.datetime.utcfromtimestamp(point['date'])
         btc = add_fee(btc)
         amount = btc / price
         return {u'orderNumber': u'{}'.format(int(time.time() * 1000)),
@@ -190,8 +400,9 @@ class BacktestMarket(Market):
                      u'type': u'buy'}]}
 
     def sell(self, amount, price=None):
-        price = float(self._chart_data[0:self._backtest_tick][-1]['close'])
-        date = datetime.datetime.utcfromtimestamp(self._chart_data[0:self._backtest_tick][-1]['date'])
+        point = self._get_current_point()
+        price = float(point['close'])
+        date = datetime.datetime.utcfromtimestamp(point['date'])
         btc = add_fee(amount * price)
         return {u'orderNumber': u'{}'.format(int(time.time() * 1000)),
                 u'resultingTrades': [
@@ -216,18 +427,33 @@ class Exchange(object):
                    "4h": 14400,
                    "24h": 86400}
 
-    def __init__(self, config, api=None):
-        """TODO: to be defined1. """
+    def __init__(self, config, api=None, cache=None, history=None):
+        """TODO: to be defined1.
+
+        :config: Config instance
+        :api: API of the exchange
+        :cache: Optional CandleCache to serve chart data locally
+        :history: Optional TradeHistory to build charts with a
+            resolution below 5m
+        """
         self._api = api
-        self.coins = collections.OrderedDict()
+        self._cache = cache
+        self._history = history
+        self.account = Account(api)
+        self.resample = False
+        # If True all resolutions are derived from the 5m chart data.
+
+    @property
+    def cache(self):
+        return self._cache
 
-        # Setup coins
-        balance = self._api.balance()
-        for currency in sorted(balance):
-            if balance[currency]["btc_value"] > 0:
-                self.coins[currency] = Coin(currency,
-                                            balance[currency]["quantity"],
-                                            balance[currency]["btc_value"])
+    @property
+    def history(self):
+        return self._history
+
+    @property
+    def coins(self):
+        return self.account.coins
 
     @property
     def url(self):
@@ -235,7 +461,7 @@ class Exchange(object):
 
     @property
     def total_btc_value(self):
-        return sum([self.coins[c].value for c in self.coins])
+        return sum([coin.value for coin in self.coins.values()])
 
     @property
     def total_euro_value(self, limit=10):
@@ -244,6 +470,9 @@ class Exchange(object):
 
     @property
     def markets(self):
+        return self._api.cache.get("markets", self._get_markets)
+
+    def _get_markets(self):
         ticker = self._api.ticker()
         tmp = {}
         for currency in ticker:
@@ -278,25 +507,116 @@ class Exchange(object):
         return sorted(markets.items(),
                       key=lambda x: (float(x[1]["volume"]), float(x[1]["change"])), reverse=True)[0:limit]
 
+    def get_charts(self, markets, resolution="30m", start=None, end=None):
+        """Will return the charts of several markets. The charts are
+        fetched concurrently. See :meth:`Market.get_chart` for details on
+        the arguments.
+
+        :markets: List of Market instances
+        :returns: List of Chart instances in the order of the markets.
+        """
+        if end is None:
+            end = datetime.datetime.utcnow()
+        if start is None:
+            start = datetime.datetime.utcnow()
+        if not ASYNCIO:
+            data = self._map(lambda market: market._get_chart_data(resolution, start, end), markets)
+            return [market._build_chart(d, resolution, start, end) for market, d in zip(markets, data)]
+        from cointrader.exchanges import aiopoloniex
+        api = aiopoloniex.AsyncApi(self._api)
+        try:
+            return aiopoloniex.run(aiopoloniex.fetch_charts(api, markets, resolution, start, end))
+        finally:
+            api.close()
+
+    def get_books(self, markets):
+        """Will return the order books of several markets. The order
+        books are fetched concurrently.
+
+        :markets: List of names of markets like BTC_DASH
+        :returns: Dictionary with the order book per market.
+        """
+        if not ASYNCIO:
+            return dict(zip(markets, self._map(self._api.book, markets)))
+        from cointrader.exchanges import aiopoloniex
+        api = aiopoloniex.AsyncApi(self._api)
+        try:
+            books = aiopoloniex.run(aiopoloniex.fetch_books(api, markets))
+        finally:
+            api.close()
+        return dict(zip(markets, books))
+
+    def _map(self, func, items):
+        # Python 2 has no asyncio. The requests are sent by a pool of
+        # threads instead.
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(getattr(self._api, "pool_size", 10))
+        try:
+            return pool.map(func, items)
+        finally:
+            pool.close()
+            pool.join()
+
     def is_valid_market(self, market):
         return market in self.markets
 
+    @property
+    def periods(self):
+        """Periods in seconds of the resolutions offered by the exchange."""
+        return set(self.resolutions.values())
+
     def is_valid_resolution(self, resolution):
-        return resolution in self.resolutions
+        try:
+            self.resolution2seconds(resolution)
+        except ExchangeException:
+            return False
+        return True
 
     def resolution2seconds(self, resolution):
-        try:
+        """Will return the period of the resolution in seconds. Besides
+        the resolutions of the exchange every multiple of 5 minutes is
+        supported like 1h or 8h. The chart data of these resolutions is
+        derived from the 5m chart data. Resolutions of whole minutes
+        below 5m like 1m are built from the trade history."""
+        if resolution in self.resolutions:
             return self.resolutions[resolution]
-        except KeyError:
+        try:
+            seconds = int(resolution[:-1]) * UNITS[resolution[-1]]
+        except (KeyError, ValueError, IndexError):
+            seconds = 0
+        base = self.resolutions["5m"]
+        if seconds <= 0 or seconds % (base if seconds >= base else UNITS["m"]):
             raise ExchangeException("Resolution {} is not supported.\n"
-                                    "Please choose one of the following: {}".format(resolution, ", ".join(self.resolutions.keys())))
+                                    "Please choose one of the following, a multiple of 5m or 1m to 4m: {}".format(resolution, ", ".join(self.resolutions.keys())))
+        return seconds
 
 
 class Poloniex(Exchange):
 
     def __init__(self, config):
-        api = PoloniexApi(config)
-        Exchange.__init__(self, config, api)
+        Exchange.__init__(self, config, PoloniexApi(config))
+        self._candle_cache = config.candle_cache
+        self.resample = config.resample
+
+    @property
+    def cache(self):
+        """Local candle cache if enabled in the config. The cache and
+        the database are set up on first access."""
+        if self._cache is None and self._candle_cache:
+            from cointrader.cache import CandleCache
+            from cointrader.database import get_engine
+            self._cache = CandleCache(get_engine())
+        return self._cache
+
+    @property
+    def history(self):
+        """Trade history of the markets in the database. The database
+        is set up on first access."""
+        if self._history is None:
+            from cointrader.tradehistory import TradeHistory
+            from cointrader.database import get_engine
+            self._history = TradeHistory(get_engine())
+        return self._history
 
     @property
     def url(self):
@@ -314,6 +634,6 @@ class Poloniex(Exchange):
 
     def get_balance(self, currency=None):
         if currency is None:
-            return self._api.balance()
+            return self.account.balances
         else:
-            return self._api.balance()[currency]
+            return self.account.balances[currency]
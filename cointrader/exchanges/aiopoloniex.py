@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Asyncio variant of the API of an exchange. This module requires
+Python 3.
+
+The requests to the exchange are sent by the pooled session of the
+synchronous API in a pool of worker threads. So requests for many
+markets are sent concurrently and the results can be awaited by
+coroutines.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncApi(object):
+
+    """Wraps a synchronous :class:`cointrader.exchanges.poloniex.Api`
+    and provides its methods as coroutines."""
+
+    def __init__(self, api, max_workers=None):
+        """
+        :api: Synchronous API instance
+        :max_workers: Maximum number of concurrent requests. Defaults to
+            the pool size of the API.
+        """
+        self._api = api
+        if max_workers is None:
+            max_workers = getattr(api, "pool_size", 10)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    async def run(self, func, *args, **kwargs):
+        """Will call the blocking `func` in a worker thread and return
+        its result."""
+        # Within a coroutine this is the running loop. get_running_loop()
+        # needs Python 3.7.
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def ticker(self, currency=None):
+        return await self.run(self._api.ticker, currency)
+
+    async def volume(self, currency=None):
+        return await self.run(self._api.volume, currency)
+
+    async def chart(self, currency, start, end, period=1800):
+        return await self.run(self._api.chart, currency, start, end, period)
+
+    async def book(self, currency):
+        return await self.run(self._api.book, currency)
+
+    async def balance(self):
+        return await self.run(self._api.balance)
+
+    async def buy(self, market, amount, price, option=None):
+        return await self.run(self._api.buy, market, amount, price, option)
+
+    async def sell(self, market, amount, price, option=None):
+        return await self.run(self._api.sell, market, amount, price, option)
+
+
+async def fetch_charts(api, markets, resolution="30m", start=None, end=None):
+    """Will fetch the charts of the given markets concurrently.
+
+    :api: AsyncApi instance
+    :markets: List of :class:`cointrader.exchange.Market` instances
+    :resolution: Resolution of the charts
+    :start: Start of the chart data
+    :end: End of the chart data
+    :returns: List of Chart instances in the order of the markets
+    """
+    async def fetch(market):
+        # The chart data is fetched through the market so the candle
+        # cache of the exchange is used.
+        data = await api.run(market._get_chart_data, resolution, start, end)
+        return market._build_chart(data, resolution, start, end)
+    return await asyncio.gather(*[fetch(market) for market in markets])
+
+
+async def fetch_books(api, markets):
+    """Will fetch the order books of the given markets concurrently.
+
+    :api: AsyncApi instance
+    :markets: List of names of markets like BTC_DASH
+    :returns: List of order books in the order of the markets
+    """
+    return await asyncio.gather(*[api.book(market) for market in markets])
+
+
+def run(coroutine):
+    """Will run the given coroutine in a new event loop and return its
+    result."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import time
+import threading
+
+
+class TTLCache(object):
+
+    """Time bounded cache for results of public API endpoints like the
+    ticker or the 24h volume. A cached result is returned until it is
+    older than the `ttl`. The cache counts hits and misses."""
+
+    def __init__(self, ttl=10, clock=time.time):
+        """
+        :ttl: Time to live of a cached result in seconds. A ttl of 0
+            disables the cache.
+        :clock: Function returning the current time in seconds.
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, func):
+        """Will return the cached result for the given key. If there is
+        no result or the result is expired `func` is called to get a new
+        result which is cached.
+
+        :key: Hashable key of the result
+        :func: Function without arguments to get a new result
+        :returns: Result
+        """
+        now = self._clock()
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and now - item[0] < self.ttl:
+                self.hits += 1
+                return item[1]
+            self.misses += 1
+        value = func()
+        with self._lock:
+            self._items[key] = (now, value)
+        return value
+
+    def invalidate(self, key=None):
+        """Will remove the result of the given key from the cache. If no
+        key is given all results are removed.
+
+        :key: Key of the result
+        """
+        with self._lock:
+            if key is None:
+                self._items.clear()
+            else:
+                self._items.pop(key, None)
+
+    @property
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._items)}
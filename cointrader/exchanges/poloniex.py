@@ -8,6 +8,8 @@ import hmac
 import hashlib
 import requests
 import datetime
+from cointrader.exchanges.cache import TTLCache
+from cointrader.exchanges.scheduler import Scheduler, ORDER, PRIVATE, PUBLIC
 
 if (sys.version_info > (3, 0)):
     # Python 3 code in this block
@@ -22,6 +24,12 @@ def totimestamp(dt):
     # return td.total_seconds()
     return int((td.microseconds + (td.seconds + td.days * 86400) * 10**6) / 10**6)
 
+
+TRADES_LIMIT = 50000
+# Maximum number of trades returned by a single request of the trade
+# history.
+
+
 class ApiError(ValueError):
     pass
 
@@ -29,10 +37,42 @@ class Api(object):
 
     """Docstring for Api. """
 
-    def __init__(self, config):
+    def __init__(self, config, pool_size=None, timeout=None, compression=None):
+        """All requests of the API share a pooled HTTP session which keeps
+        the connections to the exchange alive. The settings of the
+        session default to the settings in the `config`.
+
+        Results of public endpoints like the ticker are kept in a
+        :class:`cointrader.exchanges.cache.TTLCache` for
+        `config.cache_ttl` seconds.
+
+        All requests are sent by a
+        :class:`cointrader.exchanges.scheduler.Scheduler` which limits
+        the requests to `config.rate_limit` requests per second.
+
+        :config: Config instance
+        :pool_size: Maximum number of connections kept alive
+        :timeout: Timeout in seconds for connecting and reading
+        :compression: If True the responses are requested compressed
+        """
+        self.cache = TTLCache(config.cache_ttl)
+        self.scheduler = Scheduler(config.rate_limit)
         api = config.api
         self.key = api[0]
         self.secret = api[1].encode()
+        self.timeout = config.timeout if timeout is None else timeout
+        self.pool_size = config.pool_size if pool_size is None else pool_size
+        compression = config.compression if compression is None else compression
+
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=self.pool_size,
+                                                pool_maxsize=self.pool_size)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        if compression:
+            self._session.headers["Accept-Encoding"] = "gzip, deflate"
+        else:
+            self._session.headers["Accept-Encoding"] = "identity"
 
     def _check_response(self, json):
         raise NotImplementedError()
@@ -46,7 +86,10 @@ class Api(object):
     def chart(self, currency, start, end, period=1800):
         raise NotImplementedError()
 
-    def book(self, currency):
+    def book(self, currency, priority=PUBLIC, depth=10):
+        raise NotImplementedError()
+
+    def trades(self, currency, start, end):
         raise NotImplementedError()
 
     def balance(self):
@@ -123,10 +166,47 @@ class Poloniex(Api):
     # trading activity within an exchange by extending to firms the
     # incentive to post orders, in theory facilitating trading.
 
+    PUBLIC_URL = "https://poloniex.com/public"
+    TRADING_URL = "https://poloniex.com/tradingApi"
+
     def _check_response(self, json):
         if "error" in json:
             raise ApiError(json["error"])
 
+    def _public(self, params, cached=False, priority=PUBLIC):
+        """Will send a request to the public API and return the checked
+        result. If `cached` is True the result is served from the cache
+        as long as it is not expired. Identical requests in flight are
+        coalesced."""
+        key = tuple(sorted(params.items()))
+
+        def request():
+            r = self._session.get(self.PUBLIC_URL, params=params, timeout=self.timeout)
+            result = json.loads(r.content.decode())
+            self._check_response(result)
+            return result
+
+        def schedule():
+            return self.scheduler.submit(request, priority, key)
+
+        if cached:
+            return self.cache.get(key, schedule)
+        return schedule()
+
+    def _private(self, params, priority=PRIVATE):
+        """Will send a signed request to the trading API and return the
+        checked result. The nonce is added to the params right before
+        the request is sent."""
+        def request():
+            params["nonce"] = int(time.time() * 1000)
+            sign = hmac.new(self.secret, urlencode(params).encode(), hashlib.sha512).hexdigest()
+            headers = {"Key": self.key, "Sign": sign}
+            r = self._session.post(self.TRADING_URL, data=params, headers=headers, timeout=self.timeout)
+            result = json.loads(r.content.decode())
+            self._check_response(result)
+            return result
+        return self.scheduler.submit(request, priority)
+
     def ticker(self, currency=None):
         """
         Returns the ticker of the given currency pair. If no pair is given
@@ -145,9 +225,7 @@ class Poloniex(Api):
             }
         """
         params = {"command": "returnTicker"}
-        r = requests.get("https://poloniex.com/public", params=params)
-        result = json.loads(r.content.decode())
-        self._check_response(result)
+        result = self._public(params, cached=True)
         if currency:
             return result[currency]
         return result
@@ -165,9 +243,7 @@ class Poloniex(Api):
              ...}
         """
         params = {"command": "return24hVolume"}
-        r = requests.get("https://poloniex.com/public", params=params)
-        result = json.loads(r.content.decode())
-        self._check_response(result)
+        result = self._public(params, cached=True)
         if currency:
             pairs = []
             for c in currency:
@@ -176,7 +252,7 @@ class Poloniex(Api):
             result = {c: result[c] for c in pairs if result.get(c)}
         return result
 
-    def book(self, currency):
+    def book(self, currency, priority=PUBLIC, depth=10):
         """
         Returns the order book for a given market, as well as a sequence
         number for use with the Push API and an indicator specifying
@@ -186,14 +262,15 @@ class Poloniex(Api):
             {"asks":[[0.00007600,1164],[0.00007620,1300], ... ],
              "bids":[[0.00006901,200],[0.00006900,408], ... ],
              "isFrozen": 0, "seq": 18849}
+
+        Set the `priority` to ORDER if the order book is requested to
+        place an order. `depth` is the number of asks and bids returned.
         """
         params = {"command": "returnOrderBook",
                   "currencyPair": currency,
-                  "depth": 10}
+                  "depth": depth}
 
-        r = requests.get("https://poloniex.com/public", params=params)
-        result = json.loads(r.content.decode())
-        self._check_response(result)
+        result = self._public(params, priority=priority)
         return result
 
     def chart(self, currency, start, end, period=1800):
@@ -231,23 +308,41 @@ class Poloniex(Api):
                   "end": ts_end,
                   "period": period}
 
-        r = requests.get("https://poloniex.com/public", params=params)
-        result = json.loads(r.content.decode())
-        self._check_response(result)
+        result = self._public(params)
         return result
 
+    def trades(self, currency, start, end):
+        """
+        Returns the public trade history of the given currency pair
+        between `start` and `end`. At most :data:`TRADES_LIMIT` trades
+        are returned. If there are more trades in the time range only
+        the latest trades are returned. Sample output::
+
+            [{"globalTradeID": 25129732,
+              "tradeID": "6325758",
+              "date": "2016-04-05 08:08:40",
+              "type": "sell",
+              "rate": "0.02565498",
+              "amount": "0.10000000",
+              "total": "0.00256549"},
+              ...]
+
+        The latest trade comes first.
+        """
+        params = {"command": "returnTradeHistory",
+                  "currencyPair": currency,
+                  "start": totimestamp(start),
+                  "end": totimestamp(end)}
+        return self._public(params)
+
     def balance(self):
         """
         Returns the balance of the given currency. If not currency is
         given the balance of all currency are returned.
         """
         result = {}
-        params = {"command": "returnCompleteBalances", "nonce": int(time.time() * 1000)}
-        sign = hmac.new(self.secret, urlencode(params).encode(), hashlib.sha512).hexdigest()
-        headers = {"Key": self.key, "Sign": sign}
-        r = requests.post("https://poloniex.com/tradingApi", data=params, headers=headers)
-        tmp = json.loads(r.content.decode())
-        self._check_response(tmp)
+        params = {"command": "returnCompleteBalances"}
+        tmp = self._private(params)
         for currency in tmp:
             result[currency] = {}
             result[currency]["quantity"] = float(tmp[currency]["available"])
@@ -258,8 +353,7 @@ class Poloniex(Api):
         params = {"command": "buy",
                   "currencyPair": market,
                   "rate": price,
-                  "amount": amount,
-                  "nonce": int(time.time() * 1000)}
+                  "amount": amount}
 
         if option == "fillOrKill":
             params["fillOrKill"] = 1
@@ -268,19 +362,13 @@ class Poloniex(Api):
         elif option == "postOnly":
             params["postOnly"] = 1
 
-        sign = hmac.new(str(self.secret), urlencode(params).encode(), hashlib.sha512).hexdigest()
-        headers = {"Key": self.key, "Sign": sign}
-        r = requests.post("https://poloniex.com/tradingApi", data=params, headers=headers)
-        result = json.loads(r.content.decode())
-        self._check_response(result)
-        return result
+        return self._private(params, ORDER)
 
     def sell(self, market, amount, price, option=None):
         params = {"command": "sell",
                   "currencyPair": market,
                   "rate": price,
-                  "amount": amount,
-                  "nonce": int(time.time() * 1000)}
+                  "amount": amount}
 
         if option == "fillOrKill":
             params["fillOrKill"] = 1
@@ -289,9 +377,4 @@ class Poloniex(Api):
         elif option == "postOnly":
             params["postOnly"] = 1
 
-        sign = hmac.new(str(self.secret), urlencode(params).encode(), hashlib.sha512).hexdigest()
-        headers = {"Key": self.key, "Sign": sign}
-        r = requests.post("https://poloniex.com/tradingApi", data=params, headers=headers)
-        result = json.loads(r.content.decode())
-        self._check_response(result)
-        return result
+        return self._private(params, ORDER)
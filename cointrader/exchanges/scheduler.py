@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Client side rate limiting for requests to an exchange.
+
+Exchanges limit the number of requests per second. The
+:class:`Scheduler` sends requests not faster than the limit allows.
+Waiting requests are sent in the order of their priority, so orders are
+sent before private requests, and private requests before public
+requests like the ticker or charts. Identical public requests which
+are sent while the same request is still in flight are coalesced and
+share the result of the first request. A waiting request takes over the
+priority of more urgent requests coalesced with it.
+"""
+import time
+import heapq
+import itertools
+import threading
+
+ORDER = 0
+PRIVATE = 1
+PUBLIC = 2
+# Priorities of requests. Lower values are sent first.
+
+
+class TokenBucket(object):
+
+    """Token bucket which is refilled with `rate` tokens per second up to
+    the `capacity` of the bucket. Every request takes one token."""
+
+    def __init__(self, rate, capacity=None, clock=time.time):
+        """
+        :rate: Number of tokens added per second
+        :capacity: Maximum number of tokens. Defaults to the rate.
+        :clock: Function returning the current time in seconds.
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._last = clock()
+
+    def refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def take(self):
+        """Will take a token from the bucket. Returns 0 on success or the
+        number of seconds until the next token is available."""
+        self.refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class _Call(object):
+
+    def __init__(self, priority):
+        self.priority = priority
+        self.entry = None
+        # Entry of the request in the waiting queue while it waits.
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Scheduler(object):
+
+    """Sends requests according to the rate limit and the priority of
+    the requests. The scheduler is thread safe."""
+
+    def __init__(self, rate=6, capacity=None, clock=time.time):
+        """
+        :rate: Maximum number of requests per second
+        :capacity: Maximum number of requests sent at once after some
+            time without requests. Defaults to the rate.
+        :clock: Function returning the current time in seconds.
+        """
+        self._bucket = TokenBucket(rate, capacity, clock)
+        self._condition = threading.Condition()
+        self._waiting = []
+        self._counter = itertools.count()
+        self._inflight = {}
+        self.sent = 0
+        """Number of sent requests"""
+        self.coalesced = 0
+        """Number of requests which shared the result of another request"""
+
+    def _acquire(self, priority, call=None):
+        with self._condition:
+            if call is not None:
+                # The priority may have been raised by a coalesced request.
+                priority = min(priority, call.priority)
+            entry = [priority, next(self._counter)]
+            if call is not None:
+                call.entry = entry
+            heapq.heappush(self._waiting, entry)
+            while True:
+                timeout = None
+                if self._waiting[0] is entry:
+                    timeout = self._bucket.take()
+                    if not timeout:
+                        heapq.heappop(self._waiting)
+                        if call is not None:
+                            call.entry = None
+                        self._condition.notify_all()
+                        return
+                self._condition.wait(timeout)
+
+    def _escalate(self, call, priority):
+        # Must be called with the condition acquired.
+        if priority >= call.priority:
+            return
+        call.priority = priority
+        if call.entry is not None:
+            call.entry[0] = priority
+            heapq.heapify(self._waiting)
+            self._condition.notify_all()
+
+    def submit(self, func, priority=PUBLIC, key=None):
+        """Will call `func` as soon as the rate limit and the priority
+        allow it and return its result.
+
+        If a `key` is given and a request with the same key is in
+        flight, `func` is not called. The result of the request in
+        flight is returned instead. If the request in flight is still
+        waiting and has a lower priority, it is raised to the given
+        priority.
+
+        :func: Function without arguments which sends the request
+        :priority: Priority of the request (ORDER, PRIVATE or PUBLIC)
+        :key: Optional hashable key to coalesce identical requests
+        :returns: Result of the request
+        """
+        call = None
+        if key is not None:
+            with self._condition:
+                inflight = self._inflight.get(key)
+                if inflight is None:
+                    call = self._inflight[key] = _Call(priority)
+                else:
+                    self.coalesced += 1
+                    self._escalate(inflight, priority)
+            if inflight is not None:
+                inflight.done.wait()
+                if inflight.error is not None:
+                    raise inflight.error
+                return inflight.result
+
+        self._acquire(priority, call)
+        with self._condition:
+            self.sent += 1
+        try:
+            result = func()
+            if call is not None:
+                call.result = result
+            return result
+        except Exception as ex:
+            if call is not None:
+                call.error = ex
+            raise
+        finally:
+            if call is not None:
+                with self._condition:
+                    del self._inflight[key]
+                call.done.set()
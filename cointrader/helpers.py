@@ -36,7 +36,7 @@ def render_user_options(options):
 def render_bot_title(bot, market, chart):
 
     out = ["\n"]
-    data = chart._data
+    data = chart.data
 
     if len(data) > 1:
         last = data[-2]
@@ -99,3 +99,56 @@ def render_bot_tradelog(trades):
     table = AsciiTable(out).table
 
     return "\n".join(["\nTradelog:", table])
+
+
+def render_sweep(results, limit=None):
+    out = [["#", "PARAMETERS", "TRADES", "COINTRADER %", "MARKET %"]]
+    for rank, (params, stat) in enumerate(results[:limit], 1):
+        values = ", ".join("{}={}".format(k, params[k]) for k in sorted(params))
+        out.append([rank, values, stat["trades"],
+                    "{}".format(colorize_value(round(stat["profit_cointrader"], 4))),
+                    "{}".format(colorize_value(round(stat["profit_chart"], 4)))])
+    table = AsciiTable(out).table
+    return "\n".join(["\nSweep:", table])
+
+
+def render_backtests(results, total):
+    out = [["MARKET", "TRADES", "START", "END", "COINTRADER %", "MARKET %"]]
+    for market, stat in results:
+        out.append([market, stat["trades"], stat["trader_start_value"], stat["trader_end_value"],
+                    "{}".format(colorize_value(round(stat["profit_cointrader"], 4))),
+                    "{}".format(colorize_value(round(stat["profit_chart"], 4)))])
+    out.append(["TOTAL", total["trades"], total["trader_start_value"], total["trader_end_value"],
+                "{}".format(colorize_value(round(total["profit_cointrader"], 4))),
+                "{}".format(colorize_value(round(total["profit_chart"], 4)))])
+    table = AsciiTable(out).table
+    summary = "{} of {} markets better than the market".format(total["wins"], total["markets"])
+    return "\n".join(["\nBacktests {} - {}:".format(total["start"], total["end"]), table, summary])
+
+
+def render_walkforward(results, stat):
+    out = [["TEST START", "TEST END", "PARAMETERS", "TRAIN %", "TEST %", "MARKET %"]]
+    for result in results:
+        params = result["params"]
+        test = result["test"]
+        out.append([test["start"], test["end"],
+                    ", ".join("{}={}".format(k, params[k]) for k in sorted(params)),
+                    "{}".format(colorize_value(round(result["train"]["profit_cointrader"], 4))),
+                    "{}".format(colorize_value(round(test["profit_cointrader"], 4))),
+                    "{}".format(colorize_value(round(test["profit_chart"], 4)))])
+    out.append([stat["start"], stat["end"], "TOTAL", "",
+                "{}".format(colorize_value(round(stat["profit_cointrader"], 4))),
+                "{}".format(colorize_value(round(stat["profit_chart"], 4)))])
+    table = AsciiTable(out).table
+    return "\n".join(["\nWalk-forward:", table])
+
+
+def render_montecarlo(result, runs):
+    from cointrader.montecarlo import PERCENTILES
+    out = [["", "MEAN"] + ["P{}".format(p) for p in PERCENTILES]]
+    for title, key in (("COINTRADER %", "profit_cointrader"), ("MARKET %", "profit_chart")):
+        values = result[key]
+        out.append([title, round(values["mean"], 4)] + [round(values[p], 4) for p in PERCENTILES])
+    table = AsciiTable(out).table
+    summary = "Cointrader better than the market in {}% of {} runs".format(round(result["better"] * 100, 1), runs)
+    return "\n".join(["\nMonte Carlo:", table, summary])
@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 import logging
 import datetime
+import numpy
 
 log = logging.getLogger(__name__)
 
@@ -50,9 +51,8 @@ def sma(chart, window=12):
 
     """
     sma = chart.sma(window)[-1]
-    closing = chart.values()
-    value = closing[-1][1]
-    date = datetime.datetime.utcfromtimestamp(closing[-1][0])
+    value = chart.close
+    date = datetime.datetime.utcfromtimestamp(chart.date)
 
     signal = WAIT
     if value > sma:
@@ -74,16 +74,15 @@ def ema(chart, window=12):
     """
 
     ema = chart.ema(window)[-1]
-    closing = chart.values()
-    value = closing[-1][1]
-    date = datetime.datetime.utcfromtimestamp(closing[-1][0])
+    value = chart.close
+    date = datetime.datetime.utcfromtimestamp(chart.date)
 
     signal = WAIT
     if value > ema:
         signal = BUY
     elif value < ema:
         signal = SELL
-    return Signal(signal, date, "EMA{}: {}".format(window, sma))
+    return Signal(signal, date, "EMA{}: {}".format(window, ema))
 
 
 def double_cross(chart, fast=12, slow=26):
@@ -101,9 +100,8 @@ def double_cross(chart, fast=12, slow=26):
 
     """
 
-    closing = chart.values()
-    value = closing[-1][1]
-    date = datetime.datetime.utcfromtimestamp(closing[-1][0])
+    value = chart.close
+    date = datetime.datetime.utcfromtimestamp(chart.date)
     ema_1 = chart.ema(fast)[-1]
     ema_2 = chart.ema(slow)[-1]
     signal = WAIT
@@ -115,18 +113,21 @@ def double_cross(chart, fast=12, slow=26):
     return Signal(signal, date, "EMA{}: {}, EMA{}: {})".format(fast, ema_1, slow, ema_2))
 
 
-def macdh(chart):
+def macdh(chart, fast=12, slow=26, signal=9):
     """MACDH oscillator. Generates a SELL signal as soon as the macdh
     value changes from positve value into negativ value. It generates a
     BUY signal if the value from negativ to positiv.
 
     :chart: Chart instance
+    :fast: Window size of the faster EMA of the MACD
+    :slow: Window size of the slower EMA of the MACD
+    :signal: Window size of the EMA of the MACD signal line
     :returns: Signal
     """
 
-    macdh = chart.macdh()[::-1][0:2]
-    closing = chart.values()
-    date = datetime.datetime.utcfromtimestamp(closing[-1][0])
+    values = chart.macdh(fast, slow, signal)
+    macdh = [values[-1], values[-2]]
+    date = datetime.datetime.utcfromtimestamp(chart.date)
     if macdh[0] < 0 and macdh[1] > 0:
         signal = SELL
     elif macdh[0] > 0 and macdh[1] < 0:
@@ -137,18 +138,20 @@ def macdh(chart):
     return Signal(signal, date)
 
 
-def macdh_momententum(chart):
+def macdh_momententum(chart, fast=12, slow=26, signal=9):
     """Modified MACDH oscillator. Generates a SELL signal as soon as the
     macdh has exceeded its maximum value. It generates a BUY signal if
     the value exides its minimum value.
 
     :chart: Chart instance
+    :fast: Window size of the faster EMA of the MACD
+    :slow: Window size of the slower EMA of the MACD
+    :signal: Window size of the EMA of the MACD signal line
     :returns: Signal
     """
 
-    macdh = chart.macdh()
-    closing = chart.values()
-    date = datetime.datetime.utcfromtimestamp(closing[-1][0])
+    macdh = chart.macdh(fast, slow, signal)
+    date = datetime.datetime.utcfromtimestamp(chart.date)
 
     pos_macdh_local_max = is_max_value(macdh) and macdh[-1] > 0
     # pos_macdh_local_min = is_min_value(macdh) and macdh[-1] > 0
@@ -164,6 +167,150 @@ def macdh_momententum(chart):
     return Signal(signal, date, "MAX: {}, MIN {})".format(pos_macdh_local_max, neg_macdh_local_min))
 
 
+#######################
+#  Vectorized signals  #
+#######################
+# The following functions return the signal of the indicator for every
+# datapoint of the chart in one pass. The signal at position i is the
+# same signal the indicator returns for a chart which ends at position
+# i.
+
+
+def _series(values):
+    return numpy.asarray(values.tolist(), dtype=float)
+
+
+# The signals are computed on the last axis of the given values. The
+# same functions are used for the signals of a single chart and for a
+# batch of charts.
+
+
+def _double_cross(value, ema_1, ema_2):
+    signals = numpy.zeros(value.shape, dtype=int)
+    signals[(value > ema_1) & (ema_1 > ema_2)] = BUY
+    signals[(value < ema_1) & (ema_1 < ema_2)] = SELL
+    return signals
+
+
+def _macdh(macdh):
+    signals = numpy.zeros(macdh.shape, dtype=int)
+    current = macdh[..., 1:]
+    last = macdh[..., :-1]
+    signals[..., 1:][(current < 0) & (last > 0)] = SELL
+    signals[..., 1:][(current > 0) & (last < 0)] = BUY
+    return signals
+
+
+def _macdh_momententum(macdh):
+    signals = numpy.zeros(macdh.shape, dtype=int)
+    a = macdh[..., :-2]
+    b = macdh[..., 1:-1]
+    c = macdh[..., 2:]
+    pos_macdh_local_max = (a < b) & (b > c) & (c > 0)
+    neg_macdh_local_min = (a > b) & (b < c) & (c < 0)
+    signals[..., 2:][neg_macdh_local_min] = BUY
+    signals[..., 2:][pos_macdh_local_max] = SELL
+    return signals
+
+
+def double_cross_series(chart, fast=12, slow=26):
+    """Vectorized version of :func:`double_cross`.
+
+    :chart: Chart instance
+    :fast: Window size to calculate the faster EMA
+    :slow: Window size to calculate the slower EMA
+    :returns: Array of signals
+    """
+    return _double_cross(_series(chart.data.column("close")),
+                         _series(chart.ema(fast)), _series(chart.ema(slow)))
+
+
+def macdh_series(chart, fast=12, slow=26, signal=9):
+    """Vectorized version of :func:`macdh`.
+
+    :chart: Chart instance
+    :returns: Array of signals
+    """
+    return _macdh(_series(chart.macdh(fast, slow, signal)))
+
+
+def macdh_momententum_series(chart, fast=12, slow=26, signal=9):
+    """Vectorized version of :func:`macdh_momententum`.
+
+    :chart: Chart instance
+    :returns: Array of signals
+    """
+    return _macdh_momententum(_series(chart.macdh(fast, slow, signal)))
+
+
+##################
+#  Batch signals  #
+##################
+# The following functions return the signals of the indicator for a
+# batch of charts at once. The closing rates of the charts are given as
+# 2-D array with one row per chart. All charts have the same length.
+# The signals are the same as the vectorized signals of every single
+# chart.
+
+
+def ema_batch(closes, window=10):
+    """Will return the EMA for every row of the given closing rates. The
+    EMA is computed like :class:`cointrader.streaming.EMA` for all rows
+    at once.
+
+    :closes: 2-D array of closing rates
+    :window: Window size of the EMA
+    :returns: 2-D array of EMA values
+    """
+    decay = 1 - 2.0 / (window + 1)
+    weighted = numpy.zeros(closes.shape[0])
+    weights = 0.0
+    values = numpy.empty(closes.shape)
+    for i in range(closes.shape[1]):
+        weighted = closes[:, i] + decay * weighted
+        weights = 1 + decay * weights
+        values[:, i] = weighted / weights
+    return values
+
+
+def macdh_batch(closes, fast=12, slow=26, signal=9):
+    """Will return the MACD histogram for every row of the given closing
+    rates.
+
+    :closes: 2-D array of closing rates
+    :returns: 2-D array of MACDH values
+    """
+    macd = ema_batch(closes, fast) - ema_batch(closes, slow)
+    return macd - ema_batch(macd, signal)
+
+
+def double_cross_batch(closes, fast=12, slow=26):
+    """Batch version of :func:`double_cross`.
+
+    :closes: 2-D array of closing rates
+    :returns: 2-D array of signals
+    """
+    return _double_cross(closes, ema_batch(closes, fast), ema_batch(closes, slow))
+
+
+def macdh_batch_signals(closes, fast=12, slow=26, signal=9):
+    """Batch version of :func:`macdh`.
+
+    :closes: 2-D array of closing rates
+    :returns: 2-D array of signals
+    """
+    return _macdh(macdh_batch(closes, fast, slow, signal))
+
+
+def macdh_momententum_batch(closes, fast=12, slow=26, signal=9):
+    """Batch version of :func:`macdh_momententum`.
+
+    :closes: 2-D array of closing rates
+    :returns: 2-D array of signals
+    """
+    return _macdh_momententum(macdh_batch(closes, fast, slow, signal))
+
+
 def is_max_value(values):
     """Will return True if the last recent values of the given list of
     values describe a local maximum value. A local maximum is defined as
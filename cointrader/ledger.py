@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""Lightweight trade log for backtests.
+
+Live bots record every trade as :class:`cointrader.bot.Trade` in the
+database right away. A backtest produces many trades in a very short
+time and most of them are thrown away after the backtest. The
+:class:`Ledger` keeps the trades in memory as plain :class:`Entry`
+objects and can write them to the database in a single bulk insert.
+
+The accounting functions :func:`replay` and :func:`statistic` work on
+both, trades from the database and entries of a ledger.
+"""
+import datetime
+
+from cointrader.database import db
+
+ENTRY_FIELDS = ("date", "order_type", "order_id", "trade_id", "market", "rate",
+                "amount", "amount_taxed", "btc", "btc_taxed")
+# Attributes of an entry. Same as the columns of the trades table.
+
+
+def replay(trades):
+    """Will replay the given trades and return the resulting amount of
+    BTC and coins.
+
+    :trades: List of trades or ledger entries
+    :returns: Tuple of BTC and coins
+    """
+    btc = 0
+    amount = 0
+    for t in trades:
+        if t.order_type == "INIT":
+            btc = t.btc
+            amount = t.amount
+        elif t.order_type == "BUY":
+            btc -= t.btc
+            amount += t.amount_taxed
+        elif t.order_type == "SELL":
+            btc += t.btc_taxed
+            amount -= t.amount
+    return btc, amount
+
+
+def statistic(trades, first, last):
+    """Will return a dictionary with the performance of the given trades
+    compared to the market movement between the `first` and `last`
+    datapoint of the chart. See :meth:`cointrader.bot.Cointrader.stat`
+    for details.
+
+    :trades: List of trades or ledger entries
+    :first: First datapoint of the chart
+    :last: Last datapoint of the chart
+    :returns: Dictionary
+    """
+    market_start_rate = first["close"]
+    start_date = datetime.datetime.utcfromtimestamp(first["date"])
+    market_end_rate = last["close"]
+    end_date = datetime.datetime.utcfromtimestamp(last["date"])
+
+    # Set start value
+    for trade in trades:
+        if trade.order_type == "INIT":
+            trader_start_btc = trade.btc
+            trader_start_amount = trade.amount
+            market_start_btc = trade.btc
+            market_start_amount = trade.amount
+
+    trader_end_btc = trader_start_btc
+    trader_end_amount = trader_start_amount
+    for trade in trades:
+        if trade.order_type == "BUY":
+            trader_end_amount += trade.amount_taxed
+            trader_end_btc -= trade.btc
+        elif trade.order_type == "SELL":
+            trader_end_btc += trade.btc_taxed
+            trader_end_amount -= trade.amount
+
+    trader_start_value = trader_start_btc + trader_start_amount * market_start_rate
+    market_start_value = trader_start_value
+    trader_end_value = trader_end_btc + trader_end_amount * market_end_rate
+    market_end_value = market_start_btc + market_start_amount * market_end_rate
+    trader_profit = trader_end_value - trader_start_value
+    market_profit = market_end_value - market_start_value
+
+    return {
+        "start": start_date,
+        "end": end_date,
+        "market_start_value": market_start_value,
+        "market_end_value": market_end_value,
+        "profit_chart": market_profit / market_end_value * 100,
+        "trader_start_value": trader_start_value,
+        "trader_end_value": trader_end_value,
+        "profit_cointrader": trader_profit / trader_end_value * 100,
+    }
+
+
+class Entry(object):
+
+    """A single trade in the ledger. Has the same attributes as
+    :class:`cointrader.bot.Trade`."""
+
+    __slots__ = ENTRY_FIELDS
+
+    def __init__(self, date, order_type, order_id, trade_id, market, rate, amount, amount_taxed, btc, btc_taxed):
+        if not isinstance(date, datetime.datetime):
+            date = datetime.datetime.strptime(date, "%Y-%m-%d %H:%M:%S")
+        self.date = date
+        self.order_type = order_type
+        self.order_id = order_id
+        self.trade_id = trade_id
+        self.market = market
+        self.rate = rate
+        self.amount = amount
+        self.amount_taxed = amount_taxed
+        self.btc = btc
+        self.btc_taxed = btc_taxed
+
+    def todict(self):
+        return dict((field, getattr(self, field)) for field in ENTRY_FIELDS)
+
+
+class Ledger(object):
+
+    """In memory trade log of a bot. The ledger tracks the BTC and
+    coins of the bot like :class:`cointrader.bot.Cointrader` does."""
+
+    def __init__(self, market, trades=None):
+        """
+        :market: Currency pair like BTC_DASH.
+        :trades: Optional trades to start the ledger with. These trades
+            are not written to the database on :meth:`flush`.
+        """
+        self.market = market
+        self.entries = [Entry(*[getattr(t, field) for field in ENTRY_FIELDS])
+                        for t in trades or []]
+        self.btc, self.amount = replay(self.entries)
+        self._flushed = len(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __getitem__(self, index):
+        return self.entries[index]
+
+    def load(self, trades):
+        """Will append the given trades to the ledger.
+
+        :trades: List of dictionaries as returned by :meth:`Entry.todict`
+        """
+        for trade in trades:
+            self.entries.append(Entry(**trade))
+        self.btc, self.amount = replay(self.entries)
+
+    def init(self, date, rate, btc, amount):
+        """Will record the initial BTC and coins."""
+        self.entries.append(Entry(date, "INIT", 0, 0, self.market, rate, amount, 0, btc, 0))
+        self.btc = btc
+        self.amount = amount
+
+    def buy(self, result):
+        """Will record the trades of a buy order. All BTC are spent.
+
+        :result: Result of the order as returned by
+            :meth:`cointrader.exchange.Market.buy`
+        """
+        total_amount = 0
+        for t in result["resultingTrades"]:
+            amount = float(t["amount"])
+            total_amount += amount
+            self.entries.append(Entry(t["date"], "BUY", result["orderNumber"], t["tradeID"],
+                                      self.market, float(t["rate"]), 0, amount,
+                                      self.btc, float(t["total"])))
+        self.amount = total_amount
+        self.btc = 0
+
+    def sell(self, result):
+        """Will record the trades of a sell order. All coins are sold.
+
+        :result: Result of the order as returned by
+            :meth:`cointrader.exchange.Market.sell`
+        """
+        total_btc = 0
+        for t in result["resultingTrades"]:
+            btc = float(t["total"])
+            total_btc += btc
+            self.entries.append(Entry(t["date"], "SELL", result["orderNumber"], t["tradeID"],
+                                      self.market, float(t["rate"]), self.amount,
+                                      float(t["amount"]), 0, btc))
+        self.amount = 0
+        self.btc = total_btc
+
+    def flush(self, bot_id, session=None):
+        """Will write all entries which are not written yet to the trades
+        table of the bot with the given id in one bulk insert.
+
+        :bot_id: ID of the bot the trades belong to.
+        :session: Database session. Defaults to the session of cointrader.
+        :returns: Number of written entries.
+        """
+        from cointrader.bot import Trade
+        session = session or db
+        rows = []
+        for entry in self.entries[self._flushed:]:
+            row = entry.todict()
+            row["bot_id"] = bot_id
+            rows.append(row)
+        if rows:
+            session.execute(Trade.__table__.insert(), rows)
+        self._flushed = len(self.entries)
+        return len(rows)
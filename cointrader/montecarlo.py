@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""Monte Carlo backtests to check the robustness of a strategy.
+
+A single backtest only tells how a strategy performed on the one path
+the market took. The functions in this module build many alternative
+charts from the real chart and backtest the strategy on each of them:
+
+* :func:`bootstrap` reorders blocks of consecutive returns of the chart.
+  The blocks keep short term patterns of the market while the overall
+  course of the chart changes.
+* :func:`perturb` adds random noise to the returns of the chart.
+
+Building a chart is vectorized with numpy. The signals of the strategy
+are computed for a batch of charts at once on a 2-D array of closing
+rates (see :meth:`cointrader.strategy.Strategy.signal_batch`). The
+batches are built and backtested in a pool of worker processes which
+only get the real chart once and the seeds of a batch.
+"""
+import multiprocessing
+
+import numpy
+
+from cointrader.candles import CandleStore, toarrays, fromarrays
+from cointrader.chart import Chart
+from cointrader.indicators import MIN_POINTS
+from cointrader.backtest import signal_series, evaluate
+
+PRICES = ("open", "high", "low", "close", "weightedAverage")
+# Fields which are scaled with the rate of a resampled datapoint.
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+_worker = {}
+# State of a worker process. Set by the initializer of the pool.
+
+
+def _resample(arrays, source, close):
+    # Every datapoint is a copy of the source datapoint which is scaled
+    # to the new close rate. The dates are kept.
+    factor = close / arrays["close"][source]
+    result = {"date": arrays["date"], "volume": arrays["volume"][source],
+              "quoteVolume": arrays["quoteVolume"][source] / factor}
+    for field in PRICES:
+        result[field] = arrays[field][source] * factor
+    return fromarrays(result)
+
+
+def bootstrap(arrays, random, block=48):
+    """Will build a new chart from randomly chosen blocks of consecutive
+    returns of the given chart. The new chart starts with the same rate.
+
+    :arrays: Chart data as returned by :func:`toarrays`
+    :random: numpy.random.RandomState instance
+    :block: Number of returns per block
+    :returns: CandleStore
+    """
+    close = arrays["close"]
+    returns = close[1:] / close[:-1]
+    block = max(1, min(block, len(returns)))
+    starts = random.randint(0, len(returns) - block + 1, size=-(-len(returns) // block))
+    index = (starts[:, None] + numpy.arange(block)).ravel()[:len(returns)]
+    source = numpy.concatenate(([0], index + 1))
+    new_close = close[0] * numpy.concatenate(([1.0], numpy.cumprod(returns[index])))
+    return _resample(arrays, source, new_close)
+
+
+def perturb(arrays, random, sigma=0.002):
+    """Will build a new chart by adding normal distributed noise to the
+    returns of the given chart.
+
+    :arrays: Chart data as returned by :func:`toarrays`
+    :random: numpy.random.RandomState instance
+    :sigma: Standard deviation of the noise of the log returns
+    :returns: CandleStore
+    """
+    close = arrays["close"]
+    noise = random.normal(0, sigma, len(close))
+    noise[0] = 0
+    return _resample(arrays, numpy.arange(len(close)), close * numpy.exp(numpy.cumsum(noise)))
+
+
+METHODS = {"bootstrap": bootstrap, "noise": perturb}
+
+
+def _init(arrays, market, strategy, params, method, options, btc, amount):
+    _worker.update({"arrays": arrays, "market": market, "strategy": strategy,
+                    "params": params, "method": method, "options": options,
+                    "btc": btc, "amount": amount})
+
+
+def _signals(strategy, charts):
+    # Signals of all charts of a batch as 2-D array. Strategies without
+    # batch signals are evaluated chart by chart.
+    try:
+        closes = numpy.array([chart.column("close").tolist() for chart in charts])
+        return strategy.signal_batch(closes, MIN_POINTS)
+    except NotImplementedError:
+        return [signal_series(strategy, Chart(data, None, None), MIN_POINTS) for data in charts]
+
+
+def _run(seeds):
+    w = _worker
+    charts = [METHODS[w["method"]](w["arrays"], numpy.random.RandomState(seed), **w["options"])
+              for seed in seeds]
+    signals = _signals(w["strategy"](**w["params"]), charts)
+    return [evaluate(data, w["market"], signals[i], MIN_POINTS, len(data), w["btc"], w["amount"])
+            for i, data in enumerate(charts)]
+
+
+def simulate(data, market, strategy, params=None, runs=100, method="bootstrap",
+             seed=0, btc=1.0, amount=0, processes=None, batch=50, **options):
+    """Will backtest the strategy on `runs` charts which are built from
+    the given chart data with the given method.
+
+    :data: Chart data as list of dictionaries or CandleStore
+    :market: Currency pair like BTC_DASH.
+    :strategy: Class of the strategy
+    :params: Optional dictionary with the parameters of the strategy
+    :runs: Number of charts
+    :method: "bootstrap" or "noise". See :data:`METHODS`.
+    :seed: Seed of the first run. Run i uses the seed `seed` + i.
+    :processes: Number of worker processes. Defaults to the number of CPUs.
+    :batch: Number of charts whose signals are computed at once.
+    :options: Options of the method like the `block` size or `sigma`.
+    :returns: List of statistics per run.
+    """
+    if not isinstance(data, CandleStore):
+        data = CandleStore(data)
+    if len(data) <= MIN_POINTS:
+        raise ValueError("Not enough chart data")
+    args = (toarrays(data), market, strategy, params or {}, method, options, btc, amount)
+    batches = [range(s, min(s + batch, seed + runs)) for s in range(seed, seed + runs, batch)]
+    if processes == 1:
+        _init(*args)
+        results = [_run(seeds) for seeds in batches]
+    else:
+        pool = multiprocessing.Pool(processes, _init, args)
+        try:
+            results = pool.map(_run, batches)
+        finally:
+            pool.close()
+            pool.join()
+    return [stat for stats in results for stat in stats]
+
+
+def distribution(stats):
+    """Will return the distribution of the profit of cointrader and of
+    the chart over all runs.
+
+    :stats: List of statistics per run
+    :returns: Dictionary with the percentiles and the mean of
+        "profit_cointrader" and "profit_chart" and the share of runs in
+        which cointrader was better than the chart.
+    """
+    result = {}
+    for key in ("profit_cointrader", "profit_chart"):
+        values = numpy.array([stat[key] for stat in stats])
+        result[key] = dict(zip(PERCENTILES, numpy.percentile(values, PERCENTILES)))
+        result[key]["mean"] = values.mean()
+    better = [stat for stat in stats if stat["profit_cointrader"] > stat["profit_chart"]]
+    result["better"] = len(better) / float(len(stats))
+    return result
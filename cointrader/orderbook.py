@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Local replica of the order book of a market.
+
+The replica starts from a snapshot of the order book and applies the
+incremental updates of the push API in the order of their sequence
+number. If an update is missing the replica is resynchronised with a
+new snapshot from the API. Orders can be priced from the replica
+without requesting the order book from the API.
+
+Messages of the push API look like this::
+
+    [148, 1001, [["i", {"currencyPair": "BTC_DASH",
+                        "orderBook": [{"0.07100000": "1.5"},
+                                      {"0.06900000": "2.0"}]}]]]
+    [148, 1002, [["o", 1, "0.06950000", "0.5"],
+                 ["o", 0, "0.07100000", "0.00000000"],
+                 ["t", "1234", 1, "0.07", "0.1", 1500000000]]]
+
+The first element is the channel of the market and the second the
+sequence number. An "i" update is a snapshot of the order book where
+the first dictionary holds the asks and the second the bids. An "o"
+update changes the amount at a price of the bids (1) or asks (0). An
+amount of zero removes the price from the order book.
+
+The replica is no longer synchronised if the feed ends or fails, or if
+no message was received for some time. Orders are then priced from the
+order book of the API again.
+"""
+import time
+import json
+import heapq
+import logging
+import threading
+
+try:
+    import websocket
+except ImportError:
+    websocket = None
+
+log = logging.getLogger(__name__)
+
+ASK = 0
+BID = 1
+
+
+class OrderBook(object):
+
+    """Replica of the order book of a single market."""
+
+    def __init__(self, market, api=None, depth=100, max_age=30, clock=time.time):
+        """
+        :market: Currency pair like BTC_DASH.
+        :api: Optional API to request a snapshot if the replica needs
+            to be resynchronised.
+        :depth: Depth of the snapshot requested from the API.
+        :max_age: Number of seconds without any message of the feed
+            after which the replica is considered stale.
+        :clock: Function returning the current time in seconds.
+        """
+        self.market = market
+        self.depth = depth
+        self.max_age = max_age
+        self.seq = None
+        """Sequence number of the last applied update"""
+        self.received = None
+        """Time of the last received message"""
+        self.resyncs = 0
+        """Number of resynchronisations"""
+        self._api = api
+        self._channel = None
+        self._sides = {ASK: {}, BID: {}}
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def synced(self):
+        """True if the replica holds an order book which is not stale."""
+        if self.seq is None:
+            return False
+        return self.received is not None and self._clock() - self.received <= self.max_age
+
+    def load(self, asks, bids, seq):
+        """Will replace the order book with the given snapshot.
+
+        :asks: List or dictionary of price and amount
+        :bids: List or dictionary of price and amount
+        :seq: Sequence number of the snapshot
+        """
+        if isinstance(asks, dict):
+            asks = asks.items()
+        if isinstance(bids, dict):
+            bids = bids.items()
+        with self._lock:
+            self._sides[ASK] = dict((float(p), float(a)) for p, a in asks)
+            self._sides[BID] = dict((float(p), float(a)) for p, a in bids)
+            self.seq = seq
+
+    def resync(self):
+        """Will load a new snapshot of the order book from the API."""
+        self.resyncs += 1
+        if self._api is None:
+            with self._lock:
+                self.seq = None
+            return
+        log.info("Resync order book of {} at {}".format(self.market, self.seq))
+        snapshot = self._api.book(self.market, depth=self.depth)
+        self.load(snapshot["asks"], snapshot["bids"], snapshot["seq"])
+
+    def apply(self, seq, updates):
+        """Will apply the updates with the given sequence number. Updates
+        which are older than the order book are ignored. If updates are
+        missing the order book is resynchronised.
+
+        :seq: Sequence number of the updates
+        :updates: List of updates
+        """
+        for update in updates:
+            if update[0] == "i":
+                self.load(update[1]["orderBook"][0], update[1]["orderBook"][1], seq)
+                return
+        if self.seq is None or seq <= self.seq:
+            return
+        if seq != self.seq + 1:
+            log.warning("Missing updates for order book of {}: {} -> {}".format(self.market, self.seq, seq))
+            self.resync()
+            if self.seq is None or seq != self.seq + 1:
+                return
+        with self._lock:
+            for update in updates:
+                if update[0] != "o":
+                    continue
+                side = self._sides[int(update[1])]
+                price = float(update[2])
+                amount = float(update[3])
+                if amount:
+                    side[price] = amount
+                else:
+                    side.pop(price, None)
+            self.seq = seq
+
+    def process(self, message):
+        """Will process a single message of the push API. Messages of
+        other markets and heartbeats are ignored.
+
+        :message: Decoded message
+        """
+        # Heartbeats are sent if nothing happens, so the feed is alive.
+        self.received = self._clock()
+        if len(message) < 3:
+            return
+        channel, seq, updates = message[0], message[1], message[2]
+        for update in updates:
+            if update[0] == "i" and update[1].get("currencyPair") == self.market:
+                self._channel = channel
+        if channel == self._channel:
+            self.apply(seq, updates)
+
+    def follow(self, feed):
+        """Will process all messages of the given feed. If the feed ends
+        or fails the replica is no longer synchronised."""
+        try:
+            for message in feed:
+                self.process(message)
+        except Exception:
+            log.exception("Feed of order book of {} failed".format(self.market))
+        finally:
+            with self._lock:
+                self.seq = None
+
+    def _run(self, feed, retry):
+        while True:
+            self.follow(feed)
+            if retry is None:
+                return
+            log.info("Reconnecting feed of order book of {} in {}s".format(self.market, retry))
+            time.sleep(retry)
+
+    def start(self, feed, retry=None):
+        """Will follow the given feed in a background thread.
+
+        :feed: Feed of push API messages
+        :retry: Optional number of seconds after which the feed is
+            followed again once it ended or failed. The replica is
+            synchronised by the first snapshot of the new feed.
+        """
+        self._thread = threading.Thread(target=self._run, args=(feed, retry))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def book(self, depth=10):
+        """Will return the best `depth` asks and bids in the same format
+        as :meth:`cointrader.exchanges.poloniex.Poloniex.book`.
+
+        :depth: Number of asks and bids
+        :returns: Dictionary with asks, bids and seq.
+        """
+        with self._lock:
+            asks = heapq.nsmallest(depth, self._sides[ASK].items())
+            bids = heapq.nlargest(depth, self._sides[BID].items())
+            seq = self.seq
+        return {"asks": [list(a) for a in asks],
+                "bids": [list(b) for b in bids],
+                "isFrozen": 0,
+                "seq": seq}
+
+
+class ReplayFeed(object):
+
+    """Feed which replays recorded messages of the push API. The
+    messages are given as list or read from a file with one JSON
+    encoded message per line."""
+
+    def __init__(self, messages=None, filename=None):
+        self._messages = messages
+        self._filename = filename
+
+    def __iter__(self):
+        if self._messages is not None:
+            for message in self._messages:
+                yield message
+        else:
+            with open(self._filename) as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+
+class PoloniexFeed(object):
+
+    """Feed of the order book updates of a market from the push API of
+    Poloniex. Requires the `websocket-client` package."""
+
+    URL = "wss://api2.poloniex.com"
+
+    def __init__(self, market, url=None, timeout=30):
+        if websocket is None:
+            raise RuntimeError("The push API requires the websocket-client package. "
+                               "Install it with `pip install cointrader[orderbook]`.")
+        self.market = market
+        self.url = url or self.URL
+        self.timeout = timeout
+
+    def __iter__(self):
+        ws = websocket.create_connection(self.url, timeout=self.timeout)
+        try:
+            ws.send(json.dumps({"command": "subscribe", "channel": self.market}))
+            while True:
+                yield json.loads(ws.recv())
+        finally:
+            ws.close()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Aggregation of chart data into coarser resolutions.
+
+The exchange only offers chart data in some fixed resolutions and every
+resolution is fetched on its own. All resolutions can instead be derived
+from the chart data with the finest resolution of 5 minutes. This also
+allows resolutions which are not offered by the exchange like 1h or 8h.
+
+The datapoints are grouped into periods which start at multiples of the
+period since the UNIX epoch, like the exchange does. All datapoints are
+aggregated in a single vectorized pass with numpy.
+"""
+import numpy
+
+from cointrader.candles import CandleStore, toarrays, fromarrays
+
+BASE = 300
+# Period in seconds of the finest chart data of the exchange.
+
+
+def resample(data, period):
+    """Will aggregate the chart data into datapoints of the given period.
+
+    * open is the open rate of the first datapoint of the period
+    * close is the close rate of the last datapoint of the period
+    * high and low are the highest and lowest rate within the period
+    * volume and quoteVolume are summed up
+    * weightedAverage is volume / quoteVolume. Periods without any
+      trades get the close rate.
+
+    The last datapoint is not complete if the period is not over yet.
+
+    :data: Chart data as list of dictionaries or CandleStore
+    :period: Period of the new datapoints in seconds.
+    :returns: CandleStore
+    """
+    if not isinstance(data, CandleStore):
+        data = CandleStore(data)
+    if not data:
+        return CandleStore()
+    arrays = toarrays(data)
+    dates = arrays["date"] // period * period
+    starts = numpy.flatnonzero(numpy.concatenate(([True], dates[1:] != dates[:-1])))
+    stops = numpy.concatenate((starts[1:], [len(dates)])) - 1
+    volume = numpy.add.reduceat(arrays["volume"], starts)
+    quote_volume = numpy.add.reduceat(arrays["quoteVolume"], starts)
+    close = arrays["close"][stops]
+    traded = quote_volume > 0
+    average = close.copy()
+    average[traded] = volume[traded] / quote_volume[traded]
+    return fromarrays({"date": dates[starts],
+                       "open": arrays["open"][starts],
+                       "high": numpy.maximum.reduceat(arrays["high"], starts),
+                       "low": numpy.minimum.reduceat(arrays["low"], starts),
+                       "close": close,
+                       "volume": volume,
+                       "quoteVolume": quote_volume,
+                       "weightedAverage": average})
@@ -1,8 +1,11 @@
 #!/usr/bin/env python
 import datetime
 import logging
+import numpy
 from cointrader.indicators import (
-    WAIT, BUY, SELL, Signal, macdh_momententum, macdh, double_cross
+    WAIT, BUY, SELL, Signal, macdh_momententum, macdh, double_cross,
+    macdh_momententum_series, macdh_series, double_cross_series,
+    macdh_momententum_batch, macdh_batch_signals, double_cross_batch
 )
 
 log = logging.getLogger(__name__)
@@ -12,6 +15,10 @@ class Strategy(object):
 
     """Docstring for Strategy. """
 
+    PARAMS = ()
+    # Names of the parameters of the strategy. The parameters are
+    # given as keyword arguments on initialisation.
+
     def __str__(self):
         return "{}".format(self.__class__)
 
@@ -20,11 +27,44 @@ class Strategy(object):
         """Dictionary with details on the signal(s)
         {"indicator": {"signal": 1, "details": Foo}}"""
 
+    @property
+    def params(self):
+        """Dictionary with the parameters of the strategy."""
+        return dict((name, getattr(self, name)) for name in self.PARAMS)
+
     def signal(self, chart):
         """Will return either a BUY, SELL or WAIT signal for the given
         market"""
         raise NotImplementedError
 
+    def signal_series(self, chart, start=0):
+        """Will return the signal (BUY, SELL or WAIT) for every
+        datapoint of the given chart in one pass. The signal at position
+        i is the signal which :meth:`signal` returns for a chart ending
+        at position i. Signals before the `start` position are not
+        evaluated and are WAIT.
+
+        Strategies which keep a state between two signals will start
+        with their current state at the `start` position and end with
+        the state after the last datapoint.
+
+        :chart: Chart instance
+        :start: Position of the first datapoint to evaluate
+        :returns: Array of signals
+        """
+        raise NotImplementedError
+
+    def signal_batch(self, closes, start=0):
+        """Will return the signal series of :meth:`signal_series` for a
+        batch of charts at once. Every chart starts with the current
+        state of the strategy. The state is not changed.
+
+        :closes: 2-D array with the closing rates of one chart per row
+        :start: Position of the first datapoint to evaluate
+        :returns: 2-D array of signals
+        """
+        raise NotImplementedError
+
 
 class NullStrategy(Strategy):
 
@@ -39,11 +79,30 @@ class NullStrategy(Strategy):
         self.signals["WAIT"] = signal
         return signal
 
+    def signal_series(self, chart, start=0):
+        return numpy.zeros(len(chart), dtype=int)
+
+    def signal_batch(self, closes, start=0):
+        return numpy.zeros(closes.shape, dtype=int)
+
 
 class Klondike(Strategy):
 
+    PARAMS = ("fast", "slow", "signal_window")
+
+    def __init__(self, fast=12, slow=26, signal_window=9):
+        """
+        :fast: Window size of the faster EMA of the MACD
+        :slow: Window size of the slower EMA of the MACD
+        :signal_window: Window size of the EMA of the MACD signal line
+        """
+        Strategy.__init__(self)
+        self.fast = fast
+        self.slow = slow
+        self.signal_window = signal_window
+
     def signal(self, chart):
-        signal = macdh_momententum(chart)
+        signal = macdh_momententum(chart, self.fast, self.slow, self.signal_window)
         self.signals["MACDH_MOMEMENTUM"] = signal
         if signal.buy:
             return signal
@@ -51,26 +110,44 @@ class Klondike(Strategy):
             return signal
         return Signal(WAIT, datetime.datetime.utcfromtimestamp(chart.date))
 
+    def signal_series(self, chart, start=0):
+        signals = macdh_momententum_series(chart, self.fast, self.slow, self.signal_window)
+        signals[:start] = WAIT
+        return signals
+
+    def signal_batch(self, closes, start=0):
+        signals = macdh_momententum_batch(closes, self.fast, self.slow, self.signal_window)
+        signals[:, :start] = WAIT
+        return signals
+
 
 class Followtrend(Strategy):
     """Simple trend follow strategie."""
 
-    def __init__(self):
+    PARAMS = ("fast", "slow", "signal_window")
+
+    def __init__(self, fast=12, slow=26, signal_window=9):
+        """
+        :fast: Window size of the faster EMA of the MACD and the double cross
+        :slow: Window size of the slower EMA of the MACD and the double cross
+        :signal_window: Window size of the EMA of the MACD signal line
+        """
         Strategy.__init__(self)
+        self.fast = fast
+        self.slow = slow
+        self.signal_window = signal_window
         self._macd = WAIT
 
     def signal(self, chart):
         # Get current chart
-        closing = chart.values()
-
-        self._value = closing[-1][1]
-        self._date = datetime.datetime.utcfromtimestamp(closing[-1][0])
+        self._value = chart.close
+        self._date = datetime.datetime.utcfromtimestamp(chart.date)
 
         # MACDH is an early indicator for trend changes. We are using the
         # MACDH as a precondition for trading signals here and required
         # the MACDH signal a change into a bullish/bearish market. This
         # signal stays true as long as the signal changes.
-        macdh_signal = macdh(chart)
+        macdh_signal = macdh(chart, self.fast, self.slow, self.signal_window)
         if macdh_signal.value == BUY:
             self._macd = BUY
         if macdh_signal.value == SELL:
@@ -79,7 +156,7 @@ class Followtrend(Strategy):
 
         # Finally we are using the double_cross signal as confirmation
         # of the former MACDH signal
-        dc_signal = double_cross(chart)
+        dc_signal = double_cross(chart, self.fast, self.slow)
         if self._macd == BUY and dc_signal.value == BUY:
             signal = dc_signal
         elif self._macd == SELL and dc_signal.value == SELL:
@@ -90,3 +167,31 @@ class Followtrend(Strategy):
         log.debug("Final signal @{}: {}".format(signal.date, signal.value))
         self.signals["DC"] = signal
         return signal
+
+    def _latch(self, macdh_signals, start):
+        # The MACDH signal is latched: Every BUY or SELL signal of the
+        # MACDH is kept until the next BUY or SELL signal. The latch is
+        # build by forward filling the positions of the last MACDH
+        # signal along the last axis.
+        macdh_signals[..., :start] = WAIT
+        positions = numpy.where(macdh_signals != WAIT, numpy.arange(macdh_signals.shape[-1]), -1)
+        positions = numpy.maximum.accumulate(positions, axis=-1)
+        rows = numpy.indices(positions.shape)[:-1]
+        latched = macdh_signals[tuple(rows) + (numpy.maximum(positions, 0),)]
+        return numpy.where(positions >= 0, latched, self._macd)
+
+    def signal_series(self, chart, start=0):
+        latch = self._latch(macdh_series(chart, self.fast, self.slow, self.signal_window), start)
+        dc_signals = double_cross_series(chart, self.fast, self.slow)
+        signals = numpy.where(latch == dc_signals, dc_signals, WAIT)
+        signals[:start] = WAIT
+        if len(latch) > start:
+            self._macd = int(latch[-1])
+        return signals
+
+    def signal_batch(self, closes, start=0):
+        latch = self._latch(macdh_batch_signals(closes, self.fast, self.slow, self.signal_window), start)
+        dc_signals = double_cross_batch(closes, self.fast, self.slow)
+        signals = numpy.where(latch == dc_signals, dc_signals, WAIT)
+        signals[:, :start] = WAIT
+        return signals
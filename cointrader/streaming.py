@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Streaming indicator engine.
+
+The engine keeps the running state of indicators like EMA, SMA and MACD
+and updates them in O(1) for every new datapoint of the chart. The
+results are numerically equivalent to the results of `stockstats` which
+computes the indicators over the whole chart on every call.
+"""
+import array
+import collections
+
+
+class SeriesView(object):
+
+    """Read-only view on the values of an indicator. The view does not
+    copy the values. Indexing and slicing work relative to the view
+    like on a list."""
+
+    def __init__(self, values, start=0, stop=None):
+        """Will build a view on `values[start:stop]`.
+
+        :values: Sequence of values (array or list)
+        :start: Index of the first value within the view
+        :stop: Index after the last value within the view. On default
+            the view includes all values up to the end.
+        """
+        self._values = values
+        self._start = start
+        self._stop = stop
+
+    def __len__(self):
+        stop = len(self._values) if self._stop is None else self._stop
+        return max(stop - self._start, 0)
+
+    def __getitem__(self, index):
+        length = len(self)
+        if isinstance(index, slice):
+            start, stop, step = index.indices(length)
+            if step == 1:
+                return list(self._values[self._start + start:self._start + max(start, stop)])
+            return [self._values[self._start + i] for i in range(start, stop, step)]
+        if index < 0:
+            index += length
+        if index < 0 or index >= length:
+            raise IndexError("Index out of range")
+        return self._values[self._start + index]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._values[self._start + i]
+
+    def head(self, length):
+        """Will return a view on the first `length` values of this
+        view."""
+        return SeriesView(self._values, self._start, self._start + min(length, len(self)))
+
+    def tolist(self):
+        stop = self._start + len(self)
+        return list(self._values[self._start:stop])
+
+
+class _Field(object):
+
+    """Access to a single field of a list of datapoints as dictionary."""
+
+    def __init__(self, data, field):
+        self._data = data
+        self._field = field
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [point[self._field] for point in self._data[index]]
+        return self._data[index][self._field]
+
+
+class Indicator(object):
+
+    """Base class for all streaming indicators. Every indicator keeps
+    the computed values in `values`. An indicator can revert its last
+    update. This is needed to replace the last datapoint of a chart
+    which is still forming."""
+
+    def __init__(self):
+        self.values = array.array("d")
+
+    def update(self, value):
+        """Will update the indicator with the next `value` and append
+        the result to the values of the indicator."""
+        raise NotImplementedError
+
+    def revert(self):
+        """Will revert the last update of the indicator."""
+        raise NotImplementedError
+
+
+class EMA(Indicator):
+
+    """Exponential moving average. Same as the adjusted EMA of
+    pandas which is used by stockstats. The average is calculated as the
+    weighted sum of all values divided by the sum of the weights."""
+
+    def __init__(self, window):
+        Indicator.__init__(self)
+        self.window = window
+        self._decay = 1 - 2.0 / (window + 1)
+        self._weighted = 0.0
+        self._weights = 0.0
+        self._last = None
+
+    def update(self, value):
+        self._last = (self._weighted, self._weights)
+        self._weighted = value + self._decay * self._weighted
+        self._weights = 1 + self._decay * self._weights
+        self.values.append(self._weighted / self._weights)
+
+    def revert(self):
+        self._weighted, self._weights = self._last
+        self._last = None
+        self.values.pop()
+
+
+class SMA(Indicator):
+
+    """Simple moving average. Until the window is filled the average is
+    calculated over the available values like in stockstats. The
+    running sum is compensated (Kahan summation) to avoid drifting on
+    long charts."""
+
+    def __init__(self, window):
+        Indicator.__init__(self)
+        self.window = window
+        self._window = collections.deque()
+        self._sum = 0.0
+        self._compensation = 0.0
+        self._last = None
+
+    def _add(self, value):
+        y = value - self._compensation
+        t = self._sum + y
+        self._compensation = (t - self._sum) - y
+        self._sum = t
+
+    def update(self, value):
+        removed = None
+        state = (self._sum, self._compensation)
+        self._window.append(value)
+        self._add(value)
+        if len(self._window) > self.window:
+            removed = self._window.popleft()
+            self._add(-removed)
+        self._last = (state, removed)
+        self.values.append(self._sum / len(self._window))
+
+    def revert(self):
+        state, removed = self._last
+        self._sum, self._compensation = state
+        self._window.pop()
+        if removed is not None:
+            self._window.appendleft(removed)
+        self._last = None
+        self.values.pop()
+
+
+class MACD(Indicator):
+
+    """Moving Average Convergence Divergence. The `values` are the
+    MACD line (fast EMA - slow EMA). `signal` is the EMA of the MACD
+    line and `histogram` the difference between the MACD line and the
+    signal line (MACDH)."""
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        Indicator.__init__(self)
+        self._fast = EMA(fast)
+        self._slow = EMA(slow)
+        self._signal = EMA(signal)
+        self.histogram = array.array("d")
+
+    @property
+    def signal(self):
+        return self._signal.values
+
+    def update(self, value):
+        self._fast.update(value)
+        self._slow.update(value)
+        macd = self._fast.values[-1] - self._slow.values[-1]
+        self._signal.update(macd)
+        self.values.append(macd)
+        self.histogram.append(macd - self._signal.values[-1])
+
+    def revert(self):
+        self._fast.revert()
+        self._slow.revert()
+        self._signal.revert()
+        self.values.pop()
+        self.histogram.pop()
+
+
+def _fields(data):
+    # Dates and closing rates of the chart data.
+    if hasattr(data, "column"):
+        return data.column("date"), data.column("close")
+    return _Field(data, "date"), _Field(data, "close")
+
+
+class IndicatorEngine(object):
+
+    """The engine holds the closing rates of a chart and all indicators
+    requested so far. New datapoints are fed into the engine which will
+    update all indicators. Indicators which are requested the first
+    time are computed once over the known history and are updated
+    with every new datapoint afterwards.
+
+    The engine keeps its state between the ticks of a bot. Feeding the
+    same chart with some new datapoints will only process the new
+    datapoints. The last datapoint is replaced if it is fed again with
+    the same date as it may have changed while the candle was still
+    forming."""
+
+    def __init__(self):
+        self.dates = array.array("l")
+        self.closes = array.array("d")
+        self._indicators = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self.closes)
+
+    def matches(self, data):
+        """Will return True if the engine can be continued with the
+        given chart data. This is the case if the engine is empty or the
+        chart data holds the same datapoints as the engine followed by
+        new datapoints. The last datapoint of the engine may have
+        changed as it may still have been forming.
+
+        :data: List of datapoints as dictionary or CandleStore.
+        :returns: True or False
+        """
+        if not self.dates:
+            return True
+        size = len(self)
+        if len(data) < size:
+            return False
+        dates, closes = _fields(data)
+        if dates[0] != self.dates[0] or dates[size - 1] != self.dates[-1]:
+            return False
+        # Datapoints within the chart which changed or filled a gap.
+        return [float(close) for close in closes[0:size - 1]] == self.closes[:-1].tolist()
+
+    def update(self, date, close):
+        """Will update the engine with a single datapoint. If the date of
+        the datapoint is the same as the date of the last datapoint in the
+        engine the last datapoint is replaced.
+
+        :date: Timestamp of the datapoint
+        :close: Closing rate of the datapoint
+        """
+        close = float(close)
+        if self.dates and date == self.dates[-1]:
+            for indicator in self._indicators.values():
+                indicator.revert()
+            self.dates.pop()
+            self.closes.pop()
+        elif self.dates and date < self.dates[-1]:
+            raise ValueError("Datapoint {} is older than the last datapoint {}".format(date, self.dates[-1]))
+        self.dates.append(date)
+        self.closes.append(close)
+        for indicator in self._indicators.values():
+            indicator.update(close)
+
+    def feed(self, data):
+        """Will feed all datapoints of the given chart data into the
+        engine which are not already known by the engine. Only the last
+        datapoints are inspected so feeding a growing chart is cheap.
+
+        :data: List of datapoints as dictionary or CandleStore.
+        """
+        dates, closes = _fields(data)
+        size = len(dates)
+        start = size
+        if self.dates:
+            last = self.dates[-1]
+            while start > 0 and dates[start - 1] >= last:
+                start -= 1
+            if start < size and dates[start] == last:
+                self.update(dates[start], closes[start])
+                start += 1
+        else:
+            start = 0
+        new_closes = [float(close) for close in closes[start:size]]
+        self.dates.extend(int(date) for date in dates[start:size])
+        self.closes.extend(new_closes)
+        for indicator in self._indicators.values():
+            for close in new_closes:
+                indicator.update(close)
+
+    def _get(self, key, factory, *args):
+        indicator = self._indicators.get(key)
+        if indicator is None:
+            indicator = factory(*args)
+            for close in self.closes:
+                indicator.update(close)
+            self._indicators[key] = indicator
+        return indicator
+
+    def ema(self, window=10):
+        return SeriesView(self._get(("ema", window), EMA, window).values)
+
+    def sma(self, window=10):
+        return SeriesView(self._get(("sma", window), SMA, window).values)
+
+    def macd(self, fast=12, slow=26, signal=9):
+        return SeriesView(self._get(("macd", fast, slow, signal), MACD, fast, slow, signal).values)
+
+    def macds(self, fast=12, slow=26, signal=9):
+        return SeriesView(self._get(("macd", fast, slow, signal), MACD, fast, slow, signal).signal)
+
+    def macdh(self, fast=12, slow=26, signal=9):
+        return SeriesView(self._get(("macd", fast, slow, signal), MACD, fast, slow, signal).histogram)
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""Parameter sweep for strategies.
+
+A sweep runs a backtest of a strategy for every combination of the
+given parameter values. The chart data is loaded once and handed over to
+a pool of worker processes on start of the workers. Each worker then
+runs the backtests for its share of the parameter combinations on its
+own copy of the data.
+"""
+import itertools
+import multiprocessing
+
+from cointrader.candles import CandleStore
+from cointrader.backtest import run
+
+_worker = {}
+# State of a worker process. Set by the initializer of the pool.
+
+
+def expand(grid):
+    """Will return all combinations of the parameter values of the grid.
+
+    :grid: Dictionary with the name of the parameter and a list of values.
+    :returns: List of dictionaries with one value per parameter.
+    """
+    names = sorted(grid)
+    return [dict(zip(names, values))
+            for values in itertools.product(*[grid[name] for name in names])]
+
+
+def parse_param(param):
+    """Will parse a parameter given as "name=v1,v2,..." into the name
+    and the list of values. Values are converted into numbers.
+
+    :param: String
+    :returns: Tuple of name and list of values
+    """
+    name, values = param.split("=", 1)
+    result = []
+    for value in values.split(","):
+        try:
+            result.append(int(value))
+        except ValueError:
+            result.append(float(value))
+    return name.strip(), result
+
+
+def _init(data, market, resolution, start, end, btc, amount):
+    _worker.update({"data": data, "market": market, "resolution": resolution,
+                    "start": start, "end": end, "btc": btc, "amount": amount})
+
+
+def _run(task):
+    strategy, params = task
+    return params, run(_worker["data"], _worker["market"], strategy(**params),
+                       _worker["resolution"], _worker["start"], _worker["end"],
+                       _worker["btc"], _worker["amount"])
+
+
+def backtests(data, market, strategy, params, resolution, start, end, btc, amount, processes=None):
+    """Will run a backtest of the strategy for every dictionary of
+    parameters in `params` on the given chart data.
+
+    :data: Chart data as list of dictionaries or CandleStore
+    :market: Currency pair like BTC_DASH.
+    :strategy: Class of the strategy
+    :params: List of dictionaries with the parameters of the strategy
+    :resolution: Resolution of the chart data
+    :start: Datetime where the backtest starts
+    :end: Datetime where the backtest ends
+    :btc: Amount of BTC the bot starts with
+    :amount: Amount of coins the bot starts with
+    :processes: Number of worker processes. Defaults to the number of CPUs.
+    :returns: List of tuples with the parameters and the statistic of
+        the backtest.
+    """
+    if not isinstance(data, CandleStore):
+        data = CandleStore(data)
+    args = (data, market, resolution, start, end, btc, amount)
+    tasks = [(strategy, p) for p in params]
+    if processes == 1:
+        _init(*args)
+        return [_run(task) for task in tasks]
+    pool = multiprocessing.Pool(processes, _init, args)
+    try:
+        return pool.map(_run, tasks)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def sweep(market, strategy, grid, resolution, start, end, btc=1.0, amount=0, processes=None):
+    """Will run a backtest of the strategy for every combination of the
+    parameter values in `grid` on the given market. The results are
+    ranked by the profit of the strategy.
+
+    :market: :class:`cointrader.exchange.Market` instance
+    :strategy: Class of the strategy
+    :grid: Dictionary with the name of the parameter and a list of values.
+    :returns: List of tuples with the parameters and the statistic of
+        the backtest. The best result comes first.
+    """
+    data = CandleStore(market._get_chart_data(resolution, start, end))
+    results = backtests(data, market._name, strategy, expand(grid),
+                        resolution, start, end, btc, amount, processes)
+    return sorted(results, key=lambda r: r[1]["profit_cointrader"], reverse=True)
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""Trade history of markets and candles built from single trades.
+
+The chart data of the exchange has a resolution of 5 minutes at best.
+Candles of a finer resolution are built from the public trade history:
+
+* :func:`fetch` pulls the trades of a market from the exchange in
+  batches of time windows.
+* :class:`TradeHistory` stores the trades in a compact table of the
+  database. Ingesting a market again continues after the last stored
+  trade and fetches the trades before the first stored trade if an
+  earlier start is requested.
+* :func:`candles` and :func:`tick_candles` aggregate a stream of trades
+  into candles of a fixed period or a fixed number of trades. The
+  candles have the same fields as the chart data and can be used to
+  build a :class:`cointrader.chart.Chart`.
+
+Markets build charts with resolutions below 5 minutes like 1m from the
+trade history (see :meth:`cointrader.exchange.Market.get_chart`).
+
+All steps work on iterators of trades, so millions of trades are
+processed without holding them in memory.
+"""
+import calendar
+import collections
+import datetime
+import logging
+
+import sqlalchemy as sa
+
+from cointrader.database import Base
+from cointrader.candles import CandleStore
+from cointrader.exchanges.poloniex import TRADES_LIMIT
+
+log = logging.getLogger(__name__)
+
+market_trades = sa.Table(
+    "market_trades", Base.metadata,
+    sa.Column("market", sa.String, primary_key=True),
+    sa.Column("trade_id", sa.Integer, primary_key=True),
+    sa.Column("date", sa.Integer, nullable=False),
+    sa.Column("rate", sa.Float, nullable=False),
+    sa.Column("amount", sa.Float, nullable=False),
+    sa.Column("total", sa.Float, nullable=False),
+    sa.Column("buy", sa.Boolean, nullable=False),
+    sa.Index("ix_market_trades_date", "market", "date")
+)
+
+Tick = collections.namedtuple("Tick", ("trade_id", "date", "rate", "amount", "total", "buy"))
+# A single trade. The date is a UNIX timestamp, the amount is given in
+# coins and the total in BTC.
+
+MAX_WINDOW = 86400
+# Maximum length in seconds of the time window of a single request.
+
+
+def totimestamp(dt):
+    return int((dt - datetime.datetime(1970, 1, 1)).total_seconds())
+
+
+def fromtimestamp(ts):
+    return datetime.datetime.utcfromtimestamp(ts)
+
+
+def parse(trade):
+    """Will return the given trade of the trade history API as Tick."""
+    d = trade["date"]
+    date = calendar.timegm((int(d[0:4]), int(d[5:7]), int(d[8:10]),
+                            int(d[11:13]), int(d[14:16]), int(d[17:19])))
+    return Tick(int(trade["tradeID"]), date, float(trade["rate"]), float(trade["amount"]),
+                float(trade["total"]), trade["type"] == "buy")
+
+
+def fetch(api, market, start, end, last_id=0, window=3600, limit=TRADES_LIMIT):
+    """Will fetch the trades of the market between the `start` and
+    `end` timestamp in time windows. A window is halved if the exchange
+    returns the maximum number of trades for it and is doubled if it
+    only returns a few trades.
+
+    :api: API of the exchange
+    :market: Currency pair like BTC_DASH.
+    :start: UNIX timestamp of the first window
+    :end: UNIX timestamp of the end of the last window
+    :last_id: Only trades with a greater ID are returned.
+    :window: Initial length of a window in seconds
+    :limit: Maximum number of trades the exchange returns per request
+    :returns: Iterator of Ticks ordered by their ID
+    """
+    while start <= end:
+        stop = min(start + window - 1, end)
+        batch = api.trades(market, fromtimestamp(start), fromtimestamp(stop))
+        if len(batch) >= limit and stop > start:
+            # The window holds more trades than returned.
+            window = max(1, window // 2)
+            continue
+        log.debug("Fetched {} trades of {} from {} to {}".format(len(batch), market, start, stop))
+        for tick in sorted((parse(trade) for trade in batch), key=lambda t: t.trade_id):
+            if tick.trade_id > last_id:
+                last_id = tick.trade_id
+                yield tick
+        start = stop + 1
+        if len(batch) < limit // 4:
+            window = min(window * 2, MAX_WINDOW)
+
+
+class TradeHistory(object):
+
+    """Trade history of markets in the database."""
+
+    def __init__(self, engine):
+        """
+        :engine: SQLAlchemy engine of the database
+        """
+        self._engine = engine
+        self._initialised = False
+
+    def _init(self):
+        if not self._initialised:
+            Base.metadata.create_all(self._engine, tables=[market_trades])
+            self._initialised = True
+
+    def _get(self, market, order):
+        self._init()
+        query = (market_trades.select()
+                 .where(market_trades.c.market == market)
+                 .order_by(order).limit(1))
+        with self._engine.connect() as conn:
+            row = conn.execute(query).first()
+        if row is None:
+            return None
+        return Tick(row.trade_id, row.date, row.rate, row.amount, row.total, row.buy)
+
+    def first(self, market):
+        """Will return the first stored trade of the market or None."""
+        return self._get(market, market_trades.c.trade_id)
+
+    def last(self, market):
+        """Will return the last stored trade of the market or None."""
+        return self._get(market, market_trades.c.trade_id.desc())
+
+    def ingest(self, api, market, start=None, end=None, batch=10000):
+        """Will fetch the trades of the market from the exchange and
+        store them. If trades of the market are stored already, the
+        trades after the last stored trade are fetched. The trades
+        between `start` and the first stored trade are fetched as well
+        if `start` is earlier than the first stored trade.
+
+        :api: API of the exchange
+        :market: Currency pair like BTC_DASH.
+        :start: Datetime of the first trade to fetch. Needed if no
+            trades of the market are stored yet.
+        :end: Datetime of the last trade to fetch (Default Now)
+        :batch: Number of trades written per transaction
+        :returns: Number of stored trades
+        """
+        first = self.first(market)
+        count = 0
+        if first is None:
+            if start is None:
+                raise ValueError("No trades of {} stored yet. A start is needed.".format(market))
+            ts_start, last_id = totimestamp(start), 0
+        else:
+            if start is not None and totimestamp(start) < first.date:
+                # The earlier trades are stored in a single transaction
+                # so the stored trades never have a gap.
+                ticks = (tick for tick in fetch(api, market, totimestamp(start), first.date)
+                         if tick.trade_id < first.trade_id)
+                with self._engine.begin() as conn:
+                    for rows in self._rows(market, ticks, batch):
+                        conn.execute(market_trades.insert(), rows)
+                        count += len(rows)
+            # Further trades may have happened in the same second as
+            # the last stored trade.
+            last = self.last(market)
+            ts_start, last_id = last.date, last.trade_id
+        ts_end = totimestamp(end or datetime.datetime.utcnow())
+        for rows in self._rows(market, fetch(api, market, ts_start, ts_end, last_id), batch):
+            count += self._store(rows)
+        return count
+
+    def _rows(self, market, ticks, batch):
+        # Rows of the trades in lists of at most `batch` rows.
+        rows = []
+        for tick in ticks:
+            row = tick._asdict()
+            row["market"] = market
+            rows.append(row)
+            if len(rows) >= batch:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+
+    def _store(self, rows):
+        if rows:
+            with self._engine.begin() as conn:
+                conn.execute(market_trades.insert(), rows)
+        return len(rows)
+
+    def load(self, market, start=None, end=None, batch=10000):
+        """Will return the stored trades of the market. The trades are
+        read from the database in batches.
+
+        :market: Currency pair like BTC_DASH.
+        :start: Optional datetime of the first trade
+        :end: Optional datetime of the last trade
+        :batch: Number of trades read at once
+        :returns: Iterator of Ticks ordered by their ID
+        """
+        self._init()
+        c = market_trades.c
+        query = market_trades.select().where(c.market == market)
+        if start is not None:
+            query = query.where(c.date >= totimestamp(start))
+        if end is not None:
+            query = query.where(c.date <= totimestamp(end))
+        with self._engine.connect() as conn:
+            result = conn.execution_options(yield_per=batch).execute(query.order_by(c.trade_id))
+            for row in result:
+                yield Tick(row.trade_id, row.date, row.rate, row.amount, row.total, row.buy)
+
+    def chart(self, market, start=None, end=None, period=60):
+        """Will return the candles of the given period built from the
+        stored trades of the market.
+
+        :returns: CandleStore
+        """
+        return CandleStore(candles(self.load(market, start, end), period))
+
+
+def _open(tick, date):
+    return {"date": date, "open": tick.rate, "high": tick.rate, "low": tick.rate,
+            "close": tick.rate, "volume": tick.total, "quoteVolume": tick.amount}
+
+
+def _add(candle, tick):
+    if tick.rate > candle["high"]:
+        candle["high"] = tick.rate
+    elif tick.rate < candle["low"]:
+        candle["low"] = tick.rate
+    candle["close"] = tick.rate
+    candle["volume"] += tick.total
+    candle["quoteVolume"] += tick.amount
+
+
+def _empty(close, date):
+    # A period without trades like in the chart data of the exchange.
+    return {"date": date, "open": close, "high": close, "low": close, "close": close,
+            "volume": 0.0, "quoteVolume": 0.0, "weightedAverage": close}
+
+
+def _close(candle):
+    candle["weightedAverage"] = candle["volume"] / candle["quoteVolume"] if candle["quoteVolume"] else candle["close"]
+    return candle
+
+
+def candles(ticks, period=60):
+    """Will aggregate the trades into candles of the given period.
+    Periods start at multiples of the period since the UNIX epoch.
+    Periods without any trade between two trades get the close rate of
+    the previous candle and no volume like in the chart data of the
+    exchange.
+
+    :ticks: Iterator of Ticks ordered by their ID
+    :period: Period of the candles in seconds
+    :returns: Iterator of candles as dictionary
+    """
+    candle = None
+    for tick in ticks:
+        date = tick.date // period * period
+        if candle is None or date != candle["date"]:
+            if candle is not None:
+                yield _close(candle)
+                for gap in range(candle["date"] + period, date, period):
+                    yield _empty(candle["close"], gap)
+            candle = _open(tick, date)
+        else:
+            _add(candle, tick)
+    if candle is not None:
+        yield _close(candle)
+
+
+def tick_candles(ticks, size=100):
+    """Will aggregate every `size` trades into a candle. The date of a
+    candle is the date of its first trade. Trades in the same second
+    as the last trade of a candle are added to the candle as well, so
+    every candle has its own date.
+
+    :ticks: Iterator of Ticks ordered by their ID
+    :size: Number of trades per candle
+    :returns: Iterator of candles as dictionary
+    """
+    candle = None
+    count = 0
+    last = None
+    for tick in ticks:
+        if candle is None or (count >= size and tick.date > last):
+            if candle is not None:
+                yield _close(candle)
+            candle = _open(tick, tick.date)
+            count = 1
+        else:
+            _add(candle, tick)
+            count += 1
+        last = tick.date
+    if candle is not None:
+        yield _close(candle)
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""Walk-forward optimisation of strategy parameters.
+
+The history is split into windows which are moved forward over the
+chart data. The parameters of the strategy are optimised on the in-sample
+part of a window and then tested on the following out-of-sample part::
+
+    |-- train 1 --|- test 1 -|
+               |-- train 2 --|- test 2 -|
+                          |-- train 3 --|- test 3 -|
+
+Backtesting every parameter combination on every window from scratch
+would mean hundreds of backtests which all compute the same indicators
+again. Instead the signals of every parameter combination are computed
+once for the whole history. Evaluating a window then only needs to
+follow the signals within the window.
+
+The combinations are spread over a pool of worker processes which get
+the chart data once. Every worker computes the signals of its
+combinations on a single chart, so indicators which are used by several
+combinations are computed only once per worker.
+"""
+import datetime
+import multiprocessing
+
+import numpy
+
+from cointrader.candles import CandleStore
+from cointrader.chart import Chart
+from cointrader.indicators import MIN_POINTS
+from cointrader.ledger import Ledger, statistic
+from cointrader.backtest import signal_series, evaluate
+
+_worker = {}
+# State of a worker process. Set by the initializer of the pool.
+
+
+def windows(length, train, test, start=MIN_POINTS):
+    """Will return the positions of the walk-forward windows.
+
+    :length: Number of datapoints
+    :train: Number of datapoints of the in-sample part of a window
+    :test: Number of datapoints of the out-of-sample part of a window
+    :start: Position of the first datapoint of the first window. The
+        datapoints before are needed to warm up the indicators.
+    :returns: List of (train start, test start, test stop) tuples
+    """
+    result = []
+    while start + train + test <= length:
+        result.append((start, start + train, start + train + test))
+        start += test
+    return result
+
+
+def _init(data, market, strategy, positions, btc, amount):
+    _worker.update({"data": data, "chart": Chart(data, None, None), "market": market,
+                    "strategy": strategy, "positions": positions, "btc": btc, "amount": amount})
+
+
+def _run(params):
+    w = _worker
+    signals = signal_series(w["strategy"](**params), w["chart"], MIN_POINTS)
+    stats = [evaluate(w["data"], w["market"], signals, start, stop, w["btc"], w["amount"])
+             for start, stop, _ in w["positions"]]
+    return signals, stats
+
+
+class WalkForward(object):
+
+    """Walk-forward optimisation of a strategy on the chart data of a
+    market."""
+
+    def __init__(self, data, market, strategy, params, train, test, btc=1.0, amount=0):
+        """
+        :data: Chart data as list of dictionaries or CandleStore
+        :market: Currency pair like BTC_DASH.
+        :strategy: Class of the strategy
+        :params: List of dictionaries with the parameters to choose from
+        :train: Number of datapoints to optimise the parameters on
+        :test: Number of datapoints to test the parameters on
+        :btc: Amount of BTC to start with
+        :amount: Amount of coins to start with
+        """
+        if not isinstance(data, CandleStore):
+            data = CandleStore(data)
+        self.data = data
+        self.market = market
+        self.strategy = strategy
+        self.params = params
+        self.train = train
+        self.test = test
+        self.btc = btc
+        self.amount = amount
+        self.ledger = None
+        """Ledger of the trades in all out-of-sample windows"""
+
+    def signals(self):
+        """Will return the signals of every parameter combination for the
+        whole chart data.
+
+        :returns: Numpy array with one row of signals per combination.
+        """
+        chart = Chart(self.data, None, None)
+        return numpy.array([signal_series(self.strategy(**params), chart, MIN_POINTS)
+                            for params in self.params])
+
+    def run(self, processes=None):
+        """Will run the walk-forward optimisation. The signals and the
+        in-sample backtests of every parameter combination are computed
+        in a pool of worker processes.
+
+        :processes: Number of worker processes. Defaults to the number of CPUs.
+        :returns: List of dictionaries per window with the chosen
+            parameters and the in-sample and out-of-sample statistic.
+        """
+        positions = windows(len(self.data), self.train, self.test)
+        if not positions:
+            raise ValueError("Not enough chart data for a single window")
+        args = (self.data, self.market, self.strategy, positions, self.btc, self.amount)
+        if processes == 1:
+            _init(*args)
+            runs = [_run(params) for params in self.params]
+        else:
+            pool = multiprocessing.Pool(processes, _init, args)
+            try:
+                runs = pool.map(_run, self.params)
+            finally:
+                pool.close()
+                pool.join()
+        signals = [signal for signal, _ in runs]
+
+        results = []
+        ledger = None
+        for i, (start, split, stop) in enumerate(positions):
+            window = [stats[i] for _, stats in runs]
+            best = max(range(len(window)), key=lambda j: window[j]["profit_cointrader"])
+            test = evaluate(self.data, self.market, signals[best], split, stop, self.btc, self.amount)
+            if ledger is None:
+                first = self.data[split]
+                ledger = Ledger(self.market)
+                ledger.init(datetime.datetime.utcfromtimestamp(first["date"]),
+                            first["close"], self.btc, self.amount)
+            # The out-of-sample windows are chained to get the result of
+            # trading with the walk-forward parameters.
+            evaluate(self.data, self.market, signals[best], split, stop, ledger=ledger)
+            results.append({"params": self.params[best], "train": window[best], "test": test})
+        self.ledger = ledger
+        return results
+
+    def stat(self):
+        """Will return the statistic of trading with the chosen
+        parameters over all out-of-sample windows."""
+        positions = windows(len(self.data), self.train, self.test)
+        stat = statistic(self.ledger, self.data[positions[0][1]], self.data[positions[-1][2] - 1])
+        stat["trades"] = len(self.ledger) - 1
+        return stat
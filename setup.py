@@ -12,6 +12,7 @@ with open('HISTORY.rst') as history_file:
 
 requirements = [
     'Click>=6.0',
+    'numpy',
     'requests',
     'sqlalchemy',
     'stockstats',
@@ -20,6 +21,10 @@ requirements = [
     # TODO: put package requirements here
 ]
 
+extras_requirements = {
+    'orderbook': ['websocket-client']
+}
+
 test_requirements = [
     # TODO: put package test requirements here
 ]
@@ -40,6 +45,7 @@ setup(
     },
     include_package_data=True,
     install_requires=requirements,
+    extras_require=extras_requirements,
     license="MIT license",
     zip_safe=False,
     keywords='cointrader coins crypto currency trading bot exchange poloniex bitcoin dash digital cash',
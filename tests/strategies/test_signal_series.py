@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_signal_series
+----------------------------------
+
+Tests that the vectorized signals of the strategies are the same as the
+signals which are generated datapoint by datapoint.
+"""
+import math
+
+from tests.test_chart import get_chart
+
+
+def get_data(size=400):
+    data = []
+    close = 0.07
+    for i in range(size):
+        open_ = close
+        close = 0.07 + 0.01 * math.sin(i / 7.0) + 0.004 * math.sin(i / 2.0)
+        data.append({u'date': 1500000000 + i * 1800,
+                     u'open': open_,
+                     u'close': close,
+                     u'high': max(open_, close),
+                     u'low': min(open_, close),
+                     u'volume': 1.0,
+                     u'quoteVolume': 1.0 / close,
+                     u'weightedAverage': (open_ + close) / 2})
+    return data
+
+
+def check_strategy(factory, start=10):
+    chart = get_chart(get_data())
+    strategy = factory()
+    expected = [strategy.signal(chart.view(i + 1)).value for i in range(start, len(chart))]
+    result = factory().signal_series(chart, start)
+    assert list(result[:start]) == [0] * start
+    assert list(result[start:]) == expected
+    assert set(expected) != set([0])
+
+
+def test_followtrend():
+    from cointrader.strategy import Followtrend
+    check_strategy(Followtrend)
+
+
+def test_klondike():
+    from cointrader.strategy import Klondike
+    check_strategy(Klondike)
+
+
+def test_null():
+    from cointrader.strategy import NullStrategy
+    chart = get_chart(get_data())
+    assert set(NullStrategy().signal_series(chart)) == set([0])
+
+
+def check_batch(factory, start=10):
+    import numpy
+    from tests.test_montecarlo import get_arrays
+    from cointrader.montecarlo import perturb
+    charts = [perturb(get_arrays(), numpy.random.RandomState(seed), sigma=0.01) for seed in range(3)]
+    closes = numpy.array([data.column("close").tolist() for data in charts])
+    result = factory().signal_batch(closes, start)
+    assert result.shape == closes.shape
+    for i, data in enumerate(charts):
+        assert list(result[i]) == list(factory().signal_series(get_chart(data), start))
+
+
+def test_followtrend_batch():
+    from cointrader.strategy import Followtrend
+    check_batch(Followtrend)
+
+
+def test_klondike_batch():
+    from cointrader.strategy import Klondike
+    check_batch(Klondike)
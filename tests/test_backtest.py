@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_backtest
+----------------------------------
+
+Tests for `cointrader.backtest` module.
+"""
+import datetime
+
+from tests.test_cache import ChartApi
+from tests.strategies.test_signal_series import get_data
+
+
+class BacktestApi(ChartApi):
+
+    def balance(self):
+        return {}
+
+
+def get_bot(factory, data):
+    from cointrader.exchange import Exchange, BacktestMarket
+    from cointrader.bot import Cointrader, Trade
+    market = BacktestMarket(Exchange(None, BacktestApi(data)), "BTC_DASH")
+    start = datetime.datetime.utcfromtimestamp(data[0]["date"])
+    end = datetime.datetime.utcfromtimestamp(data[-1]["date"])
+    bot = Cointrader(market, factory(), "30m", start, end)
+    bot.btc = 1.0
+    bot.trades.append(Trade(start, "INIT", 0, 0, "BTC_DASH", data[0]["close"], 0, 0, 1.0, 0))
+    return bot
+
+
+def sequential_strategy(factory):
+    """Strategy which does not provide vectorized signals"""
+    class Sequential(factory):
+        def signal_series(self, chart, start=0):
+            raise NotImplementedError()
+    return Sequential
+
+
+def check_backtest(factory):
+    from cointrader.backtest import Backtest
+    data = get_data()
+    backtest = Backtest(get_bot(factory, data))
+    backtest.run()
+    expected = Backtest(get_bot(sequential_strategy(factory), data))
+    expected.run()
+    trades = [(t.order_type, t.rate, t.date) for t in backtest.ledger]
+    assert len(trades) > 3
+    assert trades == [(t.order_type, t.rate, t.date) for t in expected.ledger]
+    assert backtest.stat() == expected.stat()
+    assert (backtest.bot.btc, backtest.bot.amount) == (expected.bot.btc, expected.bot.amount)
+
+
+def test_backtest_trend():
+    from cointrader.strategy import Followtrend
+    check_backtest(Followtrend)
+
+
+def test_backtest_klondike():
+    from cointrader.strategy import Klondike
+    check_backtest(Klondike)
+
+
+class MarketsApi(BacktestApi):
+
+    def __init__(self, data):
+        self.data = data
+
+    def chart(self, currency, start, end, period=1800):
+        return self.data[currency]
+
+    def book(self, currency, priority=None, depth=10):
+        return {"asks": [], "bids": [], "seq": 1}
+
+
+def test_backtest_markets():
+    from cointrader.exchange import Exchange
+    from cointrader.strategy import Followtrend
+    from cointrader.backtest import run_markets, aggregate
+    data = get_data()
+    inverse = [dict(point, close=1 / point["close"]) for point in data]
+    exchange = Exchange(None, MarketsApi({"BTC_DASH": data, "BTC_ETH": inverse, "BTC_XRP": data[:10]}))
+    start = datetime.datetime.utcfromtimestamp(data[0]["date"])
+    end = datetime.datetime.utcfromtimestamp(data[-1]["date"])
+    args = (exchange, ["BTC_DASH", "BTC_ETH", "BTC_XRP"], Followtrend, "30m", start, end)
+    results = run_markets(*args, processes=2)
+    assert [market for market, stat in results] == ["BTC_DASH", "BTC_ETH"]
+    assert results == run_markets(*args, processes=1)
+
+    total = aggregate(results)
+    assert total["markets"] == 2
+    assert total["trades"] == results[0][1]["trades"] + results[1][1]["trades"]
+    assert total["trader_start_value"] == 2.0
+    assert total["trader_end_value"] == results[0][1]["trader_end_value"] + results[1][1]["trader_end_value"]
+
+
+def test_backtest_markets_without_asyncio(monkeypatch):
+    from cointrader import exchange as exchangemodule
+    from cointrader.exchange import Exchange
+    from cointrader.strategy import Followtrend
+    from cointrader.backtest import run_markets
+    data = get_data()
+    exchange = Exchange(None, MarketsApi({"BTC_DASH": data, "BTC_XRP": data[:10]}))
+    start = datetime.datetime.utcfromtimestamp(data[0]["date"])
+    end = datetime.datetime.utcfromtimestamp(data[-1]["date"])
+    args = (exchange, ["BTC_DASH", "BTC_XRP"], Followtrend, "30m", start, end)
+    expected = run_markets(*args, processes=1)
+    monkeypatch.setattr(exchangemodule, "ASYNCIO", False)
+    assert run_markets(*args, processes=1) == expected
+    books = exchange.get_books(["BTC_DASH", "BTC_XRP"])
+    assert sorted(books) == ["BTC_DASH", "BTC_XRP"]
+
+
+def test_backtest_matches_interactive_loop(monkeypatch):
+    import click
+    from cointrader import bot as botmodule
+    from cointrader.backtest import Backtest
+    from cointrader.strategy import Followtrend
+
+    class Session(object):
+        def commit(self):
+            pass
+
+    data = get_data()
+    backtest = Backtest(get_bot(Followtrend, data))
+    backtest.run()
+
+    # The bot is detached in the first step and follows the signals of
+    # the strategy on every datapoint.
+    monkeypatch.setattr(botmodule, "db", Session())
+    monkeypatch.setattr(botmodule.select, "select", lambda *args: ([], [], []))
+    monkeypatch.setattr(click, "getchar", lambda: "d")
+    monkeypatch.setattr(click, "echo", lambda *args, **kwargs: None)
+    monkeypatch.setattr(botmodule, "render_bot_title", lambda *args: "")
+    bot = get_bot(Followtrend, data)
+    bot.start(backtest=True)
+
+    trades = [(t.order_type, t.rate, t.date) for t in backtest.ledger]
+    assert len(trades) > 3
+    assert trades == [(t.order_type, float(t.rate), t.date) for t in bot.trades]
+    assert (backtest.bot.btc, backtest.bot.amount) == (bot.btc, bot.amount)
+
+
+def test_backtest_persist(monkeypatch):
+    import sqlalchemy as sa
+    from cointrader import backtest as backtestmodule, ledger as ledgermodule
+    from cointrader.database import Base
+    from cointrader.bot import Trade
+    from cointrader.backtest import Backtest
+    from cointrader.strategy import Followtrend
+    engine = sa.create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sa.orm.sessionmaker(bind=engine)()
+    monkeypatch.setattr(backtestmodule, "db", session)
+    monkeypatch.setattr(ledgermodule, "db", session)
+    data = get_data()
+
+    # The trades of a bot which is not stored are kept on the bot only.
+    bot = get_bot(Followtrend, data)
+    backtest = Backtest(bot, persist=True)
+    backtest.run()
+    assert session.query(Trade).count() == 0
+    assert len(bot.trades) == len(backtest.ledger) > 3
+    assert bot.stat() == backtest.stat()
+
+    bot = get_bot(Followtrend, data)
+    session.add(bot)
+    session.commit()
+    backtest = Backtest(bot, persist=True)
+    backtest.run()
+    assert session.query(Trade).filter(Trade.bot_id == bot.id).count() == len(backtest.ledger)
+    assert session.query(Trade).filter(Trade.bot_id.is_(None)).count() == 0
+    assert len(bot.trades) == len(backtest.ledger)
+    assert bot.stat() == backtest.stat()
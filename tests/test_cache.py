@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_cache
+----------------------------------
+
+Tests for `cointrader.cache` module.
+"""
+import datetime
+
+from tests.test_chart import get_data
+
+
+class ChartApi(object):
+
+    def __init__(self, data):
+        self.data = data
+        self.requests = []
+
+    def chart(self, currency, start, end, period=1800):
+        self.requests.append((start, end))
+        epoch = datetime.datetime(1970, 1, 1)
+        start = (start - epoch).total_seconds()
+        end = (end - epoch).total_seconds()
+        return [d for d in self.data if start <= d["date"] <= end]
+
+
+def get_cache():
+    import sqlalchemy as sa
+    from cointrader.cache import CandleCache
+    return CandleCache(sa.create_engine("sqlite://"))
+
+
+def dt(ts):
+    return datetime.datetime.utcfromtimestamp(ts)
+
+
+def test_missing_ranges():
+    from cointrader.cache import missing_ranges
+    assert missing_ranges(0, 100, []) == [(0, 100)]
+    assert missing_ranges(0, 100, [(10, 20), (50, 60)]) == [(0, 9), (21, 49), (61, 100)]
+    assert missing_ranges(15, 55, [(10, 20), (50, 60)]) == [(21, 49)]
+    assert missing_ranges(12, 18, [(10, 20)]) == []
+
+
+def test_merge_ranges():
+    from cointrader.cache import merge_ranges
+    assert merge_ranges([(50, 60), (10, 20), (21, 30)]) == [(10, 30), (50, 60)]
+
+
+def test_cache_fetches_missing_ranges_only():
+    data = get_data(100)
+    api = ChartApi(data)
+    cache = get_cache()
+    first = data[0]["date"]
+
+    result = cache.chart(api, "BTC_DASH", dt(first), dt(data[49]["date"]))
+    assert result == data[:50]
+    assert len(api.requests) == 1
+
+    result = cache.chart(api, "BTC_DASH", dt(data[10]["date"]), dt(data[40]["date"]))
+    assert result == data[10:41]
+    assert len(api.requests) == 1
+
+    result = cache.chart(api, "BTC_DASH", dt(first), dt(data[-1]["date"]))
+    assert result == data
+    assert len(api.requests) == 2
+    assert api.requests[-1] == (dt(data[49]["date"] + 1), dt(data[-1]["date"]))
+
+
+def test_result_cache_eviction(tmpdir):
+    import os
+    import time
+    from cointrader.cache import ResultCache, result_key
+    cache = ResultCache(str(tmpdir.join("results")), max_size=250)
+    assert result_key("a", 1) == result_key("a", 1) != result_key("a", 2)
+    assert cache.get("a") is None
+    cache.set("a", {"value": "x" * 100})
+    cache.set("b", {"value": "y" * 100})
+    past = time.time() - 10
+    os.utime(cache._filename("b"), (past, past))
+    assert cache.get("a") == {"value": "x" * 100}
+    cache.set("c", {"value": "z" * 100})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_result_cache_replaces_result(tmpdir):
+    import os
+    from cointrader.cache import ResultCache
+    cache = ResultCache(str(tmpdir))
+    cache.set("a", {"value": 1})
+    cache.set("a", {"value": 2})
+    assert cache.get("a") == {"value": 2}
+    assert os.listdir(str(tmpdir)) == ["a.json"]
+
+
+def test_backtest_result_cache(tmpdir):
+    from cointrader.cache import ResultCache
+    from cointrader.backtest import Backtest
+    from cointrader.strategy import Followtrend
+    from tests.test_backtest import get_bot
+    from tests.strategies.test_signal_series import get_data
+    data = get_data()
+    cache = ResultCache(str(tmpdir))
+    backtest = Backtest(get_bot(Followtrend, data), cache=cache)
+    backtest.run()
+    assert cache.misses == 1
+
+    cached = Backtest(get_bot(Followtrend, data), cache=cache)
+    cached.signals = None
+    cached.run()
+    assert cache.hits == 1
+    assert [e.todict() for e in cached.ledger] == [e.todict() for e in backtest.ledger]
+    assert cached.stat() == backtest.stat()
+    assert (cached.bot.btc, cached.bot.amount) == (backtest.bot.btc, backtest.bot.amount)
+
+    other = Backtest(get_bot(lambda: Followtrend(fast=8), data), cache=cache)
+    assert other.key() != backtest.key()
+
+
+class SlowChartApi(ChartApi):
+
+    def __init__(self, data):
+        import threading
+        ChartApi.__init__(self, data)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def chart(self, currency, start, end, period=1800):
+        import time
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        return ChartApi.chart(self, currency, start, end, period)
+
+
+def test_cache_used_by_several_threads(tmpdir):
+    import threading
+    import sqlalchemy as sa
+    from cointrader.cache import CandleCache
+    data = get_data(100)
+    api = SlowChartApi(data)
+    cache = CandleCache(sa.create_engine("sqlite:///{}".format(tmpdir.join("cache.db"))))
+    markets = ["BTC_DASH", "BTC_LTC", "BTC_XMR", "BTC_ETH", "BTC_ZEC"]
+    results = {}
+    errors = []
+
+    def fetch(market):
+        try:
+            results[market] = cache.chart(api, market, dt(data[0]["date"]), dt(data[-1]["date"]))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=fetch, args=(market,)) for market in markets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert cache.fetched == len(markets)
+    assert len(api.requests) == len(markets)
+    assert api.max_active > 1
+    assert all(results[market] == data for market in markets)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_candles
+----------------------------------
+
+Tests for `cointrader.candles` module.
+"""
+from tests.test_chart import get_data
+
+
+def test_store_behaves_like_list():
+    from cointrader.candles import CandleStore
+    data = get_data(10)
+    store = CandleStore(data)
+    assert len(store) == 10
+    assert store[0] == data[0]
+    assert store[-1]["close"] == data[-1]["close"]
+    assert [c["date"] for c in store] == [d["date"] for d in data]
+    assert store[-1].todict() == data[-1]
+
+
+def test_store_slice_shares_data():
+    from cointrader.candles import CandleStore
+    data = get_data(10)
+    store = CandleStore(data)
+    view = store[2:5]
+    assert len(view) == 3
+    assert view[0] == data[2]
+    assert view.column("close").tolist() == [d["close"] for d in data[2:5]]
+    store.append(get_data(11)[-1])
+    assert len(view) == 3
+    assert len(store) == 11
+
+
+def test_store_size():
+    from cointrader.candles import CandleStore
+    store = CandleStore(get_data(100))
+    assert store.nbytes == 100 * 8 * 8
+
+
+def test_store_index():
+    from cointrader.candles import CandleStore
+    data = get_data(10)
+    # Add a gap after the fifth datapoint.
+    for point in data[5:]:
+        point["date"] += 3600
+    store = CandleStore(data)
+    dates = [d["date"] for d in data]
+    assert store.index(dates[0] - 1) == -1
+    assert store.index(dates[0]) == 0
+    assert store.index(dates[3] + 10) == 3
+    assert store.index(dates[4] + 1800) == 4
+    assert store.index(dates[7]) == 7
+    assert store.index(dates[-1] + 99999) == 9
+    assert store[2:8].index(dates[7]) == 5
+
+
+def test_store_between():
+    from cointrader.candles import CandleStore
+    data = get_data(10)
+    store = CandleStore(data)
+    result = store.between(data[2]["date"] - 1, data[5]["date"])
+    assert [c["date"] for c in result] == [d["date"] for d in data[2:6]]
+
+
+def test_store_merge():
+    from cointrader.candles import CandleStore
+    data = get_data(10)
+    store = CandleStore(data[:8])
+    # The last datapoint of the store is replaced.
+    changed = dict(data[7], close=99.0)
+    store.merge([changed] + data[8:])
+    assert len(store) == 10
+    assert store[7]["close"] == 99.0
+    assert [c["date"] for c in store] == [d["date"] for d in data]
+    store.merge([])
+    assert len(store) == 10
+
+
+def test_store_merge_keeps_views():
+    from cointrader.candles import CandleStore
+    from cointrader.chart import Chart
+    data = get_data(10)
+    store = CandleStore(data[:8])
+    view = store[2:8]
+    chart = Chart(store, None, None)
+    old = chart.view(6)
+    store.merge([dict(data[7], close=99.0)] + data[8:])
+    assert store[7]["close"] == 99.0
+    assert view[-1] == data[7]
+    assert len(chart.data) == 8
+    assert chart.data[-1] == data[7]
+    assert old.data[-1] == data[5]
+    # Appending does not change views either.
+    store.merge(get_data(11)[10:])
+    assert len(store) == 11
+    assert len(chart.data) == 8
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_chart
+----------------------------------
+
+Tests for `cointrader.chart` module.
+"""
+import datetime
+
+
+def get_data(size=200):
+    data = []
+    close = 0.07
+    for i in range(size):
+        open_ = close
+        close = open_ * (1 + (i % 7 - 3) / 100.0)
+        data.append({u'date': 1500000000 + i * 1800,
+                     u'open': open_,
+                     u'close': close,
+                     u'high': max(open_, close),
+                     u'low': min(open_, close),
+                     u'volume': 1.0 + i % 3,
+                     u'quoteVolume': (1.0 + i % 3) / close,
+                     u'weightedAverage': (open_ + close) / 2})
+    return data
+
+
+def get_chart(data):
+    from cointrader.chart import Chart
+    start = datetime.datetime.utcfromtimestamp(data[0]["date"])
+    end = datetime.datetime.utcfromtimestamp(data[-1]["date"])
+    return Chart(data, start, end)
+
+
+def test_chart2frame_matches_csv():
+    import io
+    import pandas
+    from stockstats import StockDataFrame
+    from cointrader.chart import chart2csv
+    data = get_data()
+    stock = StockDataFrame.retype(pandas.read_csv(io.StringIO(chart2csv(data))))
+    chart = get_chart(data)
+    for a, b in zip(stock.get("macdh").tolist(), chart.macdh()):
+        assert abs(a - b) < 1e-12
+    for a, b in zip(stock.get("close_12_ema").tolist(), chart.ema(12)):
+        assert abs(a - b) < 1e-12
+
+
+def test_chart_view():
+    data = get_data()
+    chart = get_chart(data)
+    chart.ema(12)
+    view = chart.view(150)
+    prefix = get_chart(data[:150])
+    assert len(view) == 150
+    assert view.date == prefix.date
+    assert view.close == prefix.close
+    assert view.ema(12).tolist() == prefix.ema(12).tolist()
+    assert view.macdh()[-3::] == prefix.macdh()[-3::]
+    assert view.values() == prefix.values()
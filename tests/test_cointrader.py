@@ -17,3 +17,68 @@ def response():
     """
     # import requests
     # return requests.get('https://github.com/audreyr/cookiecutter-pypackage')
+
+
+def test_strategies():
+    from cointrader import STRATEGIES
+    from cointrader.strategy import Followtrend
+    assert sorted(STRATEGIES) == ["klondike", "null", "trend"]
+    assert STRATEGIES["trend"] is Followtrend
+
+
+def test_lazy_imports():
+    import sys
+    import subprocess
+    code = ("import sys, cointrader.cli; "
+            "print(','.join(m for m in ('pandas', 'numpy', 'sqlalchemy', 'stockstats') "
+            "if m in sys.modules))")
+    assert subprocess.check_output([sys.executable, "-c", code]).strip() == b""
+
+
+def test_lazy_database():
+    import cointrader
+    from cointrader import database
+    assert cointrader.Base.metadata is database.Base.metadata
+    assert cointrader.db.bind is database.db.bind
+    assert cointrader.engine.url is database.get_engine().url
+
+
+def test_cli_reports_api_errors(monkeypatch):
+    from click.testing import CliRunner
+    from cointrader import cli
+    from cointrader.exchange import Exchange
+    from cointrader.exchanges.poloniex import ApiError
+
+    class Api(object):
+        def balance(self):
+            raise ApiError("Invalid API key/secret pair.")
+
+    monkeypatch.setattr(cli, "Config", lambda configfile: None)
+    context = cli.Context()
+    context._exchange = Exchange(None, Api())
+    result = CliRunner().invoke(cli.main, ["--config", __file__, "balance"], obj=context)
+    assert result.exit_code == 1
+    assert "Error! Invalid API key/secret pair." in result.output
+
+
+def test_cli_reports_missing_websocket_client(monkeypatch):
+    from click.testing import CliRunner
+    from cointrader import cli, orderbook
+    from cointrader.exchange import Exchange
+    from cointrader.exchanges.cache import TTLCache
+
+    class Api(object):
+        cache = TTLCache(60)
+
+        def ticker(self):
+            return {"BTC_DASH": {"percentChange": "0", "baseVolume": "1"}}
+
+    monkeypatch.setattr(orderbook, "websocket", None)
+    monkeypatch.setattr(cli, "Config", lambda configfile: None)
+    context = cli.Context()
+    context._exchange = Exchange(None, Api())
+    result = CliRunner().invoke(cli.main, ["--config", __file__, "start", "BTC_DASH", "--strategy", "null",
+                                                     "--follow-book"],
+                                obj=context)
+    assert result.exit_code == 1
+    assert "Error! The push API requires the websocket-client package" in result.output
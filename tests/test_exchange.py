@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_exchange
+----------------------------------
+
+Tests for `cointrader.exchange` module.
+"""
+
+
+class AccountApi(object):
+
+    def __init__(self):
+        self.requests = 0
+
+    def balance(self):
+        self.requests += 1
+        return {"BTC": {"quantity": 1.0, "btc_value": 1.0},
+                "DASH": {"quantity": 10.0, "btc_value": 0.7},
+                "ETH": {"quantity": 0.0, "btc_value": 0.0}}
+
+    def book(self, currency, priority=None, depth=10):
+        return {"asks": [["0.07000000", 20.0]], "bids": [["0.07000000", 20.0]]}
+
+    def buy(self, market, amount, price, option=None):
+        return {"orderNumber": 1, "resultingTrades": []}
+
+
+def test_account_is_fetched_once():
+    from cointrader.exchange import Exchange
+    api = AccountApi()
+    exchange = Exchange(None, api)
+    assert api.requests == 0
+    assert list(exchange.coins) == ["BTC", "DASH"]
+    assert exchange.account.quantity("BTC") == 1.0
+    assert exchange.account.quantity("DASH") == 10.0
+    assert exchange.total_btc_value == 1.7
+    assert api.requests == 1
+    coins = exchange.coins
+    assert exchange.coins is coins
+    exchange.account.refresh()
+    assert api.requests == 2
+    assert exchange.coins is not coins
+    coins = exchange.coins
+    exchange.account.invalidate()
+    assert exchange.coins is not coins
+    assert api.requests == 3
+
+
+def test_account_invalidated_after_order():
+    from cointrader.exchange import Exchange, Market
+    api = AccountApi()
+    exchange = Exchange(None, api)
+    market = Market(exchange, "BTC_DASH")
+    exchange.account.quantity("BTC")
+    market.buy(0.1)
+    assert api.requests == 1
+    exchange.account.quantity("BTC")
+    assert api.requests == 2
+
+
+class ChartApi(object):
+
+    def __init__(self, data):
+        self.data = data
+        self.fetched = []
+
+    def chart(self, currency, start, end, period=1800):
+        from cointrader.chart import totimestamp
+        result = [point for point in self.data
+                  if totimestamp(start) <= point["date"] <= totimestamp(end)]
+        self.fetched.append(len(result))
+        return result or [{"date": 0}]
+
+
+def test_live_chart_fetches_new_candles():
+    import time
+    import datetime
+    from cointrader.exchange import Exchange, Market
+    from cointrader.chart import Chart
+    now = int(time.time()) // 1800 * 1800
+    data = [{"date": now - (199 - i) * 1800, "open": 1.0, "close": 1.0 + i / 100.0,
+             "high": 1.0, "low": 1.0, "volume": 1.0, "quoteVolume": 1.0,
+             "weightedAverage": 1.0} for i in range(199)]
+    api = ChartApi(data)
+    market = Market(Exchange(None, api), "BTC_DASH")
+    start = datetime.datetime.utcfromtimestamp(data[0]["date"] + 120 * 1800)
+    chart = market.get_chart(start=start)
+    assert len(chart.data) == 199
+    assert chart.ema(10).tolist() == Chart(data, None, None).ema(10).tolist()
+
+    # The forming candle changed and a new candle started.
+    data[-1] = dict(data[-1], close=3.0)
+    data.append(dict(data[-1], date=now, close=3.5))
+    chart = market.get_chart(start=start)
+    assert api.fetched == [199, 2]
+    assert len(chart.data) == 200
+    assert chart.close == 3.5
+    assert chart.ema(10).tolist() == Chart(data, None, None).ema(10).tolist()
+
+    # Nothing new since the last candle.
+    chart = market.get_chart(start=start)
+    assert api.fetched == [199, 2, 1]
+    assert len(chart.data) == 200
+
+
+def test_resolutions():
+    from cointrader.exchange import Exchange
+    exchange = Exchange(None, None)
+    assert exchange.resolution2seconds("30m") == 1800
+    assert exchange.resolution2seconds("8h") == 28800
+    assert exchange.resolution2seconds("1d") == 86400
+    assert exchange.resolution2seconds("1m") == 60
+    assert exchange.is_valid_resolution("1h")
+    assert not exchange.is_valid_resolution("7m")
+    assert not exchange.is_valid_resolution("foo")
+
+
+def test_chart_of_derived_resolution():
+    import datetime
+    from cointrader.exchange import Exchange, Market
+    from cointrader.resample import resample
+    data = [{"date": 1500000000 - 1500000000 % 3600 + i * 300, "open": 1.0 + i,
+             "close": 2.0 + i, "high": 3.0 + i, "low": 0.5, "volume": 1.0,
+             "quoteVolume": 2.0, "weightedAverage": 0.5} for i in range(12 * 150)]
+    api = ChartApi(data)
+    market = Market(Exchange(None, api), "BTC_DASH")
+    start = datetime.datetime.utcfromtimestamp(data[0]["date"] + 120 * 3600)
+    end = datetime.datetime.utcfromtimestamp(data[-1]["date"])
+    chart = market.get_chart("1h", start, end)
+    assert len(chart.data) == 150
+    assert chart.data[0] == resample(data[:12], 3600)[0]
+    assert chart.data[0]["volume"] == 12.0
+
+
+def test_chart_without_data():
+    import datetime
+    import pytest
+    from cointrader.exchange import Exchange, Market, BacktestMarket, ExchangeException
+    api = ChartApi([])
+    exchange = Exchange(None, api)
+    start = datetime.datetime(2017, 1, 1)
+    end = datetime.datetime(2017, 1, 2)
+    for resolution in ("1h", "30m"):
+        with pytest.raises(ExchangeException) as ex:
+            Market(exchange, "BTC_DASH").get_chart(resolution, start, end)
+        assert "No chart data of BTC_DASH" in str(ex.value)
+    with pytest.raises(ExchangeException):
+        BacktestMarket(exchange, "BTC_DASH").get_chart("1h", start, end)
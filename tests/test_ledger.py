@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_ledger
+----------------------------------
+
+Tests for `cointrader.ledger` module.
+"""
+import datetime
+
+DATE = datetime.datetime(2017, 8, 28, 19, 51, 50)
+
+
+def order(rate, amount, total):
+    return {u'orderNumber': u'101983568396',
+            u'resultingTrades': [{u'tradeID': u'10337029',
+                                  u'rate': u'{}'.format(rate),
+                                  u'amount': u'{}'.format(amount),
+                                  u'date': u'2017-08-28 19:51:50',
+                                  u'total': u'{}'.format(total)}]}
+
+
+def get_ledger():
+    from cointrader.ledger import Ledger
+    ledger = Ledger("BTC_DASH")
+    ledger.init(DATE, 0.07, 1.0, 0)
+    ledger.buy(order(0.07, 14.0, 0.98))
+    ledger.sell(order(0.08, 14.0, 1.1))
+    return ledger
+
+
+def test_ledger_accounting():
+    from cointrader.ledger import replay, statistic
+    ledger = get_ledger()
+    assert [e.order_type for e in ledger] == ["INIT", "BUY", "SELL"]
+    assert (ledger.btc, ledger.amount) == (1.1, 0)
+    assert replay(ledger) == (1.1, 0)
+    stat = statistic(ledger, {"date": 1500000000, "close": 0.07}, {"date": 1500001800, "close": 0.08})
+    assert stat["trader_end_value"] == 1.1
+    assert stat["market_end_value"] == 1.0
+
+
+def test_ledger_flush():
+    import sqlalchemy as sa
+    from cointrader.database import Base
+    from cointrader.bot import Trade, replay_tradelog
+    from cointrader.ledger import Ledger
+    engine = sa.create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sa.orm.sessionmaker(bind=engine)()
+
+    ledger = get_ledger()
+    assert ledger.flush(1, session) == 3
+    assert ledger.flush(1, session) == 0
+    trades = session.query(Trade).order_by(Trade.id).all()
+    assert [t.order_type for t in trades] == ["INIT", "BUY", "SELL"]
+    assert trades[1].date == DATE
+    assert replay_tradelog(trades) == (1.1, 0)
+
+    ledger = Ledger("BTC_DASH", trades)
+    ledger.buy(order(0.08, 13.0, 1.1))
+    assert ledger.flush(1, session) == 1
+    assert session.query(Trade).count() == 4
+
+
+def test_replay_trades_of_bot(monkeypatch):
+    from cointrader import bot as botmodule
+    from cointrader.bot import replay_tradelog
+    from cointrader.strategy import Followtrend
+    from tests.test_backtest import get_bot
+    from tests.strategies.test_signal_series import get_data
+
+    class Session(object):
+        def commit(self):
+            pass
+
+    monkeypatch.setattr(botmodule, "db", Session())
+    bot = get_bot(Followtrend, get_data())
+    bot._market.get_chart(bot._resolution, bot._start, bot._end)
+    bot._buy()
+    assert bot.amount > 0
+    assert replay_tradelog(bot.trades) == (bot.btc, bot.amount)
+    bot._sell()
+    assert bot.btc > 0
+    assert replay_tradelog(bot.trades) == (bot.btc, bot.amount)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_montecarlo
+----------------------------------
+
+Tests for `cointrader.montecarlo` module.
+"""
+from tests.strategies.test_signal_series import get_data
+
+
+def get_arrays(size=400):
+    from cointrader.candles import CandleStore
+    from cointrader.montecarlo import toarrays
+    return toarrays(CandleStore(get_data(size)))
+
+
+def test_bootstrap():
+    import numpy
+    from cointrader.montecarlo import bootstrap
+    arrays = get_arrays()
+    data = bootstrap(arrays, numpy.random.RandomState(1), block=10)
+    close = numpy.array(data.column("close").tolist())
+    assert len(data) == len(arrays["close"])
+    assert data.column("date").tolist() == arrays["date"].tolist()
+    assert close[0] == arrays["close"][0]
+    assert not numpy.allclose(close, arrays["close"])
+    returns = arrays["close"][1:] / arrays["close"][:-1]
+    for r in close[1:] / close[:-1]:
+        assert numpy.isclose(returns, r).any()
+    for point in data:
+        assert point["low"] <= point["close"] <= point["high"]
+
+
+def test_perturb():
+    import numpy
+    from cointrader.montecarlo import perturb
+    arrays = get_arrays()
+    data = perturb(arrays, numpy.random.RandomState(1), sigma=0)
+    assert numpy.allclose(data.column("close").tolist(), arrays["close"])
+    data = perturb(arrays, numpy.random.RandomState(1), sigma=0.01)
+    assert not numpy.allclose(data.column("close").tolist(), arrays["close"])
+
+
+def test_simulate():
+    from cointrader.montecarlo import simulate, distribution
+    from cointrader.strategy import Followtrend
+    data = get_data()
+    stats = simulate(data, "BTC_DASH", Followtrend, runs=6, block=20, amount=10, processes=2)
+    assert len(stats) == 6
+    assert stats == simulate(data, "BTC_DASH", Followtrend, runs=6, block=20, amount=10, processes=1)
+    assert stats == simulate(data, "BTC_DASH", Followtrend, runs=6, block=20, amount=10, processes=1, batch=4)
+    assert len(set(stat["profit_chart"] for stat in stats)) > 1
+    result = distribution(stats)
+    assert result["profit_cointrader"][5] <= result["profit_cointrader"][50] <= result["profit_cointrader"][95]
+    assert 0 <= result["better"] <= 1
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_orderbook
+----------------------------------
+
+Tests for `cointrader.orderbook` module.
+"""
+
+SNAPSHOT = [148, 1001, [["i", {"currencyPair": "BTC_DASH",
+                               "orderBook": [{"0.07100000": "1.5", "0.07200000": "2.0"},
+                                             {"0.06900000": "2.0", "0.06800000": "1.0"}]}]]]
+
+
+def replay(book, messages):
+    # Unlike OrderBook.follow the replica stays synchronised after the
+    # last message.
+    from cointrader.orderbook import ReplayFeed
+    for message in ReplayFeed(messages):
+        book.process(message)
+
+
+class BookApi(object):
+
+    def __init__(self, seq):
+        self.seq = seq
+        self.requests = 0
+
+    def book(self, currency, priority=None, depth=10):
+        self.requests += 1
+        return {"asks": [["0.07300000", 1.0]],
+                "bids": [["0.06700000", 1.0]],
+                "isFrozen": "0",
+                "seq": self.seq}
+
+
+def test_snapshot_and_updates():
+    from cointrader.orderbook import OrderBook
+    book = OrderBook("BTC_DASH")
+    replay(book, [
+        [150, 1, [["i", {"currencyPair": "BTC_ETH", "orderBook": [{}, {}]}]]],
+        SNAPSHOT,
+        [1010],
+        [148, 1002, [["o", 1, "0.06950000", "0.5"],
+                     ["o", 0, "0.07100000", "0.00000000"],
+                     ["t", "1234", 1, "0.07", "0.1", 1500000000]]],
+        [148, 1002, [["o", 1, "0.06990000", "0.5"]]],
+        [150, 2, [["o", 1, "0.06990000", "0.5"]]]])
+    assert book.seq == 1002
+    assert book.book(depth=2) == {"asks": [[0.072, 2.0]],
+                                  "bids": [[0.0695, 0.5], [0.069, 2.0]],
+                                  "isFrozen": 0,
+                                  "seq": 1002}
+    assert book.resyncs == 0
+
+
+def test_gap_resyncs():
+    from cointrader.orderbook import OrderBook
+    api = BookApi(1004)
+    book = OrderBook("BTC_DASH", api)
+    replay(book, [
+        SNAPSHOT,
+        [148, 1003, [["o", 1, "0.06950000", "0.5"]]],
+        [148, 1004, [["o", 1, "0.06960000", "0.5"]]],
+        [148, 1005, [["o", 0, "0.07400000", "3.0"]]]])
+    assert api.requests == 1
+    assert book.resyncs == 1
+    assert book.seq == 1005
+    assert book.book() == {"asks": [[0.073, 1.0], [0.074, 3.0]],
+                           "bids": [[0.067, 1.0]],
+                           "isFrozen": 0,
+                           "seq": 1005}
+
+
+def test_gap_without_api():
+    from cointrader.orderbook import OrderBook
+    book = OrderBook("BTC_DASH")
+    replay(book, [SNAPSHOT, [148, 1003, [["o", 1, "0.06950000", "0.5"]]]])
+    assert not book.synced
+
+
+def test_market_prices_from_replica():
+    from cointrader.exchange import Market
+    from cointrader.orderbook import OrderBook
+
+    class Exchange(object):
+        _api = BookApi(1)
+
+    market = Market(Exchange(), "BTC_DASH", dry_run=True)
+    market.orderbook = OrderBook("BTC_DASH")
+    market.buy(1)
+    assert Exchange._api.requests == 1
+    replay(market.orderbook, [SNAPSHOT])
+    order = market.buy(1)
+    assert Exchange._api.requests == 1
+    assert float(order["resultingTrades"][0]["rate"]) == 0.072
+    order = market.sell(1)
+    assert float(order["resultingTrades"][0]["rate"]) == 0.068
+
+
+def test_failing_feed_unsyncs():
+    from cointrader.exchange import Market
+    from cointrader.orderbook import OrderBook
+
+    class Exchange(object):
+        _api = BookApi(1)
+
+    def feed():
+        yield SNAPSHOT
+        yield [148, 1002, [["o", 1, "0.06950000", "0.5"]]]
+        raise IOError("Connection lost")
+
+    market = Market(Exchange(), "BTC_DASH", dry_run=True)
+    market.orderbook = OrderBook("BTC_DASH")
+    market.orderbook.start(feed())
+    market.orderbook._thread.join()
+    assert not market.orderbook.synced
+    order = market.buy(1)
+    assert Exchange._api.requests == 1
+    assert float(order["resultingTrades"][0]["rate"]) == 0.073
+
+
+def test_stale_replica():
+    from cointrader.orderbook import OrderBook
+    now = [0]
+    book = OrderBook("BTC_DASH", max_age=30, clock=lambda: now[0])
+    book.process(SNAPSHOT)
+    assert book.synced
+    now[0] = 20
+    book.process([1010])
+    now[0] = 50
+    assert book.synced
+    now[0] = 51
+    assert not book.synced
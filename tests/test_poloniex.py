@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_poloniex
+----------------------------------
+
+Tests for `cointrader.exchanges.poloniex` module. The API is tested
+against a local HTTP server which stands in for the exchange.
+"""
+import sys
+import json
+import time
+import threading
+
+import pytest
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, parse_qs
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse, parse_qs
+
+RESPONSES = {
+    "returnTicker": {"BTC_DASH": {"last": "0.07", "percentChange": "0.01", "baseVolume": "100"},
+                     "USDT_BTC": {"last": "4000"}},
+    "returnCompleteBalances": {"BTC": {"available": "1.5", "btcValue": "1.5"}},
+    "returnOrderBook": {"asks": [["0.071", 1]], "bids": [["0.069", 1]], "isFrozen": 0, "seq": 1},
+    "returnTradeHistory": [{"globalTradeID": 2, "tradeID": "6325758", "date": "2017-07-15 08:08:40",
+                            "type": "sell", "rate": "0.07", "amount": "1.0", "total": "0.07"}],
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self, params):
+        command = params["command"][0]
+        with self.server.lock:
+            self.server.requests.append(command)
+            self.server.active += 1
+            self.server.max_active = max(self.server.max_active, self.server.active)
+        time.sleep(self.server.delay)
+        with self.server.lock:
+            self.server.active -= 1
+        body = json.dumps(RESPONSES.get(command, {"error": "Invalid command"})).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._respond(parse_qs(urlparse(self.path).query))
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        self._respond(parse_qs(self.rfile.read(length).decode()))
+
+
+class Server(ThreadingMixIn, HTTPServer):
+
+    daemon_threads = True
+
+
+@pytest.fixture
+def server():
+    server = Server(("127.0.0.1", 0), Handler)
+    server.connections = 0
+    server.requests = []
+    server.delay = 0
+    server.lock = threading.Lock()
+    server.active = 0
+    server.max_active = 0
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get_api(server, factory=None):
+    from cointrader.config import Config
+    from cointrader.exchanges.poloniex import Poloniex
+    config = Config()
+    config.api_key = "key"
+    config.api_secret = "secret"
+    api = (factory or Poloniex)(config)
+    url = "http://127.0.0.1:{}".format(server.server_address[1])
+    api.PUBLIC_URL = url + "/public"
+    api.TRADING_URL = url + "/tradingApi"
+    return api
+
+
+def test_api_reuses_connection(server):
+    api = get_api(server)
+    assert api.ticker("USDT_BTC") == {"last": "4000"}
+    assert api.balance()["BTC"]["quantity"] == 1.5
+    assert api.book("BTC_DASH")["seq"] == 1
+    assert server.requests == ["returnTicker", "returnCompleteBalances", "returnOrderBook"]
+    assert server.connections == 1
+
+
+def test_api_trades(server):
+    import datetime
+    from cointrader.tradehistory import parse
+    api = get_api(server)
+    trades = api.trades("BTC_DASH", datetime.datetime(2017, 7, 15), datetime.datetime(2017, 7, 16))
+    assert server.requests == ["returnTradeHistory"]
+    tick = parse(trades[0])
+    assert tick.trade_id == 6325758
+    assert tick.date == 1500106120
+    assert not tick.buy
+
+
+def test_api_error(server):
+    from cointrader.exchanges.poloniex import ApiError
+    api = get_api(server)
+    with pytest.raises(ApiError):
+        api.volume()
+
+
+def test_api_caches_ticker(server):
+    api = get_api(server)
+    api.ticker()
+    api.ticker("USDT_BTC")
+    assert server.requests == ["returnTicker"]
+    assert api.cache.hits == 1
+    assert api.cache.misses == 1
+    api.cache.invalidate()
+    api.ticker()
+    assert server.requests == ["returnTicker", "returnTicker"]
+
+
+def test_ttl_cache_expires():
+    from cointrader.exchanges.cache import TTLCache
+    now = [0]
+    cache = TTLCache(10, clock=lambda: now[0])
+    assert cache.get("a", lambda: 1) == 1
+    assert cache.get("a", lambda: 2) == 1
+    now[0] = 10
+    assert cache.get("a", lambda: 3) == 3
+    assert cache.stats == {"hits": 1, "misses": 2, "size": 1}
+
+
+@pytest.mark.skipif(sys.version_info < (3, 5), reason="requires asyncio")
+def test_async_api_fetches_concurrently(server):
+    from cointrader.exchanges import aiopoloniex
+    server.delay = 0.1
+    api = aiopoloniex.AsyncApi(get_api(server))
+    markets = ["BTC_DASH", "BTC_LTC", "BTC_XMR", "BTC_ETH", "BTC_ZEC"]
+    try:
+        books = aiopoloniex.run(aiopoloniex.fetch_books(api, markets))
+    finally:
+        api.close()
+    assert server.requests == ["returnOrderBook"] * len(markets)
+    # The requests were handled by the server at the same time.
+    assert server.max_active > 1
+    assert len(books) == len(markets)
+    assert all(book["seq"] == 1 for book in books)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_resample
+----------------------------------
+
+Tests for `cointrader.resample` module.
+"""
+from tests.test_chart import get_data
+
+
+def aggregate(data, period):
+    # Straight forward aggregation to compare the vectorized one with.
+    result = []
+    for point in data:
+        date = point["date"] // period * period
+        if not result or result[-1]["date"] != date:
+            result.append(dict(point, date=date))
+            continue
+        last = result[-1]
+        last["high"] = max(last["high"], point["high"])
+        last["low"] = min(last["low"], point["low"])
+        last["close"] = point["close"]
+        last["volume"] += point["volume"]
+        last["quoteVolume"] += point["quoteVolume"]
+    for point in result:
+        point["weightedAverage"] = point["volume"] / point["quoteVolume"]
+    return result
+
+
+def test_resample():
+    from cointrader.resample import resample
+    data = get_data(200)
+    for period in (3600, 7200, 8 * 3600):
+        result = resample(data, period)
+        expected = aggregate(data, period)
+        assert len(result) == len(expected)
+        for point, other in zip(result, expected):
+            assert point["date"] == other["date"]
+            for key in ("open", "high", "low", "close", "volume", "quoteVolume", "weightedAverage"):
+                assert abs(point[key] - other[key]) < 1e-12
+
+
+def test_resample_without_trades():
+    from cointrader.resample import resample
+    data = get_data(4)
+    for point in data:
+        point["volume"] = point["quoteVolume"] = 0
+    result = resample(data, 86400)
+    assert len(result) == 1
+    assert result[0]["weightedAverage"] == data[-1]["close"]
+    assert len(resample([], 3600)) == 0
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_scheduler
+----------------------------------
+
+Tests for `cointrader.exchanges.scheduler` module.
+
+The scheduler runs on a clock which is advanced by the tests. Requests
+only get a token when the test advances the clock, so the order of the
+requests does not depend on the timing of the threads.
+"""
+import time
+import threading
+
+
+def wait_for(scheduler, predicate, timeout=10):
+    """Will wait until the predicate on the state of the scheduler is
+    true."""
+    deadline = time.time() + timeout
+    with scheduler._condition:
+        while not predicate():
+            assert time.time() < deadline, "Timeout while waiting for the scheduler"
+            scheduler._condition.wait(0.01)
+
+
+def tick(scheduler, now, seconds=1):
+    """Will advance the clock of the scheduler and wake up the waiting
+    requests."""
+    with scheduler._condition:
+        now[0] += seconds
+        scheduler._condition.notify_all()
+
+
+def start(target, *args):
+    thread = threading.Thread(target=target, args=args)
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+def test_token_bucket():
+    from cointrader.exchanges.scheduler import TokenBucket
+    now = [0]
+    bucket = TokenBucket(2, clock=lambda: now[0])
+    assert bucket.take() == 0
+    assert bucket.take() == 0
+    assert bucket.take() == 0.5
+    now[0] = 0.5
+    assert bucket.take() == 0
+
+
+def test_scheduler_limits_rate():
+    from cointrader.exchanges.scheduler import Scheduler
+    now = [0.0]
+
+    def clock():
+        # Time passes with every look at the clock.
+        now[0] += 0.01
+        return now[0]
+
+    scheduler = Scheduler(rate=20, capacity=1, clock=clock)
+    sent = []
+    for i in range(5):
+        scheduler.submit(lambda: sent.append(now[0]))
+    assert scheduler.sent == 5
+    for last, current in zip(sent, sent[1:]):
+        assert current - last >= 1 / 20.0 - 1e-9
+
+
+def test_scheduler_priority():
+    from cointrader.exchanges.scheduler import Scheduler, ORDER, PUBLIC
+    now = [0]
+    scheduler = Scheduler(rate=1, capacity=1, clock=lambda: now[0])
+    scheduler.submit(lambda: None)
+    order = []
+    threads = [start(scheduler.submit, lambda: order.append(PUBLIC), PUBLIC) for i in range(3)]
+    wait_for(scheduler, lambda: len(scheduler._waiting) == 3)
+    threads.append(start(scheduler.submit, lambda: order.append(ORDER), ORDER))
+    wait_for(scheduler, lambda: len(scheduler._waiting) == 4)
+    for i in range(4):
+        tick(scheduler, now)
+        wait_for(scheduler, lambda: len(order) == i + 1)
+    for thread in threads:
+        thread.join()
+    # The order is sent as soon as the next token is available.
+    assert order == [ORDER, PUBLIC, PUBLIC, PUBLIC]
+
+
+def test_scheduler_coalesces_requests():
+    from cointrader.exchanges.scheduler import Scheduler
+    scheduler = Scheduler(rate=100)
+    calls = []
+    results = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def request():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return "ticker"
+
+    def submit():
+        results.append(scheduler.submit(request, key="ticker"))
+
+    threads = [start(submit)]
+    started.wait()
+    threads.extend(start(submit) for i in range(4))
+    wait_for(scheduler, lambda: scheduler.coalesced == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == ["ticker"] * 5
+
+
+def test_scheduler_coalesced_order_raises_priority():
+    from cointrader.exchanges.scheduler import Scheduler, ORDER, PUBLIC
+    now = [0]
+    scheduler = Scheduler(rate=1, capacity=1, clock=lambda: now[0])
+    scheduler.submit(lambda: None)
+    order = []
+    results = []
+
+    def book():
+        order.append("book")
+        return "book"
+
+    # The public queue is blocked by other requests when the public
+    # book request starts waiting.
+    threads = [start(scheduler.submit, lambda: order.append(PUBLIC), PUBLIC) for i in range(3)]
+    wait_for(scheduler, lambda: len(scheduler._waiting) == 3)
+    threads.append(start(scheduler.submit, book, PUBLIC, "book"))
+    wait_for(scheduler, lambda: len(scheduler._waiting) == 4)
+    threads.append(start(lambda: results.append(scheduler.submit(book, ORDER, "book"))))
+    wait_for(scheduler, lambda: scheduler.coalesced == 1)
+    for i in range(4):
+        tick(scheduler, now)
+        wait_for(scheduler, lambda: len(order) == i + 1)
+    for thread in threads:
+        thread.join()
+    assert order == ["book", PUBLIC, PUBLIC, PUBLIC]
+    assert results == ["book"]
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_streaming
+----------------------------------
+
+Tests for `cointrader.streaming` module.
+"""
+from tests.test_chart import get_data
+
+
+def get_stock(data):
+    from stockstats import StockDataFrame
+    from cointrader.chart import chart2frame
+    return StockDataFrame.retype(chart2frame(data))
+
+
+def assert_equal(a, b):
+    assert len(a) == len(b)
+    for x, y in zip(a, b):
+        assert abs(x - y) <= 1e-12 * max(1.0, abs(y))
+
+
+def test_engine_matches_stockstats():
+    from cointrader.streaming import IndicatorEngine
+    data = get_data(300)
+    stock = get_stock(data)
+    engine = IndicatorEngine()
+    engine.feed(data)
+    assert_equal(engine.ema(12), stock.get("close_12_ema").tolist())
+    assert_equal(engine.sma(10), stock.get("close_10_sma").tolist())
+    assert_equal(engine.macdh(), stock.get("macdh").tolist())
+
+
+def test_engine_incremental_feed():
+    from cointrader.streaming import IndicatorEngine
+    data = get_data(300)
+    engine = IndicatorEngine()
+    engine.feed(data[:150])
+    engine.ema(26)
+    engine.sma(30)
+    engine.macdh()
+    for i in range(151, len(data) + 1):
+        engine.feed(data[:i])
+    stock = get_stock(data)
+    assert len(engine) == len(data)
+    assert_equal(engine.ema(26), stock.get("close_26_ema").tolist())
+    assert_equal(engine.sma(30), stock.get("close_30_sma").tolist())
+    assert_equal(engine.macdh(), stock.get("macdh").tolist())
+
+
+def test_engine_replaces_last_point():
+    from cointrader.streaming import IndicatorEngine
+    data = get_data(100)
+    forming = dict(data[-1])
+    forming["close"] = forming["close"] * 2
+    engine = IndicatorEngine()
+    engine.sma(10)
+    engine.macdh()
+    engine.feed(data[:-1] + [forming])
+    engine.feed(data)
+    stock = get_stock(data)
+    assert len(engine) == len(data)
+    assert_equal(engine.sma(10), stock.get("close_10_sma").tolist())
+    assert_equal(engine.macdh(), stock.get("macdh").tolist())
+
+
+def test_engine_matches():
+    from cointrader.streaming import IndicatorEngine
+    from cointrader.chart import Chart
+    data = get_data(100)
+    engine = IndicatorEngine()
+    engine.feed(data[:50])
+    assert engine.matches(data)
+    assert engine.matches(data[:49] + [dict(data[49], close=1.0)])
+    assert not engine.matches(data[:40])
+    # A datapoint within the chart changed.
+    changed = data[:10] + [dict(data[10], close=1.0)] + data[11:]
+    assert not engine.matches(changed)
+    # A gap was filled, so the datapoints moved.
+    gap = data[:20] + data[21:]
+    engine = IndicatorEngine()
+    engine.feed(gap[:50])
+    assert not engine.matches(data)
+
+    chart = Chart(changed, None, None, engine)
+    assert chart.engine is not engine
+    assert_equal(chart.sma(10), get_stock(changed).get("close_10_sma").tolist())
+
+
+def test_series_view():
+    from cointrader.streaming import SeriesView
+    view = SeriesView([1, 2, 3, 4, 5], 1, 4)
+    assert len(view) == 3
+    assert view[-1] == 4
+    assert view[::-1] == [4, 3, 2]
+    assert view.tolist() == [2, 3, 4]
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_sweep
+----------------------------------
+
+Tests for `cointrader.sweep` module.
+"""
+import datetime
+
+from tests.strategies.test_signal_series import get_data
+
+
+def test_expand():
+    from cointrader.sweep import expand, parse_param
+    assert parse_param("fast=8,12") == ("fast", [8, 12])
+    assert parse_param("x=0.5") == ("x", [0.5])
+    assert expand({"fast": [8, 12], "slow": [26]}) == [{"fast": 8, "slow": 26},
+                                                      {"fast": 12, "slow": 26}]
+
+
+def test_backtests_in_pool():
+    from cointrader.sweep import backtests, expand
+    from cointrader.strategy import Followtrend
+    data = get_data()
+    start = datetime.datetime.utcfromtimestamp(data[0]["date"])
+    end = datetime.datetime.utcfromtimestamp(data[-1]["date"])
+    params = expand({"fast": [8, 12], "slow": [26, 30]})
+    args = (data, "BTC_DASH", Followtrend, params, "30m", start, end, 1.0, 0)
+    results = backtests(*args, processes=2)
+    assert [p for p, stat in results] == params
+    assert results == backtests(*args, processes=1)
+    assert len(set(stat["profit_cointrader"] for p, stat in results)) > 1
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_tradehistory
+----------------------------------
+
+Tests for `cointrader.tradehistory` module.
+"""
+import datetime
+
+START = 1500000000 - 1500000000 % 3600
+
+
+class TradesApi(object):
+
+    def __init__(self, trades, limit):
+        self.trades_ = trades
+        self.limit = limit
+        self.requests = 0
+
+    def trades(self, currency, start, end):
+        from cointrader.tradehistory import totimestamp
+        self.requests += 1
+        result = [t for t in self.trades_
+                  if totimestamp(start) <= t["_ts"] <= totimestamp(end)]
+        # The latest trades come first.
+        return result[::-1][:self.limit]
+
+
+def get_trades(size, start=START):
+    trades = []
+    for i in range(size):
+        ts = start + i * 7
+        trades.append({"_ts": ts, "tradeID": str(i + 1),
+                       "date": datetime.datetime.utcfromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S"),
+                       "type": "buy" if i % 2 else "sell",
+                       "rate": "{:.8f}".format(0.07 + (i % 13) / 1000.0),
+                       "amount": "2.0", "total": "{:.8f}".format(2 * (0.07 + (i % 13) / 1000.0))})
+    return trades
+
+
+def test_fetch_splits_full_windows():
+    from cointrader.tradehistory import fetch
+    trades = get_trades(2000)
+    api = TradesApi(trades, limit=100)
+    ticks = list(fetch(api, "BTC_DASH", START, START + 2000 * 7, limit=100))
+    assert [t.trade_id for t in ticks] == list(range(1, 2001))
+    assert ticks[0].date == START
+    assert ticks[1].buy and not ticks[0].buy
+
+
+def test_ingest_resumes():
+    import sqlalchemy as sa
+    from cointrader.tradehistory import TradeHistory, fromtimestamp
+    trades = get_trades(1000)
+    history = TradeHistory(sa.create_engine("sqlite://"))
+    api = TradesApi(trades[:600], limit=50000)
+    end = fromtimestamp(START + 1000 * 7)
+    assert history.ingest(api, "BTC_DASH", fromtimestamp(START), end, batch=100) == 600
+    api.trades_ = trades
+    assert history.ingest(api, "BTC_DASH", end=end) == 400
+    assert history.last("BTC_DASH").trade_id == 1000
+    assert [t.trade_id for t in history.load("BTC_DASH", batch=64)] == list(range(1, 1001))
+
+
+def test_ingest_fetches_earlier_trades():
+    import sqlalchemy as sa
+    from cointrader.tradehistory import TradeHistory, fromtimestamp
+    trades = get_trades(1000)
+    history = TradeHistory(sa.create_engine("sqlite://"))
+    api = TradesApi(trades, limit=50000)
+    end = fromtimestamp(START + 1000 * 7)
+    assert history.ingest(api, "BTC_DASH", fromtimestamp(START + 400 * 7), end, batch=100) == 600
+    assert history.first("BTC_DASH").trade_id == 401
+    assert history.ingest(api, "BTC_DASH", fromtimestamp(START), end, batch=100) == 400
+    assert history.first("BTC_DASH").trade_id == 1
+    assert [t.trade_id for t in history.load("BTC_DASH")] == list(range(1, 1001))
+    assert history.ingest(api, "BTC_DASH", fromtimestamp(START), end) == 0
+
+
+def test_candles():
+    from cointrader.tradehistory import candles, parse
+    from cointrader.chart import Chart
+    ticks = [parse(t) for t in get_trades(100)]
+    result = list(candles(ticks, 60))
+    # A trade every 7 seconds.
+    assert sum(c["quoteVolume"] for c in result) == 200.0
+    first = [t for t in ticks if t.date < START + 60]
+    assert result[0]["date"] == START
+    assert result[0]["open"] == first[0].rate
+    assert result[0]["close"] == first[-1].rate
+    assert result[0]["high"] == max(t.rate for t in first)
+    assert result[0]["low"] == min(t.rate for t in first)
+    assert abs(result[0]["weightedAverage"] - sum(t.total for t in first) / (2.0 * len(first))) < 1e-12
+    chart = Chart(result, None, None)
+    assert len(chart.data) == len(result)
+
+
+def test_tick_candles():
+    from cointrader.tradehistory import tick_candles, Tick
+    ticks = [Tick(i, 100 + i // 3, 1.0, 1.0, 1.0, True) for i in range(20)]
+    result = list(tick_candles(ticks, 4))
+    # Trades in the same second as the last trade are kept together.
+    assert [c["quoteVolume"] for c in result] == [6.0, 6.0, 6.0, 2.0]
+    dates = [c["date"] for c in result]
+    assert dates == sorted(set(dates))
+
+
+def test_candles_fill_gaps():
+    from cointrader.tradehistory import candles, Tick
+    ticks = [Tick(1, START + 5, 1.0, 1.0, 1.0, True),
+             Tick(2, START + 10, 2.0, 1.0, 2.0, True),
+             Tick(3, START + 200, 3.0, 1.0, 3.0, False)]
+    result = list(candles(ticks, 60))
+    assert [c["date"] for c in result] == [START, START + 60, START + 120, START + 180]
+    assert result[1] == {"date": START + 60, "open": 2.0, "high": 2.0, "low": 2.0, "close": 2.0,
+                         "volume": 0.0, "quoteVolume": 0.0, "weightedAverage": 2.0}
+    assert result[2]["close"] == 2.0
+    assert result[3]["open"] == 3.0
+
+
+def test_market_chart_from_trades():
+    import sqlalchemy as sa
+    from cointrader.exchange import Exchange, Market, BacktestMarket
+    from cointrader.tradehistory import TradeHistory, candles, parse, fromtimestamp
+    trades = get_trades(3000)
+    api = TradesApi(trades, limit=50000)
+    exchange = Exchange(None, api, history=TradeHistory(sa.create_engine("sqlite://")))
+    market = Market(exchange, "BTC_DASH")
+    start = fromtimestamp(START + 120 * 60)
+    end = fromtimestamp(START + 3000 * 7)
+    chart = market.get_chart("1m", start, end)
+    expected = list(candles((parse(t) for t in trades), 60))
+    assert len(chart.data) == len(expected)
+    assert chart.data[0] == expected[0]
+    assert chart.data[-1] == expected[-1]
+
+    requests = api.requests
+    backtest = BacktestMarket(exchange, "BTC_DASH")
+    backtest.get_chart("1m", start, end)
+    assert backtest.chart.data[-1] == expected[-1]
+    # The trades are stored already.
+    assert api.requests == requests + 1
+
+    # A chart starting before the first stored trade.
+    exchange = Exchange(None, api, history=TradeHistory(sa.create_engine("sqlite://")))
+    market = Market(exchange, "BTC_DASH")
+    market.get_chart("1m", fromtimestamp(START + 300 * 60), end)
+    chart = market.get_chart("1m", start, end)
+    assert chart.data[0] == expected[0]
+    assert len(chart.data) == len(expected)
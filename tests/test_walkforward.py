@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_walkforward
+----------------------------------
+
+Tests for `cointrader.walkforward` module.
+"""
+from tests.strategies.test_signal_series import get_data
+
+
+def test_windows():
+    from cointrader.walkforward import windows
+    assert windows(400, 100, 50, 120) == [(120, 220, 270), (170, 270, 320), (220, 320, 370)]
+    assert windows(200, 100, 50, 120) == []
+
+
+def test_evaluate_matches_backtest():
+    from cointrader.walkforward import WalkForward, evaluate
+    from cointrader.ledger import Ledger
+    from cointrader.strategy import Followtrend
+    from tests.test_backtest import get_bot
+    from cointrader.backtest import Backtest
+    data = get_data()
+    walk = WalkForward(data, "BTC_DASH", Followtrend, [{}], 100, 50)
+    signals = walk.signals()[0]
+    backtest = Backtest(get_bot(Followtrend, data))
+    backtest.run()
+
+    ledger = Ledger("BTC_DASH", backtest.ledger[:1])
+    stat = evaluate(walk.data, "BTC_DASH", signals, 120, len(data), ledger=ledger)
+    assert stat["trades"] == len(backtest.ledger) - 1
+    assert [(e.order_type, e.rate) for e in ledger] == [(e.order_type, e.rate) for e in backtest.ledger]
+
+
+def test_walkforward():
+    from cointrader.walkforward import WalkForward
+    from cointrader.sweep import expand
+    from cointrader.strategy import Followtrend
+    data = get_data(1000)
+    params = expand({"fast": [6, 12], "slow": [20, 26]})
+    walk = WalkForward(data, "BTC_DASH", Followtrend, params, 200, 100)
+    results = walk.run(processes=2)
+    assert len(results) == 6
+    for result in results:
+        assert result["params"] in params
+        assert result["train"]["start"] < result["test"]["start"]
+    stat = walk.stat()
+    assert stat["start"] == results[0]["test"]["start"]
+    assert stat["end"] == results[-1]["test"]["end"]
+    assert stat["trades"] == len(walk.ledger) - 1 > 0
+
+    sequential = WalkForward(data, "BTC_DASH", Followtrend, params, 200, 100)
+    assert sequential.run(processes=1) == results
+    assert sequential.stat() == stat